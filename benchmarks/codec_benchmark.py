@@ -0,0 +1,66 @@
+import argparse
+import json
+import random
+import time
+from utils import storage_codecs
+
+def sample_body(records, seed=1):
+    """Build a pretty-printed JSON body shaped like a typical API listing"""
+    rng = random.Random(seed)
+    data = {
+        'count': records,
+        'results': [
+            {
+                'id': i,
+                'name': f"item-{rng.randrange(10 ** 6)}",
+                'active': rng.random() < 0.5,
+                'price': round(rng.uniform(1, 1000), 2),
+                'tags': rng.sample(["red", "green", "blue", "new", "sale", "limited"], 3),
+                'owner': {'id': rng.randrange(1000), 'email': f"user{rng.randrange(1000)}@example.com"},
+            }
+            for i in range(records)
+        ],
+    }
+    return json.dumps(data, indent=4).encode("utf-8")
+
+def measure(func, rounds):
+    """Return the best wall time of several runs"""
+    best = None
+    for _ in range(rounds):
+        started = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def run(records, rounds):
+    """Measure write and read throughput of every available codec"""
+    body = sample_body(records)
+    megabytes = len(body) / (1024 * 1024)
+    results = []
+    for codec in storage_codecs.available_codecs():
+        stored = storage_codecs.encode(body, codec)
+        assert storage_codecs.decode(stored) == body
+        write_time = measure(lambda: storage_codecs.encode(body, codec), rounds)
+        read_time = measure(lambda: storage_codecs.decode(stored), rounds)
+        results.append({
+            'codec': codec,
+            'body_bytes': len(body),
+            'stored_bytes': len(stored),
+            'ratio': round(len(body) / len(stored), 2),
+            'write_mb_s': round(megabytes / write_time, 1) if write_time else None,
+            'read_mb_s': round(megabytes / read_time, 1) if read_time else None,
+        })
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Storage codec throughput benchmark")
+    parser.add_argument("--records", type=int, default=20000, help="Records in the sample body")
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    for result in run(args.records, args.rounds):
+        print(json.dumps(result))
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,113 @@
+import argparse
+import io
+import json
+import re
+import sys
+import time
+import tkinter as tk
+from benchmarks.codec_benchmark import sample_body, measure
+from utils import json_backend
+from utils.json_highlighter import TAGS, Highlighter
+from utils.json_lines import JSONLines
+
+# The per-kind patterns of the previous highlighter, one pass each
+LEGACY_PATTERNS = {
+    "string": re.compile(r'"(?:[^"\\]|\\.)*"'),
+    "number": re.compile(r'\b-?\d+(?:\.\d+)?(?:[eE][+-]?\d+)?\b'),
+    "boolean": re.compile(r'\b(?:true|false)\b'),
+    "null": re.compile(r'\bnull\b'),
+    "key": re.compile(r'"(?:[^"\\]|\\.)*"(?=\s*:)'),
+}
+
+WINDOW_ROWS = 60
+
+def sample_document(megabytes):
+    """Build a pretty-printed document of roughly the given size"""
+    # One record of the sample body is about 260 bytes once pretty-printed
+    body = sample_body(max(1, int(megabytes * 1024 * 1024 / 260)))
+    return json_backend.pretty(json_backend.loads(body))
+
+def text_widget(text):
+    """Return a tk.Text holding the document, in a root window that is never shown"""
+    root = tk.Tk()
+    root.withdraw()
+    widget = tk.Text(root)
+    widget.insert("1.0", text)
+    return widget
+
+def clear_tags(widget):
+    """Remove every highlight so each round tags the document from scratch"""
+    for tag in TAGS:
+        widget.tag_remove(tag, "1.0", "end")
+
+def legacy_highlight(widget, text):
+    """Five passes over the whole text, one tag_add call per match"""
+    clear_tags(widget)
+    calls = 0
+    for tag, pattern in LEGACY_PATTERNS.items():
+        for match in pattern.finditer(text):
+            widget.tag_add(tag, f"1.0+{match.start()}c", f"1.0+{match.end()}c")
+            calls += 1
+    return calls
+
+def single_pass_highlight(widget, text):
+    """One tokenizer pass over every line, one tag_add call per tag"""
+    clear_tags(widget)
+    Highlighter().apply(widget, [(line, None) for line in text.split("\n")])
+
+def single_pass_calls(text):
+    """Return the tag_add calls of the single pass path, one per tag that has tokens"""
+    ranges = Highlighter().ranges((line, None) for line in text.split("\n"))
+    return sum(1 for indices in ranges.values() if indices)
+
+def window_rows(lines, top):
+    """Return the (text, key) rows the viewer shows from a line"""
+    return [(lines.line_text(line), ("benchmark", line)) for line in range(top, top + WINDOW_ROWS)]
+
+def run(sizes, rounds):
+    """Compare the old and new highlighting paths on documents of several sizes"""
+    results = []
+    for megabytes in sizes:
+        text = sample_document(megabytes)
+        lines = JSONLines(io.BytesIO(text.encode("utf-8")))
+        started = time.perf_counter()
+        lines.ensure(float("inf"))
+        index_time = time.perf_counter() - started
+
+        highlighter = Highlighter()
+        rows = window_rows(lines, len(lines) // 2)
+        widget = text_widget(text)
+        results.append({
+            'megabytes': megabytes,
+            'document_bytes': len(text),
+            'lines': len(lines),
+            'legacy_tag_add_calls': legacy_highlight(widget, text),
+            'single_pass_tag_add_calls': single_pass_calls(text),
+            'legacy_s': round(measure(lambda: legacy_highlight(widget, text), rounds), 3),
+            'single_pass_s': round(measure(lambda: single_pass_highlight(widget, text), rounds), 3),
+            'line_index_s': round(index_time, 3),
+            'window_cold_ms': round(measure(lambda: Highlighter().ranges(rows), rounds) * 1000, 3),
+            'window_cached_ms': round(measure(lambda: highlighter.ranges(rows), rounds) * 1000, 3),
+        })
+        widget.master.destroy()
+        lines.close()
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="JSON syntax highlighting benchmark")
+    parser.add_argument("--sizes", type=float, nargs="+", default=[1, 10, 100], help="Document sizes in MB")
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    # Both paths tag a real text widget, which needs a display (xvfb-run on a server)
+    try:
+        results = run(args.sizes, args.rounds)
+    except tk.TclError as e:
+        print(f"Cannot create a Tk text widget: {e}", file=sys.stderr)
+        return 1
+    for result in results:
+        print(json.dumps(result))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
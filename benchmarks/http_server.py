@@ -0,0 +1,100 @@
+import argparse
+import gzip
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+from benchmarks.codec_benchmark import sample_body
+from utils import json_backend
+
+def compact_body(records, seed=1):
+    """Return the sample listing as compact JSON, the way APIs usually send it"""
+    return json_backend.dumps(json_backend.loads(sample_body(records, seed)))
+
+class SyntheticJSONHandler(BaseHTTPRequestHandler):
+    """Serve generated API listings, e.g. /json?records=1000&latency=20&encoding=gzip
+
+    records sets the body size (about 140 bytes each), latency the delay
+    before the headers in milliseconds, encoding "gzip" or "identity" and
+    seed which body of that size is served. Bodies are built once per
+    parameter set so serving them costs no more than a real server would.
+    """
+
+    protocol_version = "HTTP/1.1"
+    _bodies = {}
+    _lock = threading.Lock()
+
+    def do_GET(self):
+        parsed_url = urlparse(self.path)
+        if parsed_url.path != "/json":
+            self.send_error(404)
+            return
+
+        params = {key: values[0] for key, values in parse_qs(parsed_url.query).items()}
+        try:
+            records = int(params.get("records", 100))
+            latency = float(params.get("latency", 0))
+            seed = int(params.get("seed", 1))
+        except ValueError:
+            self.send_error(400)
+            return
+        encoding = params.get("encoding", "identity")
+
+        body = self.body(records, seed, encoding)
+        if latency:
+            time.sleep(latency / 1000)
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        if encoding == "gzip":
+            self.send_header("Content-Encoding", "gzip")
+        self.end_headers()
+        self.wfile.write(body)
+
+    @classmethod
+    def body(cls, records, seed, encoding):
+        """Return the encoded body for a parameter set, building it on first use"""
+        key = (records, seed, encoding)
+        with cls._lock:
+            body = cls._bodies.get(key)
+            if body is None:
+                body = compact_body(records, seed)
+                if encoding == "gzip":
+                    body = gzip.compress(body, compresslevel=6, mtime=0)
+                cls._bodies[key] = body
+            return body
+
+    def log_message(self, format, *args):
+        pass
+
+def start_server(host="127.0.0.1", port=0):
+    """Start the server on a background thread and return it"""
+    server = ThreadingHTTPServer((host, port), SyntheticJSONHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def server_url(server):
+    """Return the base URL of a running server"""
+    host, port = server.server_address[:2]
+    return f"http://{host}:{port}"
+
+def main():
+    parser = argparse.ArgumentParser(description="Local HTTP server serving synthetic JSON")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer((args.host, args.port), SyntheticJSONHandler)
+    server.daemon_threads = True
+    print(f"Serving {server_url(server)}/json?records=1000&latency=20&encoding=gzip")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
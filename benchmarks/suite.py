@@ -0,0 +1,253 @@
+import argparse
+import json
+import logging
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from benchmarks.http_server import compact_body, start_server, server_url
+from cli import percentile
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+SCENARIOS = ("request", "storage", "highlight")
+
+DEFAULT_OPTIONS = {
+    'requests': 400,  # requests timed in the request scenario
+    'concurrency': 8,
+    'records': 500,  # records per response body, about 140 bytes each
+    'latency': 5,  # ms the server waits before answering
+    'encoding': "gzip",
+    'saves': 500,  # responses saved in the storage scenario
+    'megabytes': 10,  # document size in the highlight scenario
+}
+
+# Metrics compared with the baseline by their suffix, anything else is informational
+HIGHER_IS_BETTER = ("_per_s",)
+LOWER_IS_BETTER = ("_ms", "_mb")
+
+def peak_rss_mb():
+    """Return the peak resident set size of this process so far"""
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+def latency_metrics(latencies):
+    """Return p50/p95/p99 of durations in seconds as milliseconds"""
+    latencies = sorted(latencies)
+    return {f'latency_p{q}_ms': round(percentile(latencies, q) * 1000, 3) for q in (50, 95, 99)}
+
+def run_request(options):
+    """Fetch and parse responses from the local server with RequestHandler"""
+    from utils.request_handler import RequestHandler
+
+    server = start_server()
+    url = f"{server_url(server)}/json?records={options['records']}&latency={options['latency']}&encoding={options['encoding']}"
+    handler = RequestHandler(logging.getLogger("benchmark"), use_cache=False)
+
+    def fetch(i):
+        started = time.perf_counter()
+        response = handler.make_request(f"{url}&seed={i % 16}", "get", {})
+        handler.validate_response(response)
+        return time.perf_counter() - started, len(response.content)
+
+    try:
+        with ThreadPoolExecutor(options['concurrency']) as pool:
+            # Connections are opened and bodies built before timing starts
+            list(pool.map(fetch, range(max(16, options['concurrency']))))
+            started = time.perf_counter()
+            results = list(pool.map(fetch, range(options['requests'])))
+            elapsed = time.perf_counter() - started
+    finally:
+        handler.close()
+        server.shutdown()
+
+    body_bytes = sum(size for _, size in results)
+    return {
+        'requests': len(results),
+        'body_bytes': body_bytes,
+        'requests_per_s': round(len(results) / elapsed, 1),
+        'body_mb_per_s': round(body_bytes / elapsed / (1024 * 1024), 2),
+        **latency_metrics([latency for latency, _ in results]),
+    }
+
+def run_storage(options):
+    """Save distinct responses with FileManager and list them"""
+    from utils.file_manager import FileManager
+
+    file_manager = FileManager()
+    bodies = [compact_body(options['records'], seed) for seed in range(options['saves'])]
+
+    latencies = []
+    started = time.perf_counter()
+    for i, body in enumerate(bodies):
+        save_started = time.perf_counter()
+        file_manager.save_response(f"http://benchmark.local/items/{i % 10}", body, status=200)
+        latencies.append(time.perf_counter() - save_started)
+    elapsed = time.perf_counter() - started
+
+    listing_started = time.perf_counter()
+    listed = len(file_manager.get_all_responses())
+    listing_time = time.perf_counter() - listing_started
+
+    body_bytes = sum(len(body) for body in bodies)
+    return {
+        'saves': len(bodies),
+        'listed': listed,
+        'saves_per_s': round(len(bodies) / elapsed, 1),
+        'save_mb_per_s': round(body_bytes / elapsed / (1024 * 1024), 2),
+        **{name.replace("latency", "save"): value for name, value in latency_metrics(latencies).items()},
+        'listing_ms': round(listing_time * 1000, 3),
+    }
+
+def run_highlight(options):
+    """Open a saved document like the data viewer and highlight every window of it"""
+    from utils.file_manager import FileManager
+    from utils.json_highlighter import Highlighter
+    from utils.json_lines import JSONLines
+    from ui.widgets.json_view import FOLD_OPEN, NO_FOLD
+
+    # One record is about 140 bytes of compact JSON
+    file_manager = FileManager()
+    body = compact_body(max(1, int(options['megabytes'] * 1024 * 1024 / 140)))
+    filepath = file_manager.save_response("http://benchmark.local/document", body, status=200)
+    rows_per_window = 60
+
+    def window(lines, top):
+        # The rows JSONView.render shows, keyed like DataViewerTab.highlight_json
+        rows = []
+        for line in range(top, min(top + rows_per_window, len(lines))):
+            marker = FOLD_OPEN if lines.is_opener(line) else NO_FOLD
+            rows.append((f"{marker}{lines.line_text(line)}", (filepath, line, False)))
+        return rows
+
+    started = time.perf_counter()
+    lines = JSONLines(file_manager.open_document(filepath))
+    lines.ensure(rows_per_window + 2)
+    highlighter = Highlighter()
+    highlighter.ranges(window(lines, 0))
+    open_time = time.perf_counter() - started
+
+    started = time.perf_counter()
+    lines.ensure(float("inf"))
+    index_time = time.perf_counter() - started
+
+    # Page through the whole document, as holding Page Down would
+    latencies = []
+    for top in range(0, len(lines), rows_per_window):
+        window_started = time.perf_counter()
+        highlighter.ranges(window(lines, top))
+        latencies.append(time.perf_counter() - window_started)
+    lines.close()
+
+    return {
+        'document_bytes': len(body),
+        'lines': len(lines),
+        'windows': len(latencies),
+        'open_ms': round(open_time * 1000, 3),
+        'index_mb_per_s': round(len(body) / index_time / (1024 * 1024), 1),
+        **{name.replace("latency", "window"): value for name, value in latency_metrics(latencies).items()},
+    }
+
+def run_scenario(name, options):
+    """Run one scenario in this process and add its peak memory"""
+    result = {"request": run_request, "storage": run_storage, "highlight": run_highlight}[name](options)
+    result['peak_rss_mb'] = peak_rss_mb()
+    return result
+
+def run_isolated(name, options):
+    """Run a scenario in a fresh process with its own temporary data directory
+
+    Each scenario starts from the same state and reports its own peak
+    memory, and the real data directory is never touched.
+    """
+    with tempfile.TemporaryDirectory(prefix="url-parser-benchmark-") as data_dir:
+        env = dict(os.environ, URL_PARSER_DATA_DIR=data_dir)
+        process = subprocess.run(
+            [sys.executable, "-m", "benchmarks.suite", "--run-scenario", name, "--options", json.dumps(options)],
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+            env=env,
+            stdout=subprocess.PIPE,
+            check=True
+        )
+    return json.loads(process.stdout)
+
+def compare(results, baseline, tolerance):
+    """Return a line for every metric worse than the baseline by more than tolerance"""
+    regressions = []
+    for scenario, metrics in results.items():
+        expected = baseline['results'].get(scenario, {})
+        for name, value in metrics.items():
+            base = expected.get(name)
+            if not base or value is None:
+                continue
+            if name.endswith(HIGHER_IS_BETTER):
+                change = (base - value) / base
+            elif name.endswith(LOWER_IS_BETTER):
+                change = (value - base) / base
+            else:
+                continue
+            if change > tolerance:
+                regressions.append(f"{scenario}.{name}: {value} vs baseline {base} ({change:.0%} worse)")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Request, storage and viewer benchmark suite, fully offline")
+    parser.add_argument("scenarios", nargs="*", help=f"Scenarios to run: {', '.join(SCENARIOS)} (default: all)")
+    for name, default in DEFAULT_OPTIONS.items():
+        parser.add_argument(f"--{name}", type=type(default), default=default)
+    parser.add_argument("--baseline", default=BASELINE_FILE, help="Baseline file to compare with")
+    parser.add_argument("--save-baseline", action="store_true", help="Store these results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown before failing, 0.25 is 25%%")
+    parser.add_argument("--run-scenario", choices=SCENARIOS, help=argparse.SUPPRESS)
+    parser.add_argument("--options", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    # Child process of run_isolated
+    if args.run_scenario:
+        print(json.dumps(run_scenario(args.run_scenario, json.loads(args.options))))
+        return 0
+
+    for name in args.scenarios:
+        if name not in SCENARIOS:
+            parser.error(f"unknown scenario: {name}")
+
+    options = {name: getattr(args, name) for name in DEFAULT_OPTIONS}
+    results = {}
+    for name in args.scenarios or SCENARIOS:
+        results[name] = run_isolated(name, options)
+        print(json.dumps({'scenario': name, **results[name]}))
+
+    if args.save_baseline:
+        baseline = {
+            'machine': {'platform': platform.platform(), 'python': platform.python_version(), 'cpus': os.cpu_count()},
+            'options': options,
+            'results': results,
+        }
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(baseline, f, indent=2)
+        print(f"Baseline saved to {args.baseline}", file=sys.stderr)
+        return 0
+
+    # Without a baseline nothing is compared, which must not pass as a clean run
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}, run with --save-baseline to create one", file=sys.stderr)
+        return 2
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    if baseline['options'] != options:
+        print("Options differ from the baseline, results are not comparable", file=sys.stderr)
+        return 2
+
+    regressions = compare(results, baseline, args.tolerance)
+    for regression in regressions:
+        print(f"REGRESSION {regression}", file=sys.stderr)
+    if regressions:
+        print(f"{len(regressions)} metrics regressed more than {args.tolerance:.0%}", file=sys.stderr)
+        return 1
+    print("No regressions against the baseline", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
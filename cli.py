@@ -0,0 +1,211 @@
+import argparse
+import json
+import logging
+import math
+import sys
+from config.settings import (
+    BATCH_CONCURRENCY, BATCH_PER_HOST_CONCURRENCY, DATA_DIR, DEFAULT_HEADERS, HTTP_CACHE_ENABLED,
+    SEARCH_RESULT_LIMIT
+)
+from utils.file_manager import FileManager
+from utils.segment_store import SegmentStoreBusy
+
+def run_index(args):
+    """Rebuild, verify or summarize the saved response index, rebuild the search index or collect unused blobs"""
+    file_manager = FileManager()
+
+    if args.action == "rebuild":
+        count = file_manager.rebuild_index()
+        print(json.dumps({'indexed': count}))
+        return 0
+
+    if args.action == "summarize":
+        print(json.dumps(file_manager.summarize_index()))
+        return 0
+
+    if args.action == "search":
+        print(json.dumps({'indexed': file_manager.rebuild_search_index(args.workers)}))
+        return 0
+
+    if args.action == "gc":
+        print(json.dumps({'removed_blobs': file_manager.collect_garbage()}))
+        return 0
+
+    report = file_manager.verify_index(fix=args.fix)
+    print(json.dumps({key: len(value) for key, value in report.items()}))
+    for key, filepaths in report.items():
+        for filepath in filepaths:
+            print(f"{key}: {filepath}")
+
+    # Non-zero exit lets scripts detect a stale index
+    clean = not any(report.values())
+    return 0 if clean or args.fix else 1
+
+def run_migrate(args):
+    """Recompress the saved responses with another storage codec"""
+    file_manager = FileManager()
+    report = file_manager.migrate_storage(args.codec, args.workers)
+    print(json.dumps(report))
+    return 0
+
+def run_search(args):
+    """Print the saved responses matching a search query, newest first"""
+    file_manager = FileManager()
+    for record in file_manager.search_responses(args.query, limit=args.limit):
+        print(json.dumps({'filepath': record.filepath, 'timestamp': record.timestamp, 'status': record.status}))
+    return 0
+
+def run_segments(args):
+    """Compact the segment store, or convert between it and the directory layout"""
+    file_manager = FileManager()
+
+    if args.action == "compact":
+        try:
+            print(json.dumps(file_manager.compact_segments(args.codec)))
+        except SegmentStoreBusy as e:
+            print(str(e), file=sys.stderr)
+            return 1
+    elif args.action == "export":
+        print(json.dumps({'exported': file_manager.export_segments(args.output)}))
+    else:
+        print(json.dumps({'imported': file_manager.import_segments()}))
+    return 0
+
+def percentile(values, q):
+    """Return the q-th percentile of a sorted list using nearest rank"""
+    if not values:
+        return None
+    rank = max(1, math.ceil(q / 100 * len(values)))
+    return values[rank - 1]
+
+def run_fetch(args):
+    """Fetch a list of URLs without the GUI and print a JSON summary"""
+    from utils.logger import setup_logging
+    from utils.request_handler import RequestHandler
+    from utils.batch_fetcher import BatchFetcher, read_jobs
+
+    logger = setup_logging(console_level=getattr(logging, args.log_level))
+    request_handler = RequestHandler(logger, use_cache=HTTP_CACHE_ENABLED if args.cache is None else args.cache)
+    file_manager = FileManager()
+
+    # Headers come from a file in the same "name: value" format as the GUI
+    if args.headers_file:
+        with open(args.headers_file, "r", encoding="utf-8") as f:
+            headers = request_handler.parse_headers(f.read())
+    elif args.no_default_headers:
+        headers = {}
+    else:
+        headers = request_handler.parse_headers(DEFAULT_HEADERS)
+
+    fetcher = BatchFetcher(
+        request_handler,
+        file_manager,
+        logger,
+        concurrency=args.concurrency,
+        per_host=args.per_host
+    )
+
+    source = sys.stdin if args.input == "-" else open(args.input, "r", encoding="utf-8")
+    try:
+        lines = list(args.url) if args.url else source
+        summary = fetcher.run(read_jobs(lines, args.method.upper(), headers))
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        request_handler.close()
+
+    latencies = sorted(summary.pop('latencies'))
+    elapsed = summary['elapsed']
+    summary['latency'] = {
+        'min': latencies[0] if latencies else None,
+        'p50': percentile(latencies, 50),
+        'p95': percentile(latencies, 95),
+        'p99': percentile(latencies, 99),
+        'max': latencies[-1] if latencies else None,
+        'mean': sum(latencies) / len(latencies) if latencies else None,
+    }
+    summary['requests_per_second'] = summary['succeeded'] / elapsed if elapsed else None
+    summary['bytes_per_second'] = summary['bytes'] / elapsed if elapsed else None
+    summary['connections'] = request_handler.connection_stats()
+    summary['cache'] = request_handler.cache_stats()
+    summary['hosts'] = request_handler.metrics.snapshot()
+    summary['circuits'] = request_handler.breaker.states()
+    summary['rate_limits'] = request_handler.rate_limit_stats()
+    if args.metrics_out:
+        request_handler.metrics.export(args.metrics_out, args.metrics_format)
+
+    print(json.dumps(summary, indent=2))
+    logger.info(f"Batch finished: {summary['succeeded']} saved, {summary['failed']} failed")
+    return 0 if not summary['failed'] else 1
+
+def build_parser():
+    """Build the command line parser"""
+    parser = argparse.ArgumentParser(description="URL Parser & Data Fetcher")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    index_parser = subparsers.add_parser("index", help="Manage the saved response index")
+    index_parser.add_argument("action", choices=["rebuild", "verify", "summarize", "search", "gc"])
+    index_parser.add_argument("--fix", action="store_true", help="Repair the index while verifying")
+    index_parser.add_argument("--workers", "-w", type=int, default=None, help="Processes parsing responses for the search index")
+    index_parser.set_defaults(handler=run_index)
+
+    migrate_parser = subparsers.add_parser("migrate", help="Recompress saved responses with a storage codec")
+    migrate_parser.add_argument(
+        "--codec",
+        choices=["none", "gzip", "zstd", "auto"],
+        default=None,
+        help="Target codec (default: STORAGE_CODEC)"
+    )
+    migrate_parser.add_argument("--workers", "-w", type=int, default=None, help="Number of compression threads")
+    migrate_parser.set_defaults(handler=run_migrate)
+
+    search_parser = subparsers.add_parser("search", help="Find saved responses by value, key path or word")
+    search_parser.add_argument("query", help="e.g. 'items[].id = 123', 'user.email = *' or words")
+    search_parser.add_argument("--limit", type=int, default=SEARCH_RESULT_LIMIT)
+    search_parser.set_defaults(handler=run_search)
+
+    segments_parser = subparsers.add_parser("segments", help="Manage the segment storage backend")
+    segments_parser.add_argument("action", choices=["compact", "export", "import"])
+    segments_parser.add_argument(
+        "--codec",
+        choices=["none", "gzip", "zstd", "auto"],
+        default=None,
+        help="Recompress plain captures while compacting"
+    )
+    segments_parser.add_argument("--output", "-o", default=DATA_DIR, help="Directory to export to (default: DATA_DIR)")
+    segments_parser.set_defaults(handler=run_segments)
+
+    fetch_parser = subparsers.add_parser("fetch", help="Fetch URLs and save the responses without the GUI")
+    fetch_parser.add_argument("--input", "-i", default="-", help="File with one \"[METHOD] URL\" per line, - for stdin")
+    fetch_parser.add_argument("--url", "-u", action="append", help="URL to fetch, may be repeated instead of --input")
+    fetch_parser.add_argument("--method", "-X", default="GET", help="Method for lines without one")
+    fetch_parser.add_argument("--headers-file", "-H", help="File with \"name: value\" header lines")
+    fetch_parser.add_argument("--no-default-headers", action="store_true", help="Send no headers unless --headers-file is given")
+    fetch_parser.add_argument(
+        "--cache",
+        action=argparse.BooleanOptionalAction,
+        default=None,
+        help="Use the HTTP cache (default: HTTP_CACHE_ENABLED)"
+    )
+    fetch_parser.add_argument("--concurrency", "-c", type=int, default=BATCH_CONCURRENCY)
+    fetch_parser.add_argument("--per-host", type=int, default=BATCH_PER_HOST_CONCURRENCY)
+    fetch_parser.add_argument("--metrics-out", help="Also write per-host phase timings to this file")
+    fetch_parser.add_argument(
+        "--metrics-format",
+        choices=["json", "csv", "prometheus"],
+        help="Format of --metrics-out (default: from its extension, otherwise prometheus)"
+    )
+    fetch_parser.add_argument(
+        "--log-level",
+        default="WARNING",
+        choices=["DEBUG", "INFO", "WARNING", "ERROR"],
+        help="Level of log messages written to stderr, the log file gets everything"
+    )
+    fetch_parser.set_defaults(handler=run_fetch)
+
+    return parser
+
+def main(argv):
+    """Run a command line command and return its exit code"""
+    args = build_parser().parse_args(argv)
+    return args.handler(args)
\ No newline at end of file
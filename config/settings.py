@@ -32,16 +32,102 @@ COLORS = {
 
 # Directory settings
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-DATA_DIR = os.path.join(BASE_DIR, "veriler")
+DATA_DIR = os.environ.get("URL_PARSER_DATA_DIR") or os.path.join(BASE_DIR, "veriler")  # benchmarks use a temporary one
 LOGS_DIR = os.path.join(BASE_DIR, "logs")
 
+# Storage settings
+INDEX_FILE = os.path.join(DATA_DIR, ".index.sqlite3")
+BLOB_DIR = os.path.join(DATA_DIR, ".blobs")
+STORAGE_DEDUP = True  # store identical bodies once, captures become small pointer records
+BLOB_GC_GRACE = 3600  # seconds a new blob is kept even when nothing references it yet
+STORAGE_CODEC = "auto"  # "none", "gzip", "zstd" or "auto" (zstd when installed, else gzip)
+STORAGE_CODEC_LEVEL = 3
+# "files" keeps one file per capture, "segments" appends captures to a few large
+# segment files; `python main.py segments export` converts back to files
+STORAGE_BACKEND = "files"
+SEGMENT_DIR = os.path.join(DATA_DIR, ".segments")
+SEGMENT_MAX_BYTES = 256 * 1024 * 1024  # a new segment file is started past this size
+# Time buckets for hot endpoints, keyed by "domain/path", "domain" or "*";
+# values are "day" or "hour", e.g. {"api.example.com/v1/items": "hour"}
+CAPTURE_SHARDING = {}
+# Search index of values and key paths, e.g. "items[].id = 123"
+SEARCH_INDEX_FILE = os.path.join(DATA_DIR, ".search.sqlite3")
+SEARCH_ENABLED = True  # index responses as they are saved
+SEARCH_MAX_BODY_BYTES = 16 * 1024 * 1024  # larger responses are not indexed
+SEARCH_MAX_TERMS = 5000  # distinct terms indexed per response
+SEARCH_RESULT_LIMIT = 1000  # matches listed, newest first
+SEARCH_REBUILD_BATCH = 256  # responses handed to the worker processes at once
+SEARCH_INDEX_BATCH = 64  # saved responses indexed per transaction in the background
+SEARCH_QUEUE_SIZE = 256  # saved responses waiting to be indexed before saving blocks
+LISTING_PAGE_SIZE = 500
+VIEWER_POLL_INTERVAL = 5000  # ms, 0 disables watching the store for changes
+SUMMARY_MAX_KEYS = 50  # top level keys kept in the summary of an object response
+VIEWER_INDEX_CHUNK = 256 * 1024  # bytes of a document indexed per step of the viewer
+VIEWER_INDEX_INTERVAL = 10  # ms between background indexing steps
+VIEWER_LINE_LIMIT = 2000  # characters shown of a single line
+VIEWER_DECODE_CACHE = 4 * 1024 * 1024  # decompressed bytes of a compressed capture kept for the viewer
+VIEWER_DECODE_CHECKPOINT = 4 * 1024 * 1024  # decompressed bytes between resume points of a gzip capture
+HIGHLIGHT_CACHE_LINES = 50000  # viewer lines whose token ranges are kept
+
 # Logging settings
 LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
 LOG_FILE_MAX_SIZE = 10 * 1024 * 1024  # 10MB
 LOG_FILE_BACKUP_COUNT = 5
+LOG_GUI_MAX_LINES = 5000  # older lines are trimmed from the log panel
+LOG_GUI_DRAIN_INTERVAL = 100  # ms between log panel updates
 
 # Request settings
-REQUEST_TIMEOUT = 30
+REQUEST_CONNECT_TIMEOUT = 5  # seconds to open a connection
+REQUEST_READ_TIMEOUT = 30  # seconds the server may stay silent, for the headers or between body chunks
+REQUEST_WORKERS = 4
+RESULT_POLL_INTERVAL = 50  # ms
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+STREAM_THRESHOLD = 8 * 1024 * 1024  # larger bodies are written to disk as they arrive
+PREVIEW_LINES = 200  # lines of a response shown in the request preview, and added by "Show more"
+PREVIEW_CHARS = 64 * 1024  # character budget of one preview step
+
+# Connection pool settings
+HTTP_POOL_HOSTS = 32  # hosts with a pooled keep-alive session
+HTTP_POOL_MAXSIZE = 10  # connections kept alive per host
+HTTP_POOL_HOST_MAXSIZE = {}  # per-host overrides, e.g. {"api.example.com": 32}
+HTTP_POOL_BLOCK = False  # wait for a free connection instead of opening extra ones
+HTTP_SESSION_IDLE_TIMEOUT = 300  # seconds before an unused host session is closed
+
+# HTTP cache settings, revalidates with ETag / Last-Modified when enabled
+HTTP_CACHE_ENABLED = False
+HTTP_CACHE_DIR = os.path.join(BASE_DIR, "cache", "http")
+HTTP_CACHE_MEMORY_BYTES = 64 * 1024 * 1024
+
+# Batch settings
+BATCH_CONCURRENCY = 16  # requests in flight across all hosts
+BATCH_PER_HOST_CONCURRENCY = 8  # requests in flight per host, keep <= HTTP_POOL_MAXSIZE
+BATCH_PENDING_JOBS = 1024  # jobs read ahead of the running ones, waiting for their host
+
+# Resilience settings
+RETRY_ATTEMPTS = 3  # attempts for idempotent methods, 1 disables retries
+RETRY_METHODS = ("GET", "HEAD", "OPTIONS", "PUT", "DELETE")
+RETRY_STATUS = (429, 502, 503, 504)  # besides connection errors and timeouts
+RETRY_BACKOFF = 0.5  # seconds before the first retry, doubled after each one, with full jitter
+RETRY_BACKOFF_MAX = 10
+HEDGE_ENABLED = False  # send a duplicate of slow idempotent requests and use the first answer
+HEDGE_PERCENTILE = 95  # a duplicate goes out once a request is slower than this ttfb percentile of its host
+HEDGE_MIN_DELAY = 0.05  # seconds, a floor for the hedge delay
+HEDGE_MIN_SAMPLES = 20  # requests to a host before its percentile is trusted
+HEDGE_WORKERS = 32
+BREAKER_FAILURES = 5  # consecutive failed attempts that open a host's circuit, 0 disables it
+BREAKER_RESET = 30  # seconds an open circuit fails fast before letting one trial request through
+
+# Rate limit settings, shared by the request tab and batch jobs
+RATE_LIMITS = {}  # per-host (requests per second, burst), e.g. {"api.example.com": (10, 20)}
+RATE_LIMIT_DEFAULT = None  # (rate, burst) of other hosts, None leaves them unlimited
+RATE_LIMIT_DECREASE = 0.5  # a 429 multiplies the host's rate by this
+RATE_LIMIT_RECOVERY = 0.05  # each success raises it again by this fraction of the configured rate
+RATE_LIMIT_MIN = 0.1  # requests per second a host is never slowed below
+RETRY_AFTER_MAX = 300  # longest Retry-After pause honoured, in seconds
+
+# Request metrics settings
+STATS_REFRESH_INTERVAL = 2000  # ms between statistics panel updates
+METRICS_EXPORT_FILE = None  # e.g. a .prom file rewritten on every refresh for a textfile collector
 
 # Default headers
 DEFAULT_HEADERS = """
@@ -1,12 +1,14 @@
-from ui.main_window import MainWindow
-from utils.logger import setup_logging
-from utils.request_handler import RequestHandler
-from utils.file_manager import FileManager
-from config.settings import WINDOW_MIN_SIZE
 import os
-import customtkinter as ctk
+import sys
 
 def main():
+    # GUI modules are imported here so command line commands stay headless
+    from ui.main_window import MainWindow
+    from utils.logger import setup_logging
+    from utils.request_handler import RequestHandler
+    from utils.file_manager import FileManager
+    from config.settings import WINDOW_MIN_SIZE
+
     # Create necessary directories
     from config.settings import DATA_DIR, LOGS_DIR
     os.makedirs(DATA_DIR, exist_ok=True)
@@ -32,11 +34,24 @@ def main():
     # Update request tab
     window.request_tab.logger = logger
     window.request_tab.request_handler = request_handler
+    window.stats_tab.request_handler = request_handler
     
     # Start application
     logger.info("Application started")
     window.mainloop()
+    window.request_tab.task_runner.shutdown()
+    window.data_viewer_tab.task_runner.shutdown()
+    logger.info(f"Connection stats: {request_handler.connection_stats()}")
+    logger.info(f"Resilience stats: {request_handler.resilience_stats()}")
+    logger.info(f"Rate limits: {request_handler.rate_limit_stats()}")
+    if request_handler.cache:
+        logger.info(f"Cache stats: {request_handler.cache_stats()}")
+    request_handler.close()
     logger.info("Application closed")
 
 if __name__ == "__main__":
+    # Any arguments select a command line command instead of the GUI
+    if len(sys.argv) > 1:
+        from cli import main as cli_main
+        sys.exit(cli_main(sys.argv[1:]))
     main() 
\ No newline at end of file
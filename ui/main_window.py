@@ -4,6 +4,7 @@ from tkinter import ttk
 from config.settings import APP_NAME, WINDOW_SIZE, THEME_MODE, THEME_COLOR
 from ui.tabs.request_tab import RequestTab
 from ui.tabs.data_viewer_tab import DataViewerTab
+from ui.tabs.stats_tab import StatsTab
 
 class MainWindow(ctk.CTk):
     def __init__(self, logger, request_handler, file_manager):
@@ -70,6 +71,18 @@ class MainWindow(ctk.CTk):
         )
         self.data_viewer_button.grid(row=2, column=0, padx=20, pady=10, sticky="ew")
         
+        self.stats_button = ctk.CTkButton(
+            self.sidebar_frame, 
+            text="Statistics",
+            font=ctk.CTkFont(size=14),
+            fg_color="transparent", 
+            text_color=("gray10", "gray90"),
+            hover_color=("gray70", "gray30"),
+            anchor="w",
+            command=self.show_stats_view
+        )
+        self.stats_button.grid(row=3, column=0, padx=20, pady=10, sticky="ew")
+        
         # Add theme switcher
         self.appearance_label = ctk.CTkLabel(
             self.sidebar_frame, 
@@ -120,14 +133,21 @@ class MainWindow(ctk.CTk):
             self.logger,
             self.request_handler,
             self.file_manager,
-            self.on_response_saved
+            self.on_response_saved,
+            self.open_in_data_viewer
         )
         
         self.data_viewer_tab = DataViewerTab(
             self.content_frame,
+            self.logger,
             self.file_manager
         )
         
+        self.stats_tab = StatsTab(
+            self.content_frame,
+            self.request_handler
+        )
+        
         # Show the request view by default
         self.show_request_view()
     
@@ -149,6 +169,7 @@ class MainWindow(ctk.CTk):
         # Highlight active button
         self.request_button.configure(fg_color=("gray75", "gray25"))
         self.data_viewer_button.configure(fg_color="transparent")
+        self.stats_button.configure(fg_color="transparent")
     
     def show_data_viewer(self):
         """Show the data viewer and hide other views"""
@@ -170,13 +191,40 @@ class MainWindow(ctk.CTk):
         # Highlight active button
         self.data_viewer_button.configure(fg_color=("gray75", "gray25"))
         self.request_button.configure(fg_color="transparent")
+        self.stats_button.configure(fg_color="transparent")
+    
+    def show_stats_view(self):
+        """Show the request statistics and hide other views"""
+        if self.current_view:
+            self.current_view.pack_forget()
+        
+        self.content_title = ctk.CTkLabel(
+            self.main_frame,
+            text="Request Statistics",
+            font=ctk.CTkFont(size=18, weight="bold")
+        )
+        self.content_title.grid(row=0, column=0, padx=20, pady=(20, 10), sticky="w")
+        
+        self.stats_tab.refresh()
+        self.stats_tab.pack(fill="both", expand=True)
+        self.current_view = self.stats_tab
+        
+        # Highlight active button
+        self.stats_button.configure(fg_color=("gray75", "gray25"))
+        self.request_button.configure(fg_color="transparent")
+        self.data_viewer_button.configure(fg_color="transparent")
     
     def change_appearance_mode(self, new_appearance_mode):
         """Change the appearance mode"""
         ctk.set_appearance_mode(new_appearance_mode)
     
+    def open_in_data_viewer(self, filepath):
+        """Switch to the data viewer and show a saved response"""
+        self.show_data_viewer()
+        self.data_viewer_tab.open_response(filepath)
+    
     def on_response_saved(self):
         """Handle new response saved event"""
-        # If data viewer is visible, refresh it
+        # If data viewer is visible, add the new row without rescanning
         if self.current_view == self.data_viewer_tab:
-            self.data_viewer_tab.refresh() 
\ No newline at end of file
+            self.data_viewer_tab.update_responses() 
\ No newline at end of file
@@ -1,20 +1,42 @@
 import customtkinter as ctk
 import tkinter as tk
-from tkinter import ttk, scrolledtext
-import json
-import syntax_highlighting as sh
+from tkinter import ttk
 import os
+from config.settings import VIEWER_POLL_INTERVAL, RESULT_POLL_INTERVAL
+from ui.widgets.virtual_list import VirtualList
+from ui.widgets.json_view import JSONView
+from utils.json_lines import JSONLines
+from utils.json_highlighter import Highlighter
+from utils.file_manager import SHARD_PREFIX
+from utils.task_runner import TaskRunner
 
 class DataViewerTab(ctk.CTkFrame):
-    def __init__(self, parent, file_manager):
+    ROW_HEIGHT = 30
+    SORT_HEADINGS = {"timestamp": ("Datetime", "Datetime"), "location": ("Path", "Location")}
+    
+    def __init__(self, parent, logger, file_manager):
         super().__init__(parent)
+        self.logger = logger
         self.file_manager = file_manager
+        self._last_id = 0
+        self.sort_key = "timestamp"
+        self.sort_order = "desc"
+        self.search_query = ""
+        self.search_results = None  # records matching the query, None when not searching
+        
+        # The store is synced in the background, one sync at a time
+        self.task_runner = TaskRunner(max_workers=1, logger=logger)
+        self._sync_task = None
         
         # Set styles for treeview
         self.set_treeview_style()
         
         self.setup_ui()
         self.load_responses()
+        
+        # Watch the store for changes made outside this window
+        if VIEWER_POLL_INTERVAL:
+            self.after(VIEWER_POLL_INTERVAL, self.poll_changes)
     
     def set_treeview_style(self):
         """Configure styles for the treeview widget"""
@@ -28,7 +50,7 @@ class DataViewerTab(ctk.CTkFrame):
             foreground="white",
             fieldbackground="#2b2b2b",
             borderwidth=0,
-            rowheight=30
+            rowheight=self.ROW_HEIGHT
         )
         style.map(
             "Custom.Treeview",
@@ -83,6 +105,16 @@ class DataViewerTab(ctk.CTkFrame):
         )
         self.refresh_button.pack(side="right", padx=10, pady=10)
         
+        # Queries run against the search index, e.g. items[].id = 123
+        self.search_entry = ctk.CTkEntry(
+            self.search_frame,
+            placeholder_text="Search: words or items[].id = 123",
+            height=30
+        )
+        self.search_entry.pack(side="left", fill="x", expand=True, padx=(0, 5), pady=10)
+        self.search_entry.bind("<Return>", self.search)
+        self.search_entry.bind("<Escape>", self.clear_search)
+        
         # Treeview Frame
         self.tree_frame = ctk.CTkFrame(self.left_frame)
         self.tree_frame.pack(fill="both", expand=True, padx=10, pady=10)
@@ -90,23 +122,22 @@ class DataViewerTab(ctk.CTkFrame):
         # Create custom treeview
         self.tree = ttk.Treeview(
             self.tree_frame,
-            columns=("Datetime", "Path"),
+            columns=("Datetime", "Path", "Summary"),
             show="headings",
             selectmode="browse",
             style="Custom.Treeview"
         )
         
-        # Configure columns
-        self.tree.heading("Datetime", text="Datetime")
-        self.tree.heading("Path", text="Location")
+        # Configure columns, sorting happens in the data layer
+        for sort_key, (column, text) in self.SORT_HEADINGS.items():
+            self.tree.heading(column, text=text, command=lambda key=sort_key: self.sort_by(key))
         self.tree.column("Datetime", width=140)
         self.tree.column("Path", width=160)
+        self.tree.heading("Summary", text="Summary")
+        self.tree.column("Summary", width=110)
         
-        # Add scrollbars
-        self.tree_y_scroll = ctk.CTkScrollbar(
-            self.tree_frame,
-            command=self.tree.yview
-        )
+        # Add scrollbars, the vertical one spans all records rather than the tree items
+        self.tree_y_scroll = ctk.CTkScrollbar(self.tree_frame)
         self.tree_y_scroll.pack(side="right", fill="y")
         
         self.tree_x_scroll = ctk.CTkScrollbar(
@@ -117,14 +148,21 @@ class DataViewerTab(ctk.CTkFrame):
         self.tree_x_scroll.pack(side="bottom", fill="x")
         
         # Configure tree with scrollbars
-        self.tree.configure(
-            yscrollcommand=self.tree_y_scroll.set,
-            xscrollcommand=self.tree_x_scroll.set
-        )
+        self.tree.configure(xscrollcommand=self.tree_x_scroll.set)
         self.tree.pack(fill="both", expand=True)
         
-        # Bind selection event
-        self.tree.bind("<<TreeviewSelect>>", self.on_select)
+        # Only the visible window of rows is materialized
+        self.response_list = VirtualList(
+            self.tree,
+            self.tree_y_scroll,
+            fetch=self.fetch_responses,
+            count=self.count_responses,
+            key=lambda record: record.filepath,
+            format_row=self.format_row,
+            row_height=self.ROW_HEIGHT,
+            on_select=self.on_select
+        )
+        self.update_sort_headings()
         
         # Right frame for JSON viewer
         self.right_frame = ctk.CTkFrame(self.main_container)
@@ -137,7 +175,9 @@ class DataViewerTab(ctk.CTkFrame):
         self.file_path_label = ctk.CTkLabel(
             self.file_info_frame,
             text="No file selected",
-            font=ctk.CTkFont(size=14)
+            font=ctk.CTkFont(size=14),
+            justify="left",
+            wraplength=700
         )
         self.file_path_label.pack(anchor="w", padx=10, pady=(10, 5))
         
@@ -145,9 +185,11 @@ class DataViewerTab(ctk.CTkFrame):
         self.editor_frame = ctk.CTkFrame(self.right_frame)
         self.editor_frame.pack(fill="both", expand=True, padx=10, pady=10)
         
-        self.json_editor = scrolledtext.ScrolledText(
+        self.json_y_scroll = ctk.CTkScrollbar(self.editor_frame)
+        self.json_y_scroll.pack(side="right", fill="y")
+        
+        self.json_editor = tk.Text(
             self.editor_frame,
-            wrap=tk.WORD,
             font=("Consolas", 12),
             bg="#2b2b2b",
             fg="white",
@@ -155,14 +197,34 @@ class DataViewerTab(ctk.CTkFrame):
             selectbackground="#4a4a4a",
             selectforeground="white"
         )
+        
+        self.json_x_scroll = ctk.CTkScrollbar(
+            self.editor_frame,
+            orientation="horizontal",
+            command=self.json_editor.xview
+        )
+        self.json_x_scroll.pack(side="bottom", fill="x")
+        self.json_editor.configure(xscrollcommand=self.json_x_scroll.set)
         self.json_editor.pack(fill="both", expand=True, padx=5, pady=5)
+        
+        # Highlighting colors, token ranges are cached per document line
+        self.json_editor.tag_configure("string", foreground="#ce9178")
+        self.json_editor.tag_configure("number", foreground="#b5cea8")
+        self.json_editor.tag_configure("boolean", foreground="#569cd6")
+        self.json_editor.tag_configure("null", foreground="#569cd6")
+        self.json_editor.tag_configure("key", foreground="#9cdcfe")
+        self.highlighter = Highlighter()
+        self.document_key = None
+        
+        # Documents are indexed by line and only the visible lines are shown
+        self.json_view = JSONView(self.json_editor, self.json_y_scroll, on_render=self.highlight_json)
     
     def format_timestamp(self, timestamp):
         """Format timestamp for display"""
         # Input might be like: 20250327_210714
         try:
             if "_" in timestamp:
-                date_part, time_part = timestamp.split("_")
+                date_part, time_part = timestamp.split("_")[:2]
                 
                 # Format date part: YYYYMMDD -> YYYY-MM-DD
                 year = date_part[0:4]
@@ -195,107 +257,184 @@ class DataViewerTab(ctk.CTkFrame):
         basedir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
         rel_path = os.path.relpath(filepath, basedir)
         
-        # Return just the parent directory and filename
-        parent_dir = os.path.basename(os.path.dirname(filepath))
+        # Return just the parent directory and filename, skipping time buckets
+        parent_dir = os.path.dirname(filepath)
+        if os.path.basename(parent_dir).startswith(SHARD_PREFIX):
+            parent_dir = os.path.dirname(parent_dir)
+        parent_dir = os.path.basename(parent_dir)
         filename = os.path.basename(filepath)
         return f"{parent_dir}/{filename}"
     
+    def format_summary(self, summary):
+        """Format the indexed summary of a response, e.g. array[120] depth 3"""
+        if not summary:
+            return ""
+        text = summary['type']
+        if 'length' in summary:
+            brackets = "{}" if summary['type'] == "object" else "[]"
+            text += f"{brackets[0]}{summary['length']}{brackets[1]}"
+        return f"{text} depth {summary['depth']}"
+    
+    def format_row(self, record):
+        """Return the tree values of a record"""
+        return (
+            self.format_timestamp(record.timestamp),
+            self.format_filepath(record.filepath),
+            self.format_summary(record.summary)
+        )
+    
+    def fetch_responses(self, offset, limit):
+        """Return one window of records in the current sort order"""
+        if self.search_results is not None:
+            return self.search_results[offset:offset + limit]
+        return list(self.file_manager.iter_responses(
+            offset,
+            limit,
+            order=self.sort_order,
+            sort=self.sort_key
+        ))
+    
+    def count_responses(self):
+        """Return the number of records listed, matches only while searching"""
+        if self.search_results is not None:
+            return len(self.search_results)
+        return self.file_manager.count_responses()
+    
+    def search(self, event=None):
+        """List the responses matching the query in the search box"""
+        self.search_query = self.search_entry.get().strip()
+        self.run_search()
+    
+    def clear_search(self, event=None):
+        """Go back to listing every response"""
+        self.search_entry.delete(0, tk.END)
+        self.search()
+    
+    def run_search(self):
+        """Look up the current query and show its matches from the top"""
+        self.update_search_results()
+        self.response_list.top = 0
+        self.response_list.reload()
+    
+    def update_search_results(self):
+        """Look up the matches of the current query in the listing order"""
+        if self.search_query:
+            self.search_results = self.file_manager.search_responses(
+                self.search_query,
+                order=self.sort_order,
+                sort=self.sort_key
+            )
+            self.file_label.configure(text=f"{len(self.search_results)} Matches")
+        else:
+            self.search_results = None
+            self.file_label.configure(text="Saved Responses")
+    
+    def sort_by(self, sort_key):
+        """Sort by a column, toggling the order when it is already sorted"""
+        if self.sort_key == sort_key:
+            self.sort_order = "asc" if self.sort_order == "desc" else "desc"
+        else:
+            self.sort_key = sort_key
+            self.sort_order = "desc"
+        
+        self.update_sort_headings()
+        if self.search_results is not None:
+            self.run_search()
+            return
+        self.response_list.top = 0
+        self.response_list.render()
+    
+    def update_sort_headings(self):
+        """Show the sort direction on the sorted column heading"""
+        arrow = " ▼" if self.sort_order == "desc" else " ▲"
+        for sort_key, (column, text) in self.SORT_HEADINGS.items():
+            self.tree.heading(column, text=text + arrow if sort_key == self.sort_key else text)
+    
     def load_responses(self):
         """Load all saved responses into the tree"""
-        # Clear existing items
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-        
-        # Get all responses
-        responses = self.file_manager.get_all_responses()
-        
-        # Add to tree
-        for response in responses:
-            formatted_time = self.format_timestamp(response['timestamp'])
-            formatted_path = self.format_filepath(response['filepath'])
-            
-            self.tree.insert(
-                "",
-                "end",
-                values=(
-                    formatted_time,
-                    formatted_path
-                ),
-                tags=(response['filepath'],)
-            )
+        # Anything indexed after this point is picked up by update_responses
+        self._last_id = self.file_manager.last_response_id()
+        self.response_list.reload()
     
-    def on_select(self, event):
+    def update_responses(self):
+        """Show responses indexed since the last update"""
+        records, self._last_id = self.file_manager.responses_since(self._last_id)
+        if records:
+            self.reload_responses()
+    
+    def reload_responses(self):
+        """Redraw the list after the store changed, searching again when a query is active"""
+        if self.search_results is not None:
+            self.update_search_results()
+        self.response_list.reload()
+    
+    def open_response(self, filepath):
+        """Select a saved response by its filepath"""
+        record = self.file_manager.get_response(filepath)
+        if record is not None:
+            self.response_list.select(record)
+    
+    def on_select(self, record):
         """Handle file selection"""
-        selection = self.tree.selection()
-        if not selection:
-            return
-            
-        item = self.tree.item(selection[0])
-        filepath = self.tree.item(selection[0], "tags")[0]
+        filepath = record.filepath
+        
+        # The summary comes from the index, so it shows even if loading fails
+        label = f"File: {filepath}"
+        if record.summary:
+            label += f"\n{self.format_summary(record.summary)}"
+            if record.summary.get('keys'):
+                label += f", keys: {', '.join(record.summary['keys'])}"
+        self.file_path_label.configure(text=label)
         
         try:
-            # Load and display data
-            data = self.file_manager.load_response(filepath)
-            
-            # Update file path label
-            self.file_path_label.configure(text=f"File: {filepath}")
-            
-            # Update editor
-            self.update_preview(data)
+            # Lines are read from the file as they are shown
+            self.document_key = (filepath, record.mtime)
+            self.json_view.load(JSONLines(self.file_manager.open_document(filepath)))
         except Exception as e:
-            self.json_editor.delete("1.0", tk.END)
-            self.json_editor.insert("1.0", f"Error loading file: {str(e)}")
-    
-    def update_preview(self, data):
-        """Update JSON preview with syntax highlighting"""
-        # Format JSON
-        formatted_json = json.dumps(data, indent=4, ensure_ascii=False)
-        
-        # Clear existing content
-        self.json_editor.delete("1.0", tk.END)
-        
-        # Insert formatted JSON
-        self.json_editor.insert("1.0", formatted_json)
-        
-        # Apply syntax highlighting
-        self.highlight_json()
+            self.json_view.show_message(f"Error loading file: {str(e)}")
     
     def highlight_json(self):
-        """Apply syntax highlighting to JSON content"""
-        # Configure tags
-        self.json_editor.tag_configure("string", foreground="#ce9178")
-        self.json_editor.tag_configure("number", foreground="#b5cea8")
-        self.json_editor.tag_configure("boolean", foreground="#569cd6")
-        self.json_editor.tag_configure("null", foreground="#569cd6")
-        self.json_editor.tag_configure("key", foreground="#9cdcfe")
-        
-        # Apply highlighting
-        content = self.json_editor.get("1.0", tk.END)
-        self.json_editor.tag_remove("string", "1.0", tk.END)
-        self.json_editor.tag_remove("number", "1.0", tk.END)
-        self.json_editor.tag_remove("boolean", "1.0", tk.END)
-        self.json_editor.tag_remove("null", "1.0", tk.END)
-        self.json_editor.tag_remove("key", "1.0", tk.END)
-        
-        # Highlight strings
-        for match in sh.find_strings(content):
-            self.json_editor.tag_add("string", match[0], match[1])
-            
-        # Highlight numbers
-        for match in sh.find_numbers(content):
-            self.json_editor.tag_add("number", match[0], match[1])
-            
-        # Highlight booleans and null
-        for match in sh.find_booleans(content):
-            self.json_editor.tag_add("boolean", match[0], match[1])
-            
-        for match in sh.find_nulls(content):
-            self.json_editor.tag_add("null", match[0], match[1])
-            
-        # Highlight keys
-        for match in sh.find_keys(content):
-            self.json_editor.tag_add("key", match[0], match[1])
+        """Apply syntax highlighting to the visible JSON lines"""
+        # Tokens are cached by document line, messages are not highlighted
+        rows = [
+            (text, self.document_key + (line, folded))
+            for text, line, folded in self.json_view.rows
+        ]
+        self.highlighter.apply(self.json_editor, rows)
     
     def refresh(self):
-        """Refresh the file list"""
-        self.load_responses() 
\ No newline at end of file
+        """Sync the index with the disk in the background, then refresh the file list"""
+        if self._sync_task is not None:
+            return
+        self._sync_task = self.task_runner.submit(
+            lambda cancel_event: self.file_manager.sync_index(),
+            on_done=self.apply_sync,
+            on_error=self.sync_failed
+        )
+        self.after(RESULT_POLL_INTERVAL, self.poll_sync)
+    
+    def poll_sync(self):
+        """Deliver the result of a running sync"""
+        self.task_runner.poll()
+        if self._sync_task is not None:
+            self.after(RESULT_POLL_INTERVAL, self.poll_sync)
+    
+    def apply_sync(self, removed):
+        """Show what the sync found, redrawing the list only when responses disappeared"""
+        self._sync_task = None
+        if removed:
+            self.reload_responses()
+        else:
+            self.update_responses()
+    
+    def sync_failed(self, error):
+        """Let the next refresh try again and report the error"""
+        self._sync_task = None
+        self.logger.error(f"Syncing the saved responses failed: {str(error)}", exc_info=error)
+        self.file_path_label.configure(text=f"Sync failed: {str(error)}")
+    
+    def poll_changes(self):
+        """Periodically refresh the list while it is visible"""
+        if self.winfo_ismapped():
+            self.refresh()
+        self.after(VIEWER_POLL_INTERVAL, self.poll_changes)
\ No newline at end of file
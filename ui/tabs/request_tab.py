@@ -1,18 +1,37 @@
+import io
+import threading
 import customtkinter as ctk
 import tkinter as tk
-from tkinter import messagebox
-import json
-from config.settings import DEFAULT_HEADERS
+from tkinter import messagebox, filedialog
+from config.settings import DEFAULT_HEADERS, RESULT_POLL_INTERVAL, PREVIEW_LINES, PREVIEW_CHARS
+from utils.task_runner import TaskRunner, TaskCancelled, check_cancelled
+from utils.batch_fetcher import BatchFetcher, read_jobs
+from utils.json_lines import JSONLines
 
 class RequestTab(ctk.CTkFrame):
-    def __init__(self, parent, logger, request_handler, file_manager, on_response_saved):
+    def __init__(self, parent, logger, request_handler, file_manager, on_response_saved, on_open_response=None):
         super().__init__(parent)
         self.logger = logger
         self.request_handler = request_handler
         self.file_manager = file_manager
         self.on_response_saved = on_response_saved
+        self.on_open_response = on_open_response
+        
+        # Requests run on worker threads, results are polled from the Tk loop
+        self.task_runner = TaskRunner(logger=logger)
+        self.batch_progress = None
+        self.shown_batch_progress = None
+        self.download_progress = None
+        
+        # The preview shows a bounded number of lines, more are formatted on demand
+        self.pending_preview = None
+        self._preview_lock = threading.Lock()
+        self.preview_lines = None
+        self.preview_next = None
+        self.preview_filepath = None
         
         self.setup_ui()
+        self.after(RESULT_POLL_INTERVAL, self.poll_results)
     
     def setup_ui(self):
         # Create scrollable frame for all content
@@ -52,16 +71,41 @@ class RequestTab(ctk.CTkFrame):
         )
         self.url_entry.pack(side="left", fill="x", expand=True)
         
-        # Parse Button
+        # Parse and Cancel Buttons
+        self.button_row = ctk.CTkFrame(self.url_section, fg_color="transparent")
+        self.button_row.pack(pady=15, padx=10)
+        
         self.parse_button = ctk.CTkButton(
-            self.url_section,
+            self.button_row,
             text="Send Request",
             command=self.parse_and_fetch,
             font=ctk.CTkFont(size=14, weight="bold"),
             height=40,
             corner_radius=8
         )
-        self.parse_button.pack(pady=15, padx=10)
+        self.parse_button.pack(side="left", padx=5)
+        
+        self.batch_button = ctk.CTkButton(
+            self.button_row,
+            text="Load URL List",
+            command=self.start_batch,
+            font=ctk.CTkFont(size=14, weight="bold"),
+            height=40,
+            corner_radius=8
+        )
+        self.batch_button.pack(side="left", padx=5)
+        
+        self.cancel_button = ctk.CTkButton(
+            self.button_row,
+            text="Cancel",
+            command=self.cancel_requests,
+            font=ctk.CTkFont(size=14, weight="bold"),
+            height=40,
+            corner_radius=8,
+            fg_color=("gray60", "gray30"),
+            state="disabled"
+        )
+        self.cancel_button.pack(side="left", padx=5)
         
         # Headers Section
         self.headers_section = ctk.CTkFrame(self.scrollable_frame)
@@ -122,6 +166,29 @@ class RequestTab(ctk.CTkFrame):
         )
         self.response_preview.pack(fill="x", padx=10, pady=10)
         
+        self.preview_buttons = ctk.CTkFrame(self.response_section, fg_color="transparent")
+        self.preview_buttons.pack(anchor="w", padx=10, pady=(0, 10))
+        
+        self.show_more_button = ctk.CTkButton(
+            self.preview_buttons,
+            text="Show more",
+            command=self.show_more_preview,
+            width=120,
+            corner_radius=8,
+            state="disabled"
+        )
+        self.show_more_button.pack(side="left", padx=(0, 5))
+        
+        self.open_viewer_button = ctk.CTkButton(
+            self.preview_buttons,
+            text="Open in Data Viewer",
+            command=self.open_in_viewer,
+            width=160,
+            corner_radius=8,
+            state="disabled"
+        )
+        self.open_viewer_button.pack(side="left", padx=5)
+        
         # Status Section
         self.status_section = ctk.CTkFrame(self.scrollable_frame)
         self.status_section.pack(fill="x", padx=10, pady=10)
@@ -143,7 +210,6 @@ class RequestTab(ctk.CTkFrame):
             
         try:
             self.logger.info(f"Processing URL: {url}")
-            self.status_label.configure(text="Processing request...", text_color=("blue", "#3a7ebf"))
             
             # Parse URL and parameters
             params = self.request_handler.parse_url(url)
@@ -159,32 +225,246 @@ class RequestTab(ctk.CTkFrame):
             # Parse headers
             headers = self.request_handler.parse_headers(self.headers_text.get("1.0", "end-1c"))
             
-            # Make request
+            # Network, parsing and saving happen off the Tk thread
             method = self.method_var.get().lower()
-            response = self.request_handler.make_request(url, method, headers)
+            self.task_runner.submit(
+                self.fetch_and_save,
+                url,
+                method,
+                headers,
+                on_done=self.on_request_done,
+                on_error=self.on_request_error
+            )
+            self.update_pending_status()
             
-            # Validate and get response data
-            response_data = self.request_handler.validate_response(response)
+        except Exception as e:
+            self.on_request_error(e)
+    
+    def fetch_and_save(self, cancel_event, url, method, headers):
+        """Request, validate and save a response on a worker thread"""
+        # Every phase from connecting to saving is timed per host
+        with self.request_handler.track(url):
+            response = self.request_handler.make_request(url, method, headers, cancel_event)
+            check_cancelled(cancel_event)
             
-            # Update response preview
-            self.response_preview.configure(state="normal")
-            self.response_preview.delete("1.0", "end")
-            self.response_preview.insert("1.0", json.dumps(response_data, indent=2, ensure_ascii=False))
-            self.response_preview.configure(state="disabled")
+            # Large bodies are written to disk as they arrive and previewed from there
+            if getattr(response, 'streamed', False):
+                try:
+                    filepath = self.file_manager.save_response_stream(
+                        url,
+                        self.request_handler.iter_body(response, cancel_event, self.set_download_progress),
+                        status=response.status_code
+                    )
+                    self.file_manager.set_summary(filepath, response.summary)
+                finally:
+                    self.download_progress = None
+                self.publish_preview(JSONLines(self.file_manager.open_document(filepath)))
+                return filepath
             
-            # Save response
-            filepath = self.file_manager.save_response(url, response_data)
+            # The preview is shown while the body is validated and saved
+            self.publish_preview(JSONLines(io.BytesIO(response.content)))
+            summary = self.request_handler.summarize_response(response)
+            check_cancelled(cancel_event)
             
-            # Update status
-            success_msg = f"Request successful. Data saved to {filepath}"
-            self.logger.info(success_msg)
-            self.status_label.configure(text=success_msg, text_color=("green", "#2CC985"))
+            # Unchanged responses served from the cache are already saved
+            if getattr(response, 'from_cache', False):
+                return None
             
-            # Notify parent about new response
+            # Save response
+            # The body is saved as received, without a parse and re-encode round trip
+            filepath = self.file_manager.save_response(
+                url, response.content, status=response.status_code, summary=summary
+            )
+            self.request_handler.commit_cache(response)
+            return filepath
+    
+    def publish_preview(self, lines):
+        """Format the first preview lines on the worker thread for poll_results to show"""
+        text, next_line = lines.text(0, PREVIEW_LINES, PREVIEW_CHARS)
+        with self._preview_lock:
+            replaced, self.pending_preview = self.pending_preview, (lines, text, next_line)
+        # A preview that was never shown is closed here, show_pending_preview never sees it
+        if replaced is not None:
+            replaced[0].close()
+    
+    def show_pending_preview(self):
+        """Replace the preview with the one published by a worker thread"""
+        with self._preview_lock:
+            pending, self.pending_preview = self.pending_preview, None
+        if pending is None:
+            return
+        
+        if self.preview_lines is not None:
+            self.preview_lines.close()
+        self.preview_lines, text, self.preview_next = pending
+        self.preview_filepath = None
+        self.open_viewer_button.configure(state="disabled")
+        
+        self.response_preview.configure(state="normal")
+        self.response_preview.delete("1.0", "end")
+        self.response_preview.insert("1.0", text)
+        self.response_preview.configure(state="disabled")
+        self.show_more_button.configure(state="normal" if self.preview_next is not None else "disabled")
+    
+    def show_more_preview(self):
+        """Append the next PREVIEW_LINES lines of the response to the preview"""
+        if self.preview_lines is None or self.preview_next is None:
+            return
+        
+        text, self.preview_next = self.preview_lines.text(self.preview_next, PREVIEW_LINES, PREVIEW_CHARS)
+        self.response_preview.configure(state="normal")
+        self.response_preview.insert("end", "\n" + text)
+        self.response_preview.configure(state="disabled")
+        self.show_more_button.configure(state="normal" if self.preview_next is not None else "disabled")
+    
+    def open_in_viewer(self):
+        """Show the whole saved response in the Data Viewer"""
+        if self.preview_filepath and self.on_open_response:
+            self.on_open_response(self.preview_filepath)
+    
+    def on_request_done(self, filepath):
+        """Show a finished request, called on the Tk thread"""
+        # Update status
+        if filepath is None:
+            success_msg = "Request successful. Response unchanged, served from cache"
+        else:
+            success_msg = f"Request successful. Data saved to {filepath}"
+        self.logger.info(success_msg)
+        self.status_label.configure(text=success_msg, text_color=("green", "#2CC985"))
+        
+        # Notify parent about new response
+        if filepath is not None:
+            self.preview_filepath = filepath
+            self.open_viewer_button.configure(state="normal" if self.on_open_response else "disabled")
             self.on_response_saved()
-            
-        except Exception as e:
-            error_msg = f"Error: {str(e)}"
-            self.logger.error(error_msg, exc_info=True)
-            self.status_label.configure(text=error_msg, text_color=("red", "#E63946"))
-            messagebox.showerror("Error", error_msg) 
\ No newline at end of file
+    
+    def on_request_error(self, error):
+        """Report a failed request, called on the Tk thread"""
+        if isinstance(error, TaskCancelled):
+            self.logger.info("Request cancelled")
+            self.status_label.configure(text="Request cancelled", text_color=("gray40", "gray60"))
+            return
+        
+        error_msg = f"Error: {str(error)}"
+        self.logger.error(error_msg, exc_info=error)
+        self.status_label.configure(text=error_msg, text_color=("red", "#E63946"))
+        messagebox.showerror("Error", error_msg)
+    
+    def start_batch(self):
+        """Fetch every URL of a text file with the current method and headers"""
+        path = filedialog.askopenfilename(
+            title="Select URL list",
+            filetypes=[("Text files", "*.txt"), ("All files", "*.*")]
+        )
+        if not path:
+            return
+        
+        headers = self.request_handler.parse_headers(self.headers_text.get("1.0", "end-1c"))
+        method = self.method_var.get()
+        self.logger.info(f"Starting batch from {path}")
+        
+        self.task_runner.submit(
+            self.run_batch,
+            path,
+            method,
+            headers,
+            on_done=self.on_batch_done,
+            on_error=self.on_request_error
+        )
+        self.update_pending_status()
+    
+    def run_batch(self, cancel_event, path, method, headers):
+        """Run a batch on a worker thread, publishing progress for poll_results"""
+        fetcher = BatchFetcher(self.request_handler, self.file_manager, self.logger)
+        with open(path, "r", encoding="utf-8") as f:
+            return fetcher.run(
+                read_jobs(f, method, headers),
+                on_progress=self.set_batch_progress,
+                cancel_event=cancel_event
+            )
+    
+    def set_batch_progress(self, progress):
+        """Store the latest batch progress, called from the batch thread"""
+        self.batch_progress = progress
+    
+    def set_download_progress(self, received, total):
+        """Store the progress of a streamed download, called from the worker thread"""
+        self.download_progress = (received, total)
+    
+    def show_download_progress(self):
+        """Show the progress of a streamed download in the status line"""
+        progress = self.download_progress
+        if progress is None:
+            return
+        
+        received, total = progress
+        text = f"Downloading: {format_size(received)}"
+        if total:
+            text += f" of {format_size(total)} ({received * 100 // total}%)"
+        self.status_label.configure(text=text, text_color=("blue", "#3a7ebf"))
+    
+    def show_batch_progress(self):
+        """Show batch progress in the status line and the data viewer"""
+        progress = self.batch_progress
+        if progress is None or progress == self.shown_batch_progress:
+            return
+        
+        if self.shown_batch_progress is None or progress['succeeded'] != self.shown_batch_progress['succeeded']:
+            self.on_response_saved()
+        self.shown_batch_progress = progress
+        
+        self.status_label.configure(
+            text=(
+                f"Batch: {progress['succeeded']} saved, {progress['failed']} failed "
+                f"of {progress['submitted']} submitted"
+            ),
+            text_color=("blue", "#3a7ebf")
+        )
+    
+    def on_batch_done(self, summary):
+        """Report a finished batch, called on the Tk thread"""
+        self.batch_progress = None
+        self.shown_batch_progress = None
+        
+        msg = (
+            f"Batch finished: {summary['succeeded']} saved, {summary['failed']} failed, "
+            f"{summary['cancelled']} cancelled in {summary['elapsed']:.1f}s"
+        )
+        self.logger.info(msg)
+        self.status_label.configure(text=msg, text_color=("green", "#2CC985"))
+        self.on_response_saved()
+    
+    def cancel_requests(self):
+        """Cancel every request that is still running"""
+        count = self.task_runner.cancel_all()
+        if count:
+            self.logger.info(f"Cancelling {count} request(s)")
+            self.status_label.configure(text="Request cancelled", text_color=("gray40", "gray60"))
+        self.update_pending_status()
+    
+    def update_pending_status(self):
+        """Show how many requests are in flight"""
+        pending = self.task_runner.pending()
+        self.cancel_button.configure(state="normal" if pending else "disabled")
+        if pending:
+            self.status_label.configure(
+                text=f"Processing {pending} request(s)...",
+                text_color=("blue", "#3a7ebf")
+            )
+    
+    def poll_results(self):
+        """Deliver finished requests to the UI and reschedule"""
+        self.show_batch_progress()
+        self.show_download_progress()
+        self.show_pending_preview()
+        if self.task_runner.poll():
+            self.update_pending_status()
+        self.after(RESULT_POLL_INTERVAL, self.poll_results)
+
+def format_size(size):
+    """Format a byte count for display"""
+    for unit in ("B", "KB", "MB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
\ No newline at end of file
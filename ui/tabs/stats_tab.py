@@ -0,0 +1,161 @@
+import customtkinter as ctk
+from tkinter import ttk, filedialog, messagebox
+from config.settings import STATS_REFRESH_INTERVAL, METRICS_EXPORT_FILE
+from ui.tabs.request_tab import format_size
+
+class StatsTab(ctk.CTkFrame):
+    """Per-host request phase latencies, byte counts and throughput"""
+
+    COLUMNS = ("Count", "Mean", "p50", "p95", "p99", "Max")
+    EXPORT_FORMATS = {
+        "json": ("JSON", ".json"),
+        "csv": ("CSV", ".csv"),
+        "prometheus": ("Prometheus", ".prom"),
+    }
+
+    def __init__(self, parent, request_handler):
+        super().__init__(parent)
+        self.request_handler = request_handler
+
+        self.setup_ui()
+        self.after(STATS_REFRESH_INTERVAL, self.poll_metrics)
+
+    def setup_ui(self):
+        # Header with export buttons
+        self.header_frame = ctk.CTkFrame(self)
+        self.header_frame.pack(fill="x", padx=10, pady=(10, 5))
+
+        self.summary_label = ctk.CTkLabel(
+            self.header_frame,
+            text="No requests yet",
+            font=ctk.CTkFont(size=16, weight="bold")
+        )
+        self.summary_label.pack(side="left", padx=10, pady=10)
+
+        self.reset_button = ctk.CTkButton(
+            self.header_frame,
+            text="Reset",
+            width=80,
+            height=30,
+            corner_radius=8,
+            fg_color=("gray60", "gray30"),
+            command=self.reset
+        )
+        self.reset_button.pack(side="right", padx=10, pady=10)
+
+        for format, (label, _) in reversed(self.EXPORT_FORMATS.items()):
+            button = ctk.CTkButton(
+                self.header_frame,
+                text=f"Export {label}",
+                width=110,
+                height=30,
+                corner_radius=8,
+                command=lambda format=format: self.export(format)
+            )
+            button.pack(side="right", padx=5, pady=10)
+
+        # Hosts with their phases below them, durations in milliseconds
+        self.tree_frame = ctk.CTkFrame(self)
+        self.tree_frame.pack(fill="both", expand=True, padx=10, pady=10)
+
+        self.tree = ttk.Treeview(
+            self.tree_frame,
+            columns=self.COLUMNS,
+            show="tree headings",
+            style="Custom.Treeview"
+        )
+        self.tree.heading("#0", text="Host / Phase")
+        self.tree.column("#0", width=320, minwidth=200)
+        for column in self.COLUMNS:
+            self.tree.heading(column, text=column if column == "Count" else f"{column} (ms)")
+            self.tree.column(column, width=90, minwidth=70, anchor="e")
+
+        self.scrollbar = ttk.Scrollbar(self.tree_frame, orient="vertical", command=self.tree.yview)
+        self.tree.configure(yscrollcommand=self.scrollbar.set)
+        self.tree.pack(side="left", fill="both", expand=True)
+        self.scrollbar.pack(side="right", fill="y")
+
+    def poll_metrics(self):
+        """Write the export file and redraw the table while it is visible"""
+        if self.request_handler is not None:
+            if METRICS_EXPORT_FILE:
+                try:
+                    self.request_handler.metrics.export(METRICS_EXPORT_FILE)
+                except OSError as e:
+                    self.request_handler.logger.error(f"Error exporting metrics: {str(e)}")
+            if self.winfo_ismapped():
+                self.refresh()
+        self.after(STATS_REFRESH_INTERVAL, self.poll_metrics)
+
+    def refresh(self):
+        """Update the table in place so expanded hosts stay expanded"""
+        if self.request_handler is None:
+            return
+        snapshot = self.request_handler.metrics.snapshot()
+        rate_limits = self.request_handler.rate_limit_stats()
+
+        requests = sum(host['requests'] for host in snapshot.values())
+        errors = sum(host['errors'] for host in snapshot.values())
+        if requests:
+            self.summary_label.configure(text=f"{requests} Requests, {errors} Errors, {len(snapshot)} Hosts")
+        else:
+            self.summary_label.configure(text="No requests yet")
+
+        for host in set(self.tree.get_children()) - set(snapshot):
+            self.tree.delete(host)
+
+        for index, (host, stats) in enumerate(snapshot.items()):
+            text = f"{host}  ({stats['requests']} requests, {stats['errors']} errors, {format_size(stats['bytes'])}"
+            if stats['bytes_per_second']:
+                text += f", {format_size(stats['bytes_per_second'])}/s"
+            for event, count in sorted(stats['events'].items()):
+                text += f", {event.replace('_', ' ')} {count}"
+            limit = rate_limits.get(host)
+            if limit is not None and limit['rate'] is not None:
+                text += f", limit {limit['rate']:.1f}/s"
+            if limit is not None and limit['paused_for']:
+                text += f", paused {limit['paused_for']:.0f} s"
+            text += ")"
+            total = stats['phases'].get("total")
+            self.set_row("", host, index, text, total)
+
+            for phase_index, (phase, summary) in enumerate(stats['phases'].items()):
+                self.set_row(host, f"{host}/{phase}", phase_index, phase, summary)
+
+    def set_row(self, parent, item, index, text, summary):
+        """Insert or update one row of the table"""
+        values = ()
+        if summary is not None:
+            values = (summary['count'],) + tuple(
+                f"{summary[key] * 1000:.1f}" for key in ("mean", "p50", "p95", "p99", "max")
+            )
+        if self.tree.exists(item):
+            self.tree.item(item, text=text, values=values)
+        else:
+            self.tree.insert(parent, index, iid=item, text=text, values=values)
+
+    def export(self, format):
+        """Save the statistics to a file chosen by the user"""
+        label, extension = self.EXPORT_FORMATS[format]
+        path = filedialog.asksaveasfilename(
+            title=f"Export statistics as {label}",
+            defaultextension=extension,
+            filetypes=[(f"{label} files", f"*{extension}"), ("All files", "*.*")]
+        )
+        if not path:
+            return
+
+        try:
+            self.request_handler.metrics.export(path, format)
+            self.request_handler.logger.info(f"Statistics exported to {path}")
+        except OSError as e:
+            error_msg = f"Error exporting statistics: {str(e)}"
+            self.request_handler.logger.error(error_msg)
+            messagebox.showerror("Error", error_msg)
+
+    def reset(self):
+        """Clear the collected statistics"""
+        if self.request_handler is None:
+            return
+        self.request_handler.metrics.reset()
+        self.refresh()
\ No newline at end of file
@@ -0,0 +1,206 @@
+import sys
+import tkinter as tk
+from tkinter import font as tkfont
+from config.settings import VIEWER_INDEX_INTERVAL
+
+FOLD_OPEN = "▾ "
+FOLD_CLOSED = "▸ "
+NO_FOLD = "  "
+
+class JSONView:
+    """Show the visible window of a JSONLines document in a tk.Text
+
+    Only the lines that fit in the widget are formatted and inserted, so
+    opening and scrolling cost the same for any document size. Lines are
+    indexed as scrolling reaches them and in the background while idle.
+    Clicking the marker in front of an object or array folds it.
+    """
+
+    def __init__(self, text, scrollbar, on_render=None):
+        self.text = text
+        self.scrollbar = scrollbar
+        self.on_render = on_render
+        self.line_height = tkfont.Font(font=text.cget("font")).metrics("linespace")
+
+        self.lines = None
+        self.top = 0
+        self.visible_rows = 1
+        self.rendered_rows = 0
+        self.rows = []  # (text, line, folded) of every rendered row
+        self.folds = {}  # opening line: closing line
+        self.hidden = []  # (opening line, closing line) of the folds not inside another one
+        self._index_job = None
+
+        self.text.configure(wrap="none", cursor="arrow")
+        self.scrollbar.configure(command=self.yview)
+        self.text.bind("<Configure>", self._on_resize)
+        self.text.bind("<Button-1>", self._on_click)
+        self.text.bind("<Prior>", lambda event: self.yview("scroll", -1, "pages"))
+        self.text.bind("<Next>", lambda event: self.yview("scroll", 1, "pages"))
+        self.text.bind("<Home>", lambda event: self.yview("moveto", 0))
+        self.text.bind("<End>", lambda event: self.yview("moveto", 1))
+
+        # Mouse wheel events differ per platform
+        if sys.platform.startswith("linux"):
+            self.text.bind("<Button-4>", lambda event: self.yview("scroll", -3, "units"))
+            self.text.bind("<Button-5>", lambda event: self.yview("scroll", 3, "units"))
+        else:
+            self.text.bind("<MouseWheel>", self._on_mouse_wheel)
+
+    def load(self, lines):
+        """Show a new document, closing the previous one"""
+        self._stop_indexing()
+        if self.lines is not None:
+            self.lines.close()
+        self.lines = lines
+        self.top = 0
+        self.folds = {}
+        self.hidden = []
+        self.render()
+        self._index_job = self.text.after(VIEWER_INDEX_INTERVAL, self._index_step)
+
+    def show_message(self, message):
+        """Replace the document with a message"""
+        self._stop_indexing()
+        if self.lines is not None:
+            self.lines.close()
+            self.lines = None
+        self.rows = []
+        self.rendered_rows = 0
+        self._set_text(message)
+        self._update_scrollbar()
+
+    def total_rows(self):
+        """Return the number of rows known so far, folded lines excluded"""
+        if self.lines is None:
+            return 0
+        return len(self.lines) - sum(close - line for line, close in self.hidden)
+
+    def line_at(self, row):
+        """Return the document line shown on a row"""
+        line = row
+        for opening, closing in self.hidden:
+            if opening >= line:
+                break
+            line += closing - opening
+        return line
+
+    def render(self):
+        """Format the lines of the visible window into the text widget"""
+        if self.lines is None:
+            return
+
+        # Rows past what is indexed are fetched now
+        self.lines.ensure(self.line_at(self.top + self.visible_rows) + 2)
+        self.top = max(0, min(self.top, self.total_rows() - self.visible_rows))
+
+        rows = []
+        for row in range(self.top, min(self.top + self.visible_rows, self.total_rows())):
+            line = self.line_at(row)
+            text = self.lines.line_text(line)
+            if line in self.folds:
+                closing = self.lines.line_text(self.folds[line]).lstrip()
+                text = f"{FOLD_CLOSED}{text} … {closing}"
+            elif self.lines.is_opener(line):
+                text = f"{FOLD_OPEN}{text}"
+            else:
+                text = f"{NO_FOLD}{text}"
+            rows.append((text, line, line in self.folds))
+
+        self.rows = rows
+        self.rendered_rows = len(rows)
+        self._set_text("\n".join(row[0] for row in rows))
+        self._update_scrollbar()
+
+    def toggle_fold(self, line):
+        """Fold or unfold the object or array opened on a line"""
+        if line in self.folds:
+            del self.folds[line]
+        elif self.lines.is_opener(line):
+            self.folds[line] = self.lines.closing_line(line)
+        else:
+            return
+
+        # Folds inside a folded range do not hide anything themselves
+        self.hidden = []
+        for opening, closing in sorted(self.folds.items()):
+            if not self.hidden or opening > self.hidden[-1][1]:
+                self.hidden.append((opening, closing))
+        self.render()
+
+    def yview(self, action, value, unit=None):
+        """Scrollbar protocol: 'moveto', fraction or 'scroll', amount, unit"""
+        if self.lines is None:
+            return
+        if action == "moveto":
+            top = int(float(value) * self.total_rows())
+        else:
+            step = self.visible_rows if unit == "pages" else 1
+            top = self.top + int(value) * step
+
+        top = max(0, top)
+        if top != self.top:
+            self.top = top
+            self.render()
+        return "break"
+
+    def _set_text(self, content):
+        """Replace the content of the text widget"""
+        self.text.configure(state="normal")
+        self.text.delete("1.0", tk.END)
+        self.text.insert("1.0", content)
+        if self.on_render:
+            self.on_render()
+        self.text.configure(state="disabled")
+
+    def _index_step(self):
+        """Index one more chunk while the user is not asking for anything"""
+        self._index_job = None
+        if self.lines is None:
+            return
+        more = self.lines.index_chunk()
+
+        # A window left short by a partly indexed document is filled in
+        if self.rendered_rows < self.visible_rows:
+            self.render()
+        else:
+            self._update_scrollbar()
+        if more:
+            self._index_job = self.text.after(VIEWER_INDEX_INTERVAL, self._index_step)
+
+    def _stop_indexing(self):
+        """Cancel the background indexing of the current document"""
+        if self._index_job is not None:
+            self.text.after_cancel(self._index_job)
+            self._index_job = None
+
+    def _on_click(self, event):
+        """Toggle a fold when its marker is clicked"""
+        if self.lines is None:
+            return
+        row, column = map(int, self.text.index(f"@{event.x},{event.y}").split("."))
+        if column < len(FOLD_OPEN) and row <= self.rendered_rows:
+            self.toggle_fold(self.line_at(self.top + row - 1))
+
+    def _on_resize(self, event):
+        """Recompute how many rows fit when the widget is resized"""
+        visible_rows = max(1, event.height // self.line_height)
+        if visible_rows != self.visible_rows:
+            self.visible_rows = visible_rows
+            self.render()
+
+    def _on_mouse_wheel(self, event):
+        """Scroll on Windows and macOS wheel events"""
+        if sys.platform == "darwin":
+            return self.yview("scroll", -event.delta, "units")
+        return self.yview("scroll", -int(event.delta / 40), "units")
+
+    def _update_scrollbar(self):
+        """Map the visible window onto the rows known so far"""
+        total = self.total_rows()
+        if total:
+            first = self.top / total
+            last = min(1.0, (self.top + self.visible_rows) / total)
+        else:
+            first, last = 0.0, 1.0
+        self.scrollbar.set(first, last)
\ No newline at end of file
@@ -0,0 +1,165 @@
+import sys
+
+class VirtualList:
+    """Feed a ttk.Treeview with only the rows that fit in its visible area
+
+    The tree holds a fixed pool of items that are rewritten as the user
+    scrolls, so widget memory does not grow with the number of records.
+    Records come from fetch(offset, limit) and count(); key(record)
+    identifies a record across scrolling and reloads.
+    """
+
+    def __init__(self, tree, scrollbar, fetch, count, key, format_row, row_height, on_select=None):
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.fetch = fetch
+        self.count = count
+        self.key = key
+        self.format_row = format_row
+        self.row_height = row_height
+        self.on_select = on_select
+
+        self.top = 0
+        self.total = 0
+        self.visible_rows = 1
+        self.records = []
+        self.selected_key = None
+
+        self.scrollbar.configure(command=self.yview)
+        self.tree.bind("<Configure>", self._on_resize)
+        self.tree.bind("<<TreeviewSelect>>", self._on_tree_select)
+        self.tree.bind("<Up>", lambda event: self.move_selection(-1))
+        self.tree.bind("<Down>", lambda event: self.move_selection(1))
+        self.tree.bind("<Prior>", lambda event: self.move_selection(-self.visible_rows))
+        self.tree.bind("<Next>", lambda event: self.move_selection(self.visible_rows))
+        self.tree.bind("<Home>", lambda event: self.move_selection(-self.total))
+        self.tree.bind("<End>", lambda event: self.move_selection(self.total))
+
+        # Mouse wheel events differ per platform
+        if sys.platform.startswith("linux"):
+            self.tree.bind("<Button-4>", lambda event: self.yview("scroll", -3, "units"))
+            self.tree.bind("<Button-5>", lambda event: self.yview("scroll", 3, "units"))
+        else:
+            self.tree.bind("<MouseWheel>", self._on_mouse_wheel)
+
+    def reload(self):
+        """Re-read the record count and redraw the visible window"""
+        self.total = self.count()
+        self.render()
+
+    def render(self):
+        """Fill the item pool with the records of the visible window"""
+        self.top = max(0, min(self.top, self.total - self.visible_rows))
+        self.records = self.fetch(self.top, self.visible_rows) if self.total else []
+
+        items = self.tree.get_children()
+
+        # Reuse existing items and only create or drop the difference
+        for index, record in enumerate(self.records):
+            values = self.format_row(record)
+            if index < len(items):
+                self.tree.item(items[index], values=values)
+            else:
+                self.tree.insert("", "end", iid=f"row{index}", values=values)
+        if len(items) > len(self.records):
+            self.tree.delete(*items[len(self.records):])
+
+        # Keep the selection on the same record rather than the same item
+        self._show_selection(self.row_of(self.selected_key))
+
+        self._update_scrollbar()
+
+    def row_of(self, key):
+        """Return the window row showing a record key, if any"""
+        for index, record in enumerate(self.records):
+            if self.key(record) == key:
+                return index
+        return None
+
+    def yview(self, action, value, unit=None):
+        """Scrollbar protocol: 'moveto', fraction or 'scroll', amount, unit"""
+        if action == "moveto":
+            top = int(float(value) * self.total)
+        else:
+            step = self.visible_rows if unit == "pages" else 1
+            top = self.top + int(value) * step
+
+        top = max(0, min(top, self.total - self.visible_rows))
+        if top != self.top:
+            self.top = top
+            self.render()
+
+    def move_selection(self, delta):
+        """Move the selection by a number of rows, scrolling when needed"""
+        if not self.total:
+            return "break"
+
+        selected = self.row_of(self.selected_key)
+        position = self.top + (selected if selected is not None else 0) + delta
+        position = max(0, min(position, self.total - 1))
+
+        if position < self.top:
+            self.top = position
+        elif position >= self.top + self.visible_rows:
+            self.top = position - self.visible_rows + 1
+        self.render()
+
+        # The window may have come back shorter if records were removed meanwhile
+        if not self.records:
+            return "break"
+        record = self.records[max(0, min(position - self.top, len(self.records) - 1))]
+        self.select(record)
+        return "break"
+
+    def select(self, record):
+        """Select a record and notify the listener"""
+        key = self.key(record)
+        row = self.row_of(key)
+        self.selected_key = key
+        self._show_selection(row)
+
+        if self.on_select:
+            self.on_select(record)
+
+    def _show_selection(self, row):
+        """Highlight a window row, or nothing when the selection is off screen"""
+        if row is None:
+            self.tree.selection_remove(*self.tree.selection())
+        else:
+            self.tree.selection_set(f"row{row}")
+
+    def _on_tree_select(self, event):
+        """Translate user selection of a pooled item into its record"""
+        # Selections made by render() point at the already selected record
+        selection = self.tree.selection()
+        if not selection:
+            return
+
+        index = self.tree.index(selection[0])
+        if index < len(self.records) and self.key(self.records[index]) != self.selected_key:
+            self.select(self.records[index])
+
+    def _on_resize(self, event):
+        """Recompute how many rows fit when the widget is resized"""
+        # One row worth of height is taken by the column headings
+        visible_rows = max(1, event.height // self.row_height - 1)
+        if visible_rows != self.visible_rows:
+            self.visible_rows = visible_rows
+            self.render()
+
+    def _on_mouse_wheel(self, event):
+        """Scroll on Windows and macOS wheel events"""
+        if sys.platform == "darwin":
+            self.yview("scroll", -event.delta, "units")
+        else:
+            self.yview("scroll", -int(event.delta / 40), "units")
+        return "break"
+
+    def _update_scrollbar(self):
+        """Map the visible window onto the full record count"""
+        if self.total:
+            first = self.top / self.total
+            last = min(1.0, (self.top + self.visible_rows) / self.total)
+        else:
+            first, last = 0.0, 1.0
+        self.scrollbar.set(first, last)
\ No newline at end of file
@@ -0,0 +1,164 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+from config.settings import BATCH_CONCURRENCY, BATCH_PENDING_JOBS, BATCH_PER_HOST_CONCURRENCY
+from utils.task_runner import TaskCancelled, check_cancelled
+from utils.rate_limiter import PRIORITY_BATCH
+
+HTTP_METHODS = ("GET", "POST", "PUT", "DELETE", "PATCH", "HEAD", "OPTIONS")
+
+def read_jobs(lines, method="GET", headers=None):
+    """Yield (method, url, headers) jobs from lines of "[METHOD] URL" text"""
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+
+        parts = line.split(None, 1)
+        if len(parts) == 2 and parts[0].upper() in HTTP_METHODS:
+            yield parts[0].upper(), parts[1].strip(), headers
+        else:
+            yield method, line, headers
+
+class BatchFetcher:
+    """Fetch many URLs concurrently and save each response as it completes
+
+    An asyncio loop schedules the jobs under a global and a per-host
+    concurrency limit. A job waits for its host first, so jobs of a busy
+    host never hold global slots that other hosts could use; the blocking request, validation and save steps of
+    each job run on a thread pool sized to the global limit, so the pooled
+    keep-alive sessions of RequestHandler are shared by all jobs.
+    """
+
+    def __init__(self, request_handler, file_manager, logger,
+                 concurrency=BATCH_CONCURRENCY, per_host=BATCH_PER_HOST_CONCURRENCY, pending=BATCH_PENDING_JOBS):
+        self.request_handler = request_handler
+        self.file_manager = file_manager
+        self.logger = logger
+        self.concurrency = concurrency
+        self.per_host = per_host
+        self.pending = max(pending, concurrency)
+
+    def run(self, jobs, on_result=None, on_progress=None, cancel_event=None):
+        """Run all jobs and return a summary, blocking until they finish"""
+        return asyncio.run(self.run_async(jobs, on_result, on_progress, cancel_event))
+
+    async def run_async(self, jobs, on_result=None, on_progress=None, cancel_event=None):
+        """Run all jobs on the current event loop and return a summary"""
+        loop = asyncio.get_running_loop()
+        slots = asyncio.Semaphore(self.concurrency)
+        queued = asyncio.Semaphore(self.pending)
+        host_slots = {}
+        tasks = set()
+        summary = {
+            'submitted': 0,
+            'succeeded': 0,
+            'failed': 0,
+            'cancelled': 0,
+            'from_cache': 0,
+            'bytes': 0,
+            'latencies': [],
+        }
+        started = time.perf_counter()
+
+        def report(result):
+            if result['error'] is None:
+                summary['succeeded'] += 1
+                summary['from_cache'] += result['from_cache']
+                summary['bytes'] += result['bytes']
+                summary['latencies'].append(result['elapsed'])
+            elif result['cancelled']:
+                summary['cancelled'] += 1
+            else:
+                summary['failed'] += 1
+            if on_result:
+                on_result(result)
+            if on_progress:
+                on_progress(dict(summary, latencies=None))
+
+        async def run_job(executor, method, url, headers):
+            host = urlparse(url).netloc
+            host_slot = host_slots.setdefault(host, asyncio.Semaphore(self.per_host))
+            try:
+                async with host_slot, slots:
+                    result = await loop.run_in_executor(
+                        executor, self.fetch_one, method, url, headers, cancel_event
+                    )
+                report(result)
+            finally:
+                queued.release()
+
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="batch") as executor:
+            for method, url, headers in jobs:
+                if cancel_event is not None and cancel_event.is_set():
+                    break
+
+                # Jobs are pulled lazily so huge URL lists are never held in memory
+                await queued.acquire()
+                summary['submitted'] += 1
+                task = asyncio.create_task(run_job(executor, method, url, headers))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+
+            if tasks:
+                await asyncio.gather(*tasks)
+
+        summary['elapsed'] = time.perf_counter() - started
+        return summary
+
+    def fetch_one(self, method, url, headers, cancel_event=None):
+        """Fetch, validate and save one URL, returning a result dict"""
+        if isinstance(headers, str):
+            headers = self.request_handler.parse_headers(headers)
+
+        result = {
+            'method': method,
+            'url': url,
+            'status': None,
+            'filepath': None,
+            'bytes': 0,
+            'elapsed': 0.0,
+            'error': None,
+            'cancelled': False,
+            'from_cache': False,
+        }
+        started = time.perf_counter()
+        try:
+            with self.request_handler.track(url):
+                check_cancelled(cancel_event)
+                response = self.request_handler.make_request(
+                    url, method.lower(), headers or {}, cancel_event, priority=PRIORITY_BATCH
+                )
+                result['status'] = response.status_code
+                
+                # Large bodies go straight to disk, validated as they arrive
+                if getattr(response, 'streamed', False):
+                    result['filepath'] = self.file_manager.save_response_stream(
+                        url,
+                        self.request_handler.iter_body(response, cancel_event),
+                        status=response.status_code
+                    )
+                    self.file_manager.set_summary(result['filepath'], response.summary)
+                    result['bytes'] = response.received
+                else:
+                    result['bytes'] = len(response.content)
+                    summary = self.request_handler.summarize_response(response)
+                    check_cancelled(cancel_event)
+
+                    # Unchanged responses served from the cache are not saved again
+                    if getattr(response, 'from_cache', False):
+                        result['from_cache'] = True
+                    else:
+                        result['filepath'] = self.file_manager.save_response(
+                            url, response.content, status=response.status_code, summary=summary
+                        )
+                        self.request_handler.commit_cache(response)
+        except TaskCancelled as e:
+            result['error'] = str(e)
+            result['cancelled'] = True
+        except Exception as e:
+            result['error'] = str(e)
+            self.logger.error(f"Batch request failed for {url}: {str(e)}")
+        result['elapsed'] = time.perf_counter() - started
+        return result
\ No newline at end of file
@@ -0,0 +1,89 @@
+import hashlib
+import os
+import threading
+from config.settings import BLOB_DIR
+
+# Pointer records start with this marker, which can never begin valid JSON
+POINTER_PREFIX = b"@blob sha256:"
+
+class BlobStore:
+    """Content addressed storage: every distinct body is written once"""
+
+    def __init__(self, blob_dir=BLOB_DIR):
+        self.blob_dir = blob_dir
+        os.makedirs(blob_dir, exist_ok=True)
+
+    def path(self, digest):
+        """Return the file path of a blob"""
+        return os.path.join(self.blob_dir, digest[:2], digest)
+
+    def put(self, content, digest=None):
+        """Store content unless an identical blob exists, return its digest"""
+        digest = digest or hashlib.sha256(content).hexdigest()
+        path = self.path(digest)
+        if self.touch(path):
+            return digest
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(content)
+        os.replace(temp_path, path)
+        return digest
+
+    def put_file(self, temp_path, digest):
+        """Move a finished temp file into the store unless an identical blob exists"""
+        path = self.path(digest)
+        if self.touch(path):
+            os.remove(temp_path)
+            return digest
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(temp_path, path)
+        return digest
+
+    def touch(self, path):
+        """Mark an existing blob as just used, return False when it does not exist
+
+        Garbage collection keeps blobs younger than its grace period, so a
+        reused blob cannot be deleted before the new capture is indexed.
+        """
+        try:
+            os.utime(path)
+            return True
+        except FileNotFoundError:
+            return False
+
+    def open(self, digest):
+        """Open a blob for binary reading"""
+        return open(self.path(digest), "rb")
+
+    def size(self, digest):
+        """Return the stored size of a blob"""
+        return os.path.getsize(self.path(digest))
+
+    def iter_digests(self):
+        """Yield the digest of every stored blob"""
+        for shard in os.scandir(self.blob_dir):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if not entry.name.endswith(".tmp"):
+                    yield entry.name
+
+    def remove(self, digest):
+        """Delete a blob"""
+        try:
+            os.remove(self.path(digest))
+        except FileNotFoundError:
+            pass
+
+def make_pointer(digest):
+    """Return the content of a pointer record to a blob"""
+    return POINTER_PREFIX + digest.encode("ascii") + b"\n"
+
+def read_pointer(head):
+    """Return the blob digest of a pointer record's first bytes, or None"""
+    if not head.startswith(POINTER_PREFIX):
+        return None
+    return head[len(POINTER_PREFIX):].strip().decode("ascii")
\ No newline at end of file
@@ -1,68 +1,806 @@
 import os
-import json
-from datetime import datetime
+import hashlib
+import shutil
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime, timedelta
+from operator import attrgetter
 from urllib.parse import urlparse
-from config.settings import DATA_DIR
+from config.settings import (
+    DATA_DIR, INDEX_FILE, LISTING_PAGE_SIZE, STORAGE_DEDUP, BLOB_GC_GRACE, STORAGE_CODEC,
+    CAPTURE_SHARDING, STORAGE_BACKEND, SEARCH_INDEX_FILE, SEARCH_ENABLED, SEARCH_MAX_BODY_BYTES,
+    SEARCH_RESULT_LIMIT, SEARCH_REBUILD_BATCH
+)
+from utils.response_index import ResponseIndex
+from utils.blob_store import BlobStore, POINTER_PREFIX, make_pointer, read_pointer
+from utils import storage_codecs, json_backend
+from utils.json_scanner import JSONScanner, summarize
+from utils.segment_store import SegmentStore
+from utils.search_index import SearchIndex, SearchIndexer, body_terms
+from utils.request_metrics import phase
+
+# Enough bytes to recognise a pointer record
+POINTER_HEAD_SIZE = len(POINTER_PREFIX) + 65
+
+# Time bucket directories of a sharded location start with this character
+SHARD_PREFIX = "@"
+SHARD_FORMATS = {"day": "%Y-%m-%d", "hour": "%Y-%m-%dT%H"}
 
 class FileManager:
     def __init__(self):
         os.makedirs(DATA_DIR, exist_ok=True)
-    
+        self.index = ResponseIndex(INDEX_FILE)
+        self.blobs = BlobStore()
+        self.codec = storage_codecs.resolve_codec(STORAGE_CODEC)
+        self.segments = SegmentStore() if STORAGE_BACKEND == "segments" else None
+        self.search = SearchIndex(SEARCH_INDEX_FILE)
+        self.indexer = SearchIndexer.shared(self.search, self.read_search_body) if SEARCH_ENABLED else None
+
+        # Directories known to exist, so saving does not call makedirs every time
+        self._known_dirs = set()
+        self._capture_lock = threading.Lock()
+        self._last_capture_time = None
+
+        # Stores created before the index existed are indexed once on first use
+        if self.index.created:
+            self.rebuild_index()
+
+    def split_url(self, url):
+        """Return (domain, path) used for the directory structure of a URL"""
+        parsed_url = urlparse(url)
+        path_parts = [part for part in parsed_url.path.strip('/').split('/') if part]
+        return parsed_url.netloc, '/'.join(path_parts)
+
     def create_directory_structure(self, url):
         """Create directory structure based on URL"""
-        parsed_url = urlparse(url)
-        domain = parsed_url.netloc
-        path_parts = parsed_url.path.strip('/').split('/')
-        
-        # Create domain directory
-        domain_dir = os.path.join(DATA_DIR, domain)
-        os.makedirs(domain_dir, exist_ok=True)
-        
-        # Create path directories
-        current_dir = domain_dir
-        for part in path_parts:
-            if part:
-                current_dir = os.path.join(current_dir, part)
-                os.makedirs(current_dir, exist_ok=True)
-        
-        return current_dir
-    
-    def save_response(self, url, response_data):
-        """Save response data to file"""
-        save_dir = self.create_directory_structure(url)
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"response_{timestamp}.json"
-        filepath = os.path.join(save_dir, filename)
+        domain, path = self.split_url(url)
+        directory = os.path.join(DATA_DIR, domain, *path.split('/')) if path else os.path.join(DATA_DIR, domain)
+        self.ensure_directory(directory)
+        return directory
+
+    def ensure_directory(self, directory):
+        """Create a directory and its parents unless it is known to exist"""
+        if directory not in self._known_dirs:
+            os.makedirs(directory, exist_ok=True)
+            self._known_dirs.add(directory)
+
+    def shard_name(self, domain, path, capture_time):
+        """Return the time bucket directory of a capture, or None when not sharded"""
+        location = f"{domain}/{path}" if path else domain
+        bucket = CAPTURE_SHARDING.get(location) or CAPTURE_SHARDING.get(domain) or CAPTURE_SHARDING.get("*")
+        if bucket is None:
+            return None
+        return SHARD_PREFIX + capture_time.strftime(SHARD_FORMATS[bucket])
+
+    def next_capture_time(self):
+        """Return the current time, always later than the previous capture of this process"""
+        with self._capture_lock:
+            now = datetime.now()
+            if self._last_capture_time is not None and now <= self._last_capture_time:
+                now = self._last_capture_time + timedelta(microseconds=1)
+            self._last_capture_time = now
+            return now
+
+    def new_response_path(self, url):
+        """Return (filepath, timestamp) for a new capture of a URL
+
+        Capture ids are microsecond timestamps that increase within a process,
+        followed by the process id, so concurrent captures never share a name.
+        """
+        capture_time = self.next_capture_time()
+        domain, path = self.split_url(url)
+        save_dir = os.path.join(DATA_DIR, domain, *path.split('/')) if path else os.path.join(DATA_DIR, domain)
+        shard = self.shard_name(domain, path, capture_time)
+        if shard:
+            save_dir = os.path.join(save_dir, shard)
+        # Segment captures only use the path as their key
+        if self.segments is None:
+            self.ensure_directory(save_dir)
+
+        timestamp = capture_time.strftime("%Y%m%d_%H%M%S_%f")
+        filename = f"response_{timestamp}_{os.getpid()}.json"
+        return os.path.join(save_dir, filename), timestamp
+
+    def temp_path(self, filepath):
+        """Return a temp file name next to a file, unique per thread"""
+        if self.segments is not None:
+            # Capture directories are not created with segments
+            filepath = os.path.join(self.segments.segment_dir, os.path.basename(filepath))
+        return f"{filepath}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+    def open_temp(self, temp_path):
+        """Open a temp file for writing, recreating its directory if it was removed"""
+        try:
+            return open(temp_path, "wb")
+        except FileNotFoundError:
+            directory = os.path.dirname(temp_path)
+            self._known_dirs.discard(directory)
+            self.ensure_directory(directory)
+            return open(temp_path, "wb")
+
+    def write_atomic(self, filepath, data):
+        """Write a file through a temp file and rename, so readers never see it partly written"""
+        temp_path = self.temp_path(filepath)
+        try:
+            with self.open_temp(temp_path) as f:
+                f.write(data)
+            os.replace(temp_path, filepath)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    def segment_key(self, filepath):
+        """Return the key of a capture in the segment store"""
+        return os.path.relpath(filepath, DATA_DIR).replace(os.sep, "/")
+
+    def segment_filepath(self, key):
+        """Return the capture filepath of a segment store key"""
+        return os.path.join(DATA_DIR, *key.split("/"))
+
+    def write_record(self, filepath, data):
+        """Store the record of a capture, a pointer or a body, with the configured backend"""
+        if self.segments is not None:
+            self.segments.put(self.segment_key(filepath), data)
+        else:
+            self.write_atomic(filepath, data)
+
+    def open_record(self, filepath):
+        """Open the stored record of a capture for binary reading"""
+        if self.segments is not None:
+            return self.segments.open(self.segment_key(filepath))
+        return open(filepath, "rb")
+
+    def stat_record(self, filepath):
+        """Return the size and mtime of the stored record of a capture"""
+        if self.segments is not None:
+            stat = self.segments.stat(self.segment_key(filepath))
+            if stat is None:
+                raise FileNotFoundError(filepath)
+            return stat
+        return os.stat(filepath)
+
+    @phase("save")
+    def save_response(self, url, response_data, status=None, summary=None):
+        """Save a response body to file, given as raw bytes or as parsed data"""
+        # Raw bodies are stored as received; data is stored as compact JSON
+        if isinstance(response_data, (bytes, bytearray)):
+            content = bytes(response_data)
+        else:
+            content = json_backend.dumps(response_data)
+        if summary is None:
+            summary = summarize(content)
+
+        filepath, timestamp = self.new_response_path(url)
+        directory_mtime = self.directory_mtime(filepath)
+        digest = hashlib.sha256(content).hexdigest()
+        stored = storage_codecs.encode(content, self.codec)
         
-        with open(filepath, "w", encoding="utf-8") as f:
-            json.dump(response_data, f, indent=4, ensure_ascii=False)
+        # Identical bodies are stored once, the capture only points at them
+        if STORAGE_DEDUP:
+            self.blobs.put(stored, digest)
+            record = make_pointer(digest)
+        else:
+            record = stored
         
+        self.write_record(filepath, record)
+
+        self._index_saved(url, filepath, timestamp, len(stored), status, digest, summary, directory_mtime)
+
+        # Terms are extracted in the background, saving only queues the body
+        if self.indexer is not None:
+            self.indexer.put(filepath, content)
+        return filepath
+
+    @phase("save")
+    def save_response_stream(self, url, chunks, status=None):
+        """Save a response body arriving as chunks without holding it in memory
+
+        The chunks are expected to be validated by their producer, which
+        can store the summary afterwards with set_summary.
+        """
+        filepath, timestamp = self.new_response_path(url)
+        directory_mtime = self.directory_mtime(filepath)
+        temp_path = self.temp_path(filepath)
+        digest = hashlib.sha256()
+        try:
+            with self.open_temp(temp_path) as f:
+                writer = storage_codecs.open_encoder(f, self.codec)
+                for chunk in chunks:
+                    digest.update(chunk)
+                    writer.write(chunk)
+                writer.close()
+                size = f.tell()
+            digest = digest.hexdigest()
+
+            if STORAGE_DEDUP:
+                self.blobs.put_file(temp_path, digest)
+                self.write_record(filepath, make_pointer(digest))
+            elif self.segments is not None:
+                self.segments.put_file(self.segment_key(filepath), temp_path)
+            else:
+                os.replace(temp_path, filepath)
+        except BaseException:
+            # Failed, invalid or cancelled downloads leave nothing behind
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+        self._index_saved(url, filepath, timestamp, size, status, digest, None, directory_mtime)
+        # The indexer reads the file back, the body was never held in memory
+        if self.indexer is not None:
+            self.indexer.put(filepath)
         return filepath
+
+    def directory_mtime(self, filepath):
+        """Return the mtime of a capture file's directory, None for segment captures"""
+        if self.segments is not None:
+            return None
+        try:
+            return os.stat(os.path.dirname(filepath)).st_mtime
+        except OSError:
+            return None
+
+    def _index_saved(self, url, filepath, timestamp, size, status, digest, summary, directory_mtime=None):
+        """Record metadata of a saved response so listings never open its body
+
+        directory_mtime is the mtime of the capture's directory before it was
+        written. If the last sync saw the directory like that, the only change
+        since is this capture, so the new mtime is recorded and the next sync
+        does not list the directory again.
+        """
+        domain, path = self.split_url(url)
+        self.index.add(
+            filepath,
+            domain,
+            path,
+            timestamp,
+            size,
+            status=status,
+            hash=digest,
+            mtime=self.stat_record(filepath).st_mtime,
+            summary=summary
+        )
+        if directory_mtime is not None:
+            directory = os.path.dirname(filepath)
+            try:
+                mtime = os.stat(directory).st_mtime
+            except OSError:
+                return
+            self.index.advance_directory_mtime(self._relative_directory(directory), directory_mtime, mtime)
+
+    def read_search_body(self, filepath):
+        """Return the body of a response for the search index, None when it is too large"""
+        chunks = []
+        size = 0
+        with self.open_response(filepath) as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                size += len(chunk)
+                if size > SEARCH_MAX_BODY_BYTES:
+                    return None
+                chunks.append(chunk)
+        return b"".join(chunks)
+
+    def flush_search(self):
+        """Wait until responses saved so far are searchable"""
+        if self.indexer is not None:
+            self.indexer.flush()
+
+    def search_responses(self, query, order="desc", sort="timestamp", limit=SEARCH_RESULT_LIMIT):
+        """Return the records of responses matching a search query, in a listing order"""
+        records = self.index.get_many(self.search.search(query, limit))
+        columns = ResponseIndex.SORT_COLUMNS[sort][:-1]
+        records.sort(key=attrgetter(*columns), reverse=order == "desc")
+        return records
+
+    def rebuild_search_index(self, workers=None):
+        """Rebuild the search index from every saved response, return how many were indexed
+
+        Bodies are read in this process and parsed by worker processes, one
+        per core by default, while the next batch is read.
+        """
+        self.flush_search()
+        self.search.clear()
+        count = 0
+        pending = None
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for batch in self._search_batches():
+                filepaths = [filepath for filepath, _ in batch]
+                terms = executor.map(body_terms, [body for _, body in batch], chunksize=16)
+                if pending:
+                    count += self._add_search_batch(*pending)
+                pending = (filepaths, terms)
+            if pending:
+                count += self._add_search_batch(*pending)
+        return count
+
+    def _search_batches(self):
+        """Yield lists of (filepath, body) of the saved responses, oldest first"""
+        batch = []
+        for record in self.iter_responses(order="asc"):
+            try:
+                batch.append((record.filepath, self.read_search_body(record.filepath)))
+            except (OSError, ValueError):
+                continue
+            if len(batch) >= SEARCH_REBUILD_BATCH:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def _add_search_batch(self, filepaths, terms):
+        """Store the terms computed for a batch, return how many responses had any"""
+        documents = [
+            (filepath, document_terms)
+            for filepath, document_terms in zip(filepaths, terms)
+            if document_terms is not None
+        ]
+        self.search.add_many(documents)
+        return len(documents)
+
+    def set_summary(self, filepath, summary):
+        """Store the summary of a saved response in the index"""
+        self.index.set_summaries({filepath: summary})
+
+    def summarize_file(self, filepath):
+        """Validate a saved response in chunks and return its summary"""
+        scanner = JSONScanner()
+        with self.open_response(filepath) as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                scanner.feed(chunk)
+        scanner.close()
+        return scanner.summary()
+
+    def summarize_index(self):
+        """Summarize indexed responses that have no summary yet, return counts
+
+        Files that are not valid JSON are counted as invalid and left
+        without a summary.
+        """
+        filepaths = self.index.missing_summaries()
+        summaries = {}
+        for filepath in filepaths:
+            try:
+                summaries[filepath] = self.summarize_file(filepath)
+            except (OSError, ValueError):
+                continue
+        self.index.set_summaries(summaries)
+        return {'summarized': len(summaries), 'invalid': len(filepaths) - len(summaries)}
+
+    def open_stored(self, filepath):
+        """Open the stored, possibly compressed, body of a response, following pointers"""
+        f = self.open_record(filepath)
+        digest = read_pointer(f.read(POINTER_HEAD_SIZE))
+        if digest is None:
+            f.seek(0)
+            return f
+        f.close()
+        return self.blobs.open(digest)
+    
+    def open_response(self, filepath):
+        """Open the body of a saved response for binary reading, decompressing on the fly"""
+        return storage_codecs.open_decoded(self.open_stored(filepath))
+    
+    def open_document(self, filepath):
+        """Open the body of a saved response for reading at any offset, as the viewer does"""
+        return storage_codecs.open_seekable(self.open_stored(filepath))
+    
+    def read_response_bytes(self, filepath):
+        """Return the raw body of a saved response"""
+        with self.open_response(filepath) as f:
+            return f.read()
     
     def load_response(self, filepath):
         """Load response data from file"""
-        with open(filepath, "r", encoding="utf-8") as f:
-            return json.load(f)
-    
+        return json_backend.loads(self.read_response_bytes(filepath))
+
     def get_all_responses(self):
-        """Get all saved response files"""
-        responses = []
-        for root, _, files in os.walk(DATA_DIR):
-            for file in files:
-                if file.endswith('.json') and file.startswith('response_'):
-                    filepath = os.path.join(root, file)
+        """Get metadata of all saved responses, newest first"""
+        return [record.to_dict() for record in self.iter_responses()]
+
+    def iter_responses(self, offset=0, limit=None, order="desc", domain=None, sort="timestamp"):
+        """Yield response records page by page without touching response bodies"""
+        remaining = limit
+        while remaining is None or remaining > 0:
+            page_size = LISTING_PAGE_SIZE if remaining is None else min(remaining, LISTING_PAGE_SIZE)
+            page = self.index.query(offset, page_size, order, domain, sort)
+            yield from page
+
+            if len(page) < page_size:
+                return
+            offset += len(page)
+            if remaining is not None:
+                remaining -= len(page)
+
+    def get_response(self, filepath):
+        """Return the metadata record of a saved response, or None"""
+        return self.index.get(filepath)
+
+    def count_responses(self, domain=None):
+        """Return the number of saved responses"""
+        return self.index.count(domain)
+
+    def is_response_file(self, filename):
+        """Check whether a filename belongs to a saved response"""
+        return filename.startswith('response_') and filename.endswith('.json')
+
+    def timestamp_from_filename(self, filename):
+        """Extract timestamp from filename: response_YYYYMMDD_HHMMSS[_ffffff_pid].json"""
+        # Remove 'response_', '.json' and the process id of newer captures
+        return '_'.join(filename[9:-5].split('_')[:3])
+
+    def scan_directories(self, directory=DATA_DIR, parts=()):
+        """Yield (dirpath, domain, path, mtime) for every capture directory"""
+        try:
+            entries = list(os.scandir(directory))
+        except OSError:
+            return
+
+        for entry in entries:
+            # Skip internal entries such as the index
+            if entry.name.startswith('.') or not entry.is_dir(follow_symlinks=False):
+                continue
+            try:
+                mtime = entry.stat(follow_symlinks=False).st_mtime
+            except OSError:
+                continue
+            # Time buckets hold captures of their parent location
+            if parts and entry.name.startswith(SHARD_PREFIX):
+                yield entry.path, parts[0], '/'.join(parts[1:]), mtime
+                continue
+            entry_parts = parts + (entry.name,)
+            yield entry.path, entry_parts[0], '/'.join(entry_parts[1:]), mtime
+            yield from self.scan_directories(entry.path, entry_parts)
+
+    def scan_directory_files(self, directory):
+        """Yield (filepath, stat) for the response files directly inside a directory"""
+        try:
+            entries = list(os.scandir(directory))
+        except OSError:
+            return
+
+        for entry in entries:
+            if self.is_response_file(entry.name) and entry.is_file(follow_symlinks=False):
+                try:
+                    yield entry.path, entry.stat()
+                except OSError:
+                    continue
+
+    def scan_response_files(self):
+        """Yield (filepath, domain, path, stat) for every response file on disk"""
+        for directory, domain, path, _ in self.scan_directories():
+            for filepath, stat in self.scan_directory_files(directory):
+                yield filepath, domain, path, stat
+
+    def scan_segment_records(self, segments=None):
+        """Yield (filepath, domain, path, stat) for every capture in the segment store"""
+        for key, stat in (segments or self.segments).items():
+            parts = key.split("/")[:-1]
+            if len(parts) > 1 and parts[-1].startswith(SHARD_PREFIX):
+                parts = parts[:-1]
+            yield self.segment_filepath(key), parts[0], '/'.join(parts[1:]), stat
+
+    def scan_captures(self):
+        """Yield (directory, mtime, captures) per capture directory of the configured backend
+
+        captures yields (filepath, domain, path, stat). The segment store
+        has no directories, all of it is one group with directory None.
+        """
+        if self.segments is not None:
+            yield None, None, self.scan_segment_records()
+            return
+        for directory, domain, path, mtime in self.scan_directories():
+            yield directory, mtime, (
+                (filepath, domain, path, stat) for filepath, stat in self.scan_directory_files(directory)
+            )
+
+    def _relative_directory(self, directory):
+        """Return a directory path relative to the data directory"""
+        return os.path.relpath(directory, DATA_DIR)
+
+    def hash_file(self, filepath):
+        """Return sha256 of a decompressed response body without loading it at once"""
+        digest = hashlib.sha256()
+        with self.open_response(filepath) as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def describe_file(self, filepath, stat):
+        """Return (body size, body hash) of a response file"""
+        with self.open_record(filepath) as f:
+            digest = read_pointer(f.read(POINTER_HEAD_SIZE))
+        if digest is not None:
+            return self.blobs.size(digest), digest
+        return stat.st_size, self.hash_file(filepath)
+    
+    def _index_record(self, filepath, domain, path, stat):
+        """Build an index record for a file found on disk"""
+        size, digest = self.describe_file(filepath, stat)
+        return (
+            filepath,
+            domain,
+            path,
+            self.timestamp_from_filename(os.path.basename(filepath)),
+            size,
+            None,
+            digest,
+            stat.st_mtime
+        )
+
+    def rebuild_index(self, batch_size=500):
+        """Rebuild the metadata index from the stored captures
+
+        Every capture is indexed again in place, so statuses and summaries
+        already recorded are kept; only files that no longer exist are removed.
+        """
+        missing = self.index.snapshot()
+        known = self.index.directory_mtimes()
+        count = 0
+        batch = []
+        mtimes = {}
+        for directory, mtime, captures in self.scan_captures():
+            if directory is not None:
+                mtimes[self._relative_directory(directory)] = mtime
+            for filepath, domain, path, stat in captures:
+                missing.pop(filepath, None)
+                try:
+                    batch.append(self._index_record(filepath, domain, path, stat))
+                except OSError:
+                    continue
+                if len(batch) >= batch_size:
+                    self.index.add_many(batch)
+                    count += len(batch)
+                    batch = []
+        if batch:
+            self.index.add_many(batch)
+            count += len(batch)
+        self.index.remove(missing)
+        self.search.remove(missing)
+        self.index.set_directory_mtimes(mtimes, set(known) - set(mtimes))
+        return count
+
+    def verify_index(self, fix=False):
+        """Compare the index with the stored captures, optionally repairing it"""
+        indexed = self.index.snapshot()
+        report = {'missing': [], 'unindexed': [], 'changed': []}
+        found = []
+        mtimes = {}
+
+        for directory, mtime, captures in self.scan_captures():
+            if directory is not None:
+                mtimes[self._relative_directory(directory)] = mtime
+            for filepath, domain, path, stat in captures:
+                entry = indexed.pop(filepath, None)
+                if entry is None:
+                    report['unindexed'].append(filepath)
+                elif entry != stat.st_mtime:
+                    report['changed'].append(filepath)
+                else:
+                    continue
+                found.append((filepath, domain, path, stat))
+
+        # Whatever is left in the index no longer exists on disk
+        report['missing'] = sorted(indexed)
+
+        if fix:
+            self.index.remove(report['missing'])
+            self.search.remove(report['missing'])
+            records = []
+            for filepath, domain, path, stat in found:
+                try:
+                    records.append(self._index_record(filepath, domain, path, stat))
+                except OSError:
+                    continue
+            self.index.add_many(records)
+            self.index.set_directory_mtimes(mtimes, set(self.index.directory_mtimes()) - set(mtimes))
+
+        return report
+
+    def sync_index(self):
+        """Pick up changes made on disk and return the filepaths that disappeared
+
+        Only directories whose mtime differs from the last scan are listed,
+        so an unchanged store costs one stat per directory. Segment captures
+        are indexed as they are saved, so there is nothing to pick up.
+        """
+        if self.segments is not None:
+            return []
+
+        known = self.index.directory_mtimes()
+        mtimes = {}
+        removed = []
+
+        for directory, domain, path, mtime in self.scan_directories():
+            relative = self._relative_directory(directory)
+            if known.pop(relative, None) == mtime:
+                continue
+
+            # A location may be split over time buckets, only this directory is compared
+            indexed = {
+                filepath: entry_mtime
+                for filepath, entry_mtime in self.index.snapshot(domain, path).items()
+                if os.path.dirname(filepath) == directory
+            }
+            records = []
+            for filepath, stat in self.scan_directory_files(directory):
+                if indexed.pop(filepath, None) != stat.st_mtime:
                     try:
-                        data = self.load_response(filepath)
-                        
-                        # Extract timestamp correctly from filename
-                        # Format should be: response_YYYYMMDD_HHMMSS.json
-                        timestamp_part = file[9:-5]  # Remove 'response_' and '.json'
-                        
-                        responses.append({
-                            'filepath': filepath,
-                            'data': data,
-                            'timestamp': timestamp_part
-                        })
-                    except Exception as e:
+                        records.append(self._index_record(filepath, domain, path, stat))
+                    except OSError:
                         continue
-        return sorted(responses, key=lambda x: x['timestamp'], reverse=True) 
\ No newline at end of file
+
+            self.index.add_many(records)
+            self.index.remove(indexed)
+            removed.extend(indexed)
+            mtimes[relative] = mtime
+
+        # Directories left over were deleted together with their responses
+        for relative in known:
+            parts = relative.split(os.sep)
+            if len(parts) > 1 and parts[-1].startswith(SHARD_PREFIX):
+                # Only the time bucket is gone, not the rest of its location
+                directory = os.path.join(DATA_DIR, relative)
+                domain, path = parts[0], '/'.join(parts[1:-1])
+                vanished = [
+                    filepath for filepath in self.index.snapshot(domain, path)
+                    if os.path.dirname(filepath) == directory
+                ]
+                self.index.remove(vanished)
+            else:
+                domain, path = parts[0], '/'.join(parts[1:])
+                vanished = self.index.snapshot(domain, path)
+                self.index.remove_location(domain, path)
+            removed.extend(vanished)
+        if known:
+            self._known_dirs.clear()
+
+        self.index.set_directory_mtimes(mtimes, known)
+        self.search.remove(removed)
+        return removed
+
+    def responses_since(self, last_id):
+        """Return (records, last_id) for responses indexed after last_id"""
+        return self.index.query_since(last_id)
+
+    def last_response_id(self):
+        """Return the id of the most recently indexed response"""
+        return self.index.last_id()
+
+    def collect_garbage(self, grace=BLOB_GC_GRACE):
+        """Delete blobs no saved response points at, return how many
+
+        The index is synced first. Blobs younger than grace seconds are kept
+        so a capture that is being written right now cannot lose its body.
+        """
+        self.sync_index()
+        cutoff = time.time() - grace
+        removed = 0
+        for digest in self.blobs.iter_digests():
+            if self.index.has_hash(digest):
+                continue
+            try:
+                if os.path.getmtime(self.blobs.path(digest)) > cutoff:
+                    continue
+            except OSError:
+                continue
+            self.blobs.remove(digest)
+            removed += 1
+        return removed
+
+    def recompress_data(self, data, codec):
+        """Return a stored record encoded with a codec, the same object for pointers and records already in it"""
+        if read_pointer(data[:POINTER_HEAD_SIZE]) is not None or storage_codecs.detect_codec(data[:4]) == codec:
+            return data
+        return storage_codecs.encode(storage_codecs.decode(data), codec)
+
+    def recompress_file(self, path, codec):
+        """Rewrite one stored body with another codec, return (old size, new size)"""
+        with open(path, "rb") as f:
+            data = f.read()
+        old_size = len(data)
+        encoded = self.recompress_data(data, codec)
+        if encoded is data:
+            return old_size, old_size
+        data = encoded
+
+        temp_path = f"{path}.{os.getpid()}.migrate.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(data)
+        os.replace(temp_path, path)
+        return old_size, len(data)
+
+    def migrate_storage(self, codec=None, workers=None):
+        """Recompress every blob and plain capture with a codec in parallel"""
+        codec = storage_codecs.resolve_codec(codec or STORAGE_CODEC)
+        digests = list(self.blobs.iter_digests())
+        paths = [self.blobs.path(digest) for digest in digests]
+        if self.segments is None:
+            paths.extend(filepath for filepath, _, _, _ in self.scan_response_files())
+
+        # zlib and zstd release the GIL, so threads compress in parallel
+        report = {'codec': codec, 'files': 0, 'rewritten': 0, 'bytes_before': 0, 'bytes_after': 0}
+        blob_sizes = {}
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            sizes = executor.map(lambda path: self.recompress_file(path, codec), paths)
+            for i, (old_size, new_size) in enumerate(sizes):
+                report['files'] += 1
+                report['rewritten'] += old_size != new_size
+                report['bytes_before'] += old_size
+                report['bytes_after'] += new_size
+                if i < len(digests) and old_size != new_size:
+                    blob_sizes[digests[i]] = new_size
+
+        # Pointer files are unchanged, so their sizes are updated by hash;
+        # rewritten plain captures are picked up by the directory sync
+        self.index.set_sizes_by_hash(blob_sizes)
+        self.sync_index()
+
+        # Plain captures in segments are recompressed while compacting
+        if self.segments is not None:
+            segments = self.compact_segments(codec)
+            report['files'] += segments['records']
+            report['rewritten'] += segments['rewritten']
+            report['bytes_before'] += segments['bytes_before']
+            report['bytes_after'] += segments['bytes_after']
+        return report
+
+    def segment_store(self):
+        """Return the segment store, opening it when another backend is configured"""
+        return self.segments if self.segments is not None else SegmentStore()
+
+    def compact_segments(self, codec=None):
+        """Rewrite the segment store without removed records, return a report
+
+        With a codec, plain captures are recompressed on the way and their
+        indexed sizes updated.
+        """
+        segments = self.segment_store()
+        codec = storage_codecs.resolve_codec(codec) if codec else None
+        sizes = {}
+
+        def recompress(key, data):
+            encoded = self.recompress_data(data, codec)
+            if encoded is not data:
+                sizes[self.segment_filepath(key)] = len(encoded)
+            return encoded
+
+        before, after = segments.compact(recompress if codec else None)
+        self.index.set_sizes(sizes)
+        return {'records': len(segments), 'rewritten': len(sizes), 'bytes_before': before, 'bytes_after': after}
+
+    def export_segments(self, output_dir=DATA_DIR):
+        """Write every segment capture as a file of the directory layout, return how many
+
+        Exporting into DATA_DIR keeps pointer records, the blobs are already
+        there; anywhere else bodies are copied so the tree stands on its own.
+        Files keep the save time of their capture as mtime, so the index
+        stays valid after switching STORAGE_BACKEND back to "files".
+        """
+        segments = self.segment_store()
+        keep_pointers = os.path.abspath(output_dir) == os.path.abspath(DATA_DIR)
+        count = 0
+        for key, stat in segments.items():
+            filepath = os.path.join(output_dir, *key.split("/"))
+            temp_path = f"{filepath}.{os.getpid()}.export.tmp"
+            self.ensure_directory(os.path.dirname(filepath))
+            with segments.open(key) as record:
+                digest = read_pointer(record.read(POINTER_HEAD_SIZE))
+                record.seek(0)
+                source = record if digest is None or keep_pointers else self.blobs.open(digest)
+                with source, open(temp_path, "wb") as f:
+                    shutil.copyfileobj(source, f, 1024 * 1024)
+            os.utime(temp_path, (stat.st_mtime, stat.st_mtime))
+            os.replace(temp_path, filepath)
+            count += 1
+        return count
+
+    def import_segments(self):
+        """Move the capture files of the directory layout into the segment store, return how many"""
+        segments = self.segment_store()
+        count = 0
+        for filepath, _, _, stat in list(self.scan_response_files()):
+            segments.put_file(self.segment_key(filepath), filepath, stat.st_mtime)
+            count += 1
+        return count
\ No newline at end of file
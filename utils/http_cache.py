@@ -0,0 +1,251 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+import requests
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+from config.settings import HTTP_CACHE_DIR, HTTP_CACHE_MEMORY_BYTES
+
+CACHEABLE_METHODS = ("GET", "HEAD")
+
+def parse_cache_control(value):
+    """Parse a Cache-Control header into a {directive: value} dict"""
+    directives = {}
+    for part in (value or "").split(','):
+        name, _, argument = part.strip().partition('=')
+        if name:
+            directives[name.lower()] = argument.strip('"') or None
+    return directives
+
+class CacheEntry:
+    """A stored response body with the metadata needed to revalidate it"""
+
+    __slots__ = ("url", "status", "headers", "content", "vary", "stored_at", "data", "summary")
+
+    def __init__(self, url, status, headers, content, vary, stored_at):
+        self.url = url
+        self.status = status
+        self.headers = CaseInsensitiveDict(headers)
+        self.content = content
+        self.vary = vary
+        self.stored_at = stored_at
+        self.data = None
+        self.summary = None
+
+    @property
+    def etag(self):
+        return self.headers.get("ETag")
+
+    @property
+    def last_modified(self):
+        return self.headers.get("Last-Modified")
+
+    def max_age(self):
+        """Return the freshness lifetime in seconds, 0 if unknown"""
+        cache_control = parse_cache_control(self.headers.get("Cache-Control"))
+        if "no-cache" in cache_control:
+            return 0
+        try:
+            return int(cache_control.get("max-age") or 0)
+        except ValueError:
+            return 0
+
+    def is_fresh(self, now=None):
+        """Check whether the entry can be served without revalidation"""
+        now = time.time() if now is None else now
+        return now - self.stored_at < self.max_age()
+
+    def matches(self, request_headers):
+        """Check that the request carries the same values for the Vary headers"""
+        headers = CaseInsensitiveDict(request_headers)
+        return all(headers.get(name) == value for name, value in self.vary.items())
+
+    def to_response(self):
+        """Build a requests.Response serving the stored body"""
+        response = requests.Response()
+        response.status_code = self.status
+        response.headers = CaseInsensitiveDict(self.headers)
+        response._content = self.content
+        response._content_consumed = True
+        response.url = self.url
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.cache_entry = self
+        response.from_cache = True
+        return response
+
+class ResponseCache:
+    """HTTP response cache with conditional revalidation
+
+    Entries are kept in an LRU bounded by HTTP_CACHE_MEMORY_BYTES of body
+    data and written through to HTTP_CACHE_DIR, one file per method and
+    URL. Only the last variant of a URL is kept; the values of the
+    headers named by its Vary header must match for it to be used.
+    """
+
+    def __init__(self, cache_dir=HTTP_CACHE_DIR, max_memory_bytes=HTTP_CACHE_MEMORY_BYTES):
+        self.cache_dir = cache_dir
+        self.max_memory_bytes = max_memory_bytes
+        self._entries = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {
+            'hits': 0,
+            'misses': 0,
+            'revalidated': 0,
+            'stored': 0,
+            'bytes_saved': 0,
+        }
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def key(self, method, url):
+        """Return the storage key of a request"""
+        return hashlib.sha256(f"{method.upper()} {url}".encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], key)
+
+    def get(self, method, url, request_headers):
+        """Return the stored entry for a request, or None"""
+        if method.upper() not in CACHEABLE_METHODS:
+            return None
+
+        key = self.key(method, url)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+
+        if entry is None:
+            entry = self._load(key)
+            if entry is not None:
+                self._remember(key, entry)
+
+        if entry is not None and entry.matches(request_headers):
+            return entry
+        return None
+
+    def conditional_headers(self, entry, request_headers):
+        """Return request headers extended with the entry's validators"""
+        headers = dict(request_headers)
+        if entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+        return headers
+
+    def is_cacheable(self, method, response):
+        """Check whether a response may be stored"""
+        if method.upper() not in CACHEABLE_METHODS or response.status_code != 200:
+            return False
+        cache_control = parse_cache_control(response.headers.get("Cache-Control"))
+        if "no-store" in cache_control:
+            return False
+        if response.headers.get("Vary", "").strip() == "*":
+            return False
+        return bool(
+            response.headers.get("ETag")
+            or response.headers.get("Last-Modified")
+            or cache_control.get("max-age")
+        )
+
+    def build(self, method, url, request_headers, response):
+        """Return the entry of a full response without storing it, None if not cacheable"""
+        if not self.is_cacheable(method, response):
+            return None
+
+        request_headers = CaseInsensitiveDict(request_headers)
+        vary = {
+            name.strip(): request_headers.get(name.strip())
+            for name in response.headers.get("Vary", "").split(',')
+            if name.strip()
+        }
+        return CacheEntry(url, response.status_code, response.headers, response.content, vary, time.time())
+
+    def commit(self, method, entry):
+        """Store an entry built from a response, once the response has been handled"""
+        key = self.key(method, entry.url)
+        self._save(key, entry)
+        self._remember(key, entry)
+        self._count('stored')
+
+    def refresh(self, method, entry, not_modified):
+        """Update an entry from a 304 response and reset its age"""
+        for name in ("ETag", "Last-Modified", "Cache-Control", "Expires", "Date"):
+            if name in not_modified.headers:
+                entry.headers[name] = not_modified.headers[name]
+        entry.stored_at = time.time()
+        self._save(self.key(method, entry.url), entry)
+
+    def _remember(self, key, entry):
+        """Add an entry to the memory LRU and evict down to the byte budget"""
+        size = len(entry.content)
+        if size > self.max_memory_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._memory_bytes -= len(previous.content)
+            self._entries[key] = entry
+            self._memory_bytes += size
+            while self._memory_bytes > self.max_memory_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._memory_bytes -= len(evicted.content)
+
+    def _save(self, key, entry):
+        """Write an entry to disk: one JSON metadata line followed by the body"""
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        meta = {
+            'url': entry.url,
+            'status': entry.status,
+            'headers': dict(entry.headers),
+            'vary': entry.vary,
+            'stored_at': entry.stored_at,
+        }
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(json.dumps(meta).encode("utf-8") + b"\n")
+            f.write(entry.content)
+        os.replace(temp_path, path)
+
+    def _load(self, key):
+        """Read an entry from disk, or None"""
+        try:
+            with open(self._path(key), "rb") as f:
+                meta = json.loads(f.readline())
+                content = f.read()
+        except (OSError, ValueError):
+            return None
+        return CacheEntry(meta['url'], meta['status'], meta['headers'], content, meta['vary'], meta['stored_at'])
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self._stats[name] += amount
+
+    def record_hit(self, entry, revalidated=False):
+        """Count a response served from the cache"""
+        self._count('revalidated' if revalidated else 'hits')
+        self._count('bytes_saved', len(entry.content))
+
+    def record_miss(self):
+        """Count a response fetched in full"""
+        self._count('misses')
+
+    def stats(self):
+        """Return hit, miss, revalidation and memory counters"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['memory_entries'] = len(self._entries)
+            stats['memory_bytes'] = self._memory_bytes
+        return stats
+
+def requires_revalidation(request_headers):
+    """Check whether request headers ask to revalidate before using a cached copy"""
+    headers = CaseInsensitiveDict(request_headers)
+    cache_control = parse_cache_control(headers.get("Cache-Control"))
+    if "no-cache" in cache_control or cache_control.get("max-age") == "0":
+        return True
+    return headers.get("Pragma", "").lower() == "no-cache"
\ No newline at end of file
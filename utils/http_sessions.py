@@ -0,0 +1,167 @@
+import socket
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlparse
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import NameResolutionError, NewConnectionError, ConnectTimeoutError
+from urllib3.util.connection import allowed_gai_family
+from config.settings import (
+    HTTP_POOL_HOSTS, HTTP_POOL_MAXSIZE, HTTP_POOL_BLOCK,
+    HTTP_POOL_HOST_MAXSIZE, HTTP_SESSION_IDLE_TIMEOUT
+)
+from utils.request_metrics import phase
+
+class TimedConnectionMixin:
+    """Times name resolution and the TCP connect of new connections separately"""
+
+    def _new_conn(self):
+        host = self._dns_host
+        try:
+            with phase("dns"):
+                addresses = socket.getaddrinfo(host, self.port, allowed_gai_family(), socket.SOCK_STREAM)
+        except socket.gaierror as e:
+            raise NameResolutionError(self.host, self, e) from e
+
+        # Connect to the resolved addresses in order, as urllib3 would
+        error = None
+        for *_, address in addresses:
+            self._dns_host = address[0]
+            try:
+                with phase("connect"):
+                    return super()._new_conn()
+            except (NewConnectionError, ConnectTimeoutError) as e:
+                error = e
+            finally:
+                self._dns_host = host
+        raise error
+
+class TimedHTTPConnection(TimedConnectionMixin, HTTPConnection):
+    pass
+
+class TimedHTTPSConnection(TimedConnectionMixin, HTTPSConnection):
+    def connect(self):
+        # The TLS handshake is what connect adds to the nested dns and connect phases
+        with phase("tls"):
+            super().connect()
+
+class TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+class TimedHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter whose connections report dns, connect and tls phases"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": TimedHTTPConnectionPool,
+            "https": TimedHTTPSConnectionPool,
+        }
+
+class SessionPool:
+    """Long-lived keep-alive sessions, one per scheme and host
+
+    Each host gets its own requests.Session with a connection pool sized
+    by HTTP_POOL_MAXSIZE (or its HTTP_POOL_HOST_MAXSIZE override). At most
+    HTTP_POOL_HOSTS sessions are kept; the least recently used one and
+    sessions idle longer than HTTP_SESSION_IDLE_TIMEOUT are closed.
+    """
+
+    def __init__(self, max_hosts=HTTP_POOL_HOSTS, idle_timeout=HTTP_SESSION_IDLE_TIMEOUT):
+        self.max_hosts = max_hosts
+        self.idle_timeout = idle_timeout
+        self._sessions = OrderedDict()
+        self._closed_stats = {}
+        self._lock = threading.Lock()
+
+    def host_key(self, url):
+        """Return the scheme://host key a URL is pooled under"""
+        parsed_url = urlparse(url)
+        return f"{parsed_url.scheme}://{parsed_url.netloc}"
+
+    def create_session(self, host):
+        """Create a session with a connection pool sized for one host"""
+        netloc = host.split("://", 1)[-1]
+        maxsize = HTTP_POOL_HOST_MAXSIZE.get(netloc, HTTP_POOL_MAXSIZE)
+        adapter = TimedHTTPAdapter(pool_connections=1, pool_maxsize=maxsize, pool_block=HTTP_POOL_BLOCK)
+
+        session = requests.Session()
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+    def get(self, url):
+        """Return the session for a URL's host, creating it if needed"""
+        host = self.host_key(url)
+        now = time.monotonic()
+        with self._lock:
+            self._evict_idle(now)
+
+            entry = self._sessions.pop(host, None)
+            if entry is None:
+                entry = [self.create_session(host), now]
+            entry[1] = now
+            self._sessions[host] = entry
+
+            # Keep the number of pooled hosts bounded
+            while len(self._sessions) > self.max_hosts:
+                old_host, (old_session, _) = self._sessions.popitem(last=False)
+                self._close(old_host, old_session)
+
+            return entry[0]
+
+    def _evict_idle(self, now):
+        """Close sessions that have not been used for idle_timeout seconds"""
+        if not self.idle_timeout:
+            return
+        for host, (session, last_used) in list(self._sessions.items()):
+            if now - last_used > self.idle_timeout:
+                del self._sessions[host]
+                self._close(host, session)
+
+    def _close(self, host, session):
+        """Close a session, keeping its counters"""
+        stats = self._session_stats(session)
+        totals = self._closed_stats.setdefault(host, {'requests': 0, 'connections': 0})
+        totals['requests'] += stats['requests']
+        totals['connections'] += stats['connections']
+        session.close()
+
+    def _session_stats(self, session):
+        """Sum request and connection counters of a session's pools"""
+        stats = {'requests': 0, 'connections': 0}
+        for adapter in set(session.adapters.values()):
+            pools = adapter.poolmanager.pools
+            for key in pools.keys():
+                pool = pools.get(key)
+                if pool is not None:
+                    stats['requests'] += pool.num_requests
+                    stats['connections'] += pool.num_connections
+        return stats
+
+    def stats(self):
+        """Return per-host request, new connection and reused connection counts"""
+        with self._lock:
+            totals = {host: dict(stats) for host, stats in self._closed_stats.items()}
+            for host, (session, _) in self._sessions.items():
+                session_stats = self._session_stats(session)
+                host_stats = totals.setdefault(host, {'requests': 0, 'connections': 0})
+                host_stats['requests'] += session_stats['requests']
+                host_stats['connections'] += session_stats['connections']
+
+        for host_stats in totals.values():
+            host_stats['reused'] = max(0, host_stats['requests'] - host_stats['connections'])
+        return totals
+
+    def close(self):
+        """Close every pooled session"""
+        with self._lock:
+            while self._sessions:
+                host, (session, _) = self._sessions.popitem()
+                self._close(host, session)
\ No newline at end of file
@@ -0,0 +1,31 @@
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# orjson only supports two space indentation, the stdlib path matches it
+PRETTY_INDENT = 2
+
+def backend_name():
+    """Return the name of the JSON library in use"""
+    return "orjson" if orjson is not None else "json"
+
+def loads(data):
+    """Parse JSON from bytes or str, raising json.JSONDecodeError when invalid"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def dumps(data):
+    """Serialize data to compact UTF-8 JSON bytes"""
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode("utf-8")
+
+def pretty(data):
+    """Serialize data to an indented JSON string for display"""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2).decode("utf-8")
+    return json.dumps(data, indent=PRETTY_INDENT, ensure_ascii=False)
\ No newline at end of file
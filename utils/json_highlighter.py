@@ -0,0 +1,73 @@
+import re
+from collections import OrderedDict
+from config.settings import HIGHLIGHT_CACHE_LINES
+
+TAGS = ("string", "number", "boolean", "null", "key")
+
+# One alternation for every token kind, so a line is tokenized in a single
+# pass; a string cut at the end of a line still counts as a string
+TOKEN = re.compile(
+    r'(?P<string>"[^"\\\n]*(?:\\.[^"\\\n]*)*"?)(?P<colon>\s*:)?'
+    r'|(?P<number>-?\b\d+(?:\.\d+)?(?:[eE][+-]?\d+)?\b)'
+    r'|(?P<boolean>\b(?:true|false)\b)'
+    r'|(?P<null>\bnull\b)'
+)
+
+def tokenize(text):
+    """Return (tag, start, end) column ranges of the tokens of one line"""
+    tokens = []
+    for match in TOKEN.finditer(text):
+        kind = match.lastgroup
+        if kind == "colon":
+            tokens.append(("key", match.start(), match.end("string")))
+        else:
+            tokens.append((kind, match.start(), match.end()))
+    return tokens
+
+class Highlighter:
+    """Single pass JSON highlighter for the lines shown in a text widget
+
+    Token ranges of a line are cached under a caller supplied key, such as
+    (filepath, mtime, line), so scrolling back over a document does not
+    tokenize its lines again. Ranges are applied with one tag_add call per
+    tag instead of one per token.
+    """
+
+    def __init__(self, max_lines=HIGHLIGHT_CACHE_LINES):
+        self.max_lines = max_lines
+        self._cache = OrderedDict()
+
+    def line_tokens(self, text, key=None):
+        """Return the token ranges of a line, from the cache when key is given"""
+        if key is None:
+            return tokenize(text)
+
+        tokens = self._cache.get(key)
+        if tokens is None:
+            tokens = tokenize(text)
+            self._cache[key] = tokens
+            if len(self._cache) > self.max_lines:
+                self._cache.popitem(last=False)
+        else:
+            self._cache.move_to_end(key)
+        return tokens
+
+    def ranges(self, rows):
+        """Group the token ranges of (text, key) rows into Tk indices per tag"""
+        ranges = {tag: [] for tag in TAGS}
+        for row, (text, key) in enumerate(rows, 1):
+            for tag, start, end in self.line_tokens(text, key):
+                ranges[tag].append(f"{row}.{start}")
+                ranges[tag].append(f"{row}.{end}")
+        return ranges
+
+    def apply(self, widget, rows):
+        """Highlight the rows shown in a text widget, one line per row"""
+        for tag, indices in self.ranges(rows).items():
+            widget.tag_remove(tag, "1.0", "end")
+            if indices:
+                widget.tag_add(tag, *indices)
+
+    def clear(self):
+        """Forget every cached line"""
+        self._cache.clear()
\ No newline at end of file
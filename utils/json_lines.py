@@ -0,0 +1,208 @@
+import re
+from array import array
+from config.settings import VIEWER_INDEX_CHUNK, VIEWER_LINE_LIMIT
+from utils.json_backend import PRETTY_INDENT
+
+STRING = re.compile(rb'"[^"\\]*(?:\\.[^"\\]*)*"', re.DOTALL)
+
+# The rest of a string, stopping at its closing quote or a backslash cut off at the end
+STRING_REST = re.compile(rb'[^"\\]*(?:\\.[^"\\]*)*', re.DOTALL)
+
+# Text up to a string that is still open at the end of the data
+COMPLETE = re.compile(rb'(?:[^"]+|"[^"\\]*(?:\\.[^"\\]*)*")*', re.DOTALL)
+
+# A whole string, or a structural character; empty containers stay on
+# one line like in the pretty printed output
+TOKEN = re.compile(rb'"[^"\\]*(?:\\.[^"\\]*)*"|(\{\s*\}|\[\s*\]|[\[\]{},])', re.DOTALL)
+NON_WHITESPACE = re.compile(rb'[^ \t\r\n]')
+CLOSERS = {b"{": b"}", b"[": b"]"}
+
+WHITESPACE = b" \t\r\n"
+
+# Nesting change of each structural token, None for empty containers
+STEPS = {b"{": 1, b"[": 1, b"}": -1, b"]": -1, b",": 0}
+
+class JSONLines:
+    """Line index of a JSON document as it would be pretty-printed
+
+    The document is never formatted as a whole. Only the byte offset and
+    nesting depth of each pretty-printed line are recorded, chunk by chunk
+    as lines are asked for, and a line is formatted from its bytes when it
+    is shown. Every byte is tokenized once: a string or an opener left
+    open at the end of a chunk is carried over as state, not rescanned. The stream must be seekable; compressed captures are opened
+    with FileManager.open_document, which seeks in the decompressed bytes.
+    """
+
+    def __init__(self, stream, chunk_size=VIEWER_INDEX_CHUNK):
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.starts = array("q", [0])
+        self.depths = array("I", [0])
+        self.depth = 0
+        self.size = 0  # bytes read from the stream
+        self.in_string = False
+        self.escape = False  # the data read so far ends inside a string escape
+        self.opener = None  # (opener, line start) followed only by whitespace so far
+        self.done = False
+
+    def __len__(self):
+        """Return the number of lines indexed so far"""
+        return len(self.starts)
+
+    def index_chunk(self):
+        """Index the next chunk of the document, return False at the end"""
+        if self.done:
+            return False
+        self.stream.seek(self.size)
+        chunk = self.stream.read(self.chunk_size)
+        self.size += len(chunk)
+        self._scan(chunk, final=not chunk)
+        self.done = not chunk
+        return not self.done
+
+    def ensure(self, count):
+        """Index until at least count lines are known or the document ends"""
+        while len(self.starts) < count and self.index_chunk():
+            pass
+        return len(self.starts)
+
+    def _scan(self, data, final):
+        """Record the lines starting in the next chunk of the document"""
+        base = self.size - len(data)
+        pos = 0
+        if self.in_string:
+            pos = self._skip_string(data, pos)
+            if self.in_string:
+                return
+        elif self.opener is not None:
+            # An opener followed by its closer is an empty container on one line
+            following = NON_WHITESPACE.search(data)
+            if following is None and not final:
+                return
+            opener, start = self.opener
+            self.opener = None
+            if following is not None and following.group() == CLOSERS[opener]:
+                pos = following.end()
+            else:
+                self.depth += 1
+                self.starts.append(start)
+                self.depths.append(self.depth)
+
+        # Only complete strings are tokenized, an open one is skipped to its end
+        end = COMPLETE.match(data, pos).end()
+        if end < len(data):
+            self.in_string = True
+            self._skip_string(data, end + 1)
+
+        tokens = [match for match in TOKEN.finditer(data, pos, end) if match.lastindex]
+        if tokens and not final and end == len(data):
+            last = tokens[-1]
+            if last.group(1) in CLOSERS and NON_WHITESPACE.search(data, last.end()) is None:
+                self.opener = (last.group(1), base + last.end())
+                tokens.pop()
+
+        # Openers and commas end a line, closers start one on the outer level
+        depth = self.depth
+        for match in tokens:
+            step = STEPS.get(match.group(1))
+            if step is None:
+                continue
+            depth += step
+            self.starts.append(base + (match.start(1) if step < 0 else match.end()))
+            self.depths.append(depth)
+        self.depth = depth
+
+    def _skip_string(self, data, pos):
+        """Move past the rest of an open string, return the offset after it"""
+        if self.escape:
+            if pos >= len(data):
+                return pos
+            pos += 1
+            self.escape = False
+        end = STRING_REST.match(data, pos).end()
+        if end == len(data):
+            return end
+        if data[end:end + 1] == b"\\":
+            # Only a backslash cut off at the end of the data stops the match
+            self.escape = True
+            return len(data)
+        self.in_string = False
+        return end + 1
+
+    def close(self):
+        """Close the document stream"""
+        self.stream.close()
+
+    def read(self, start, end):
+        """Return document bytes between two offsets"""
+        self.stream.seek(start)
+        return self.stream.read(end - start)
+
+    def line_bytes(self, line, limit=None):
+        """Return the raw bytes of a line, cut at limit bytes"""
+        if line + 1 >= len(self.starts):
+            self.ensure(line + 2)
+        start = self.starts[line]
+        end = self.starts[line + 1] if line + 1 < len(self.starts) else self.size
+        if limit is not None:
+            end = min(end, start + limit)
+        return self.read(start, end)
+
+    def line_text(self, line, limit=VIEWER_LINE_LIMIT):
+        """Return one line formatted as in the pretty-printed document"""
+        indent = " " * (PRETTY_INDENT * self.depths[line])
+        raw = self.line_bytes(line, limit + 1)
+        if len(raw) > limit:
+            # A cut line may end inside a string, so it is shown as stored
+            return indent + raw[:limit].strip(WHITESPACE).decode("utf-8", "replace") + " …"
+
+        # Whitespace between tokens is normalized, strings are kept as they are
+        parts = []
+        pos = 0
+        for match in STRING.finditer(raw):
+            parts.append(self._format_tokens(raw[pos:match.start()]))
+            parts.append(match.group())
+            pos = match.end()
+        parts.append(self._format_tokens(raw[pos:]))
+        return indent + b"".join(parts).decode("utf-8", "replace")
+
+    def _format_tokens(self, text):
+        """Format the characters between strings of a line"""
+        return text.translate(None, WHITESPACE).replace(b":", b": ")
+
+    def text(self, start, max_lines, max_chars=None):
+        """Return (text, next line) for up to max_lines formatted lines from start
+
+        Lines stop early once max_chars characters are collected; the next
+        line is None when the document has no more lines.
+        """
+        self.ensure(start + max_lines + 1)
+        lines = []
+        chars = 0
+        line = start
+        while line < len(self.starts) and len(lines) < max_lines:
+            if max_chars is not None and lines and chars >= max_chars:
+                break
+            text = self.line_text(line)
+            lines.append(text)
+            chars += len(text) + 1
+            line += 1
+        if line >= self.ensure(line + 1):
+            line = None
+        return "\n".join(lines), line
+
+    def is_opener(self, line):
+        """Check whether a line opens a non-empty container"""
+        self.ensure(line + 2)
+        return line + 1 < len(self.starts) and self.depths[line + 1] > self.depths[line]
+
+    def closing_line(self, line):
+        """Return the line closing the container opened on a line"""
+        depth = self.depths[line]
+        current = line + 1
+        while True:
+            if current >= len(self.starts) and self.ensure(current + 1) <= current:
+                return len(self.starts) - 1
+            if self.depths[current] <= depth:
+                return current
+            current += 1
\ No newline at end of file
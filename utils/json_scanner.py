@@ -0,0 +1,304 @@
+import re
+from itertools import accumulate, compress, repeat
+from operator import eq, mul
+from config.settings import SUMMARY_MAX_KEYS
+from utils import json_backend
+
+STRING = re.compile(rb'"[^"\\\x00-\x1f]*(?:\\(?:["\\/bfnrt]|u[0-9a-fA-F]{4})[^"\\\x00-\x1f]*)*"')
+SCALAR = re.compile(rb'-?(?:0|[1-9][0-9]*)(?:\.[0-9]+)?(?:[eE][+-]?[0-9]+)?|true|false|null')
+
+# A string still open at the end of a chunk, with any escape sequence cut in half
+OPEN_STRING = re.compile(rb'"[^"\\\x00-\x1f]*(?:\\(?:["\\/bfnrt]|u[0-9a-fA-F]{4})[^"\\\x00-\x1f]*)*(\\(?:u[0-9a-fA-F]{0,3})?)?\Z')
+
+# A number or literal at the end of a chunk that may continue in the next one
+OPEN_SCALAR = re.compile(rb'(?:-?[0-9][-+.0-9eE]*|-|t|tr|tru|f|fa|fal|fals|n|nu|nul)\Z')
+OPEN_SCALAR_WINDOW = 1024
+
+# Open strings up to this size are carried whole so keys keep their text
+OPEN_STRING_KEEP = 64 * 1024
+
+# Bytes kept from the start of a document to tell whether a top level scalar is empty
+HEAD_SIZE = 1024
+ZERO = re.compile(rb'-?0(?:\.0+)?(?:[eE][+-]?[0-9]+)?')
+
+# Grammar reductions over the skeleton, where strings are "q", other
+# values "v" and complete "key: value" members "p"
+PAIRS = re.compile(rb'(?<=[{,])q:[qv]')
+PAIR_RUNS = re.compile(rb'(?<={)p(?:,p)+')
+VALUE_RUNS = re.compile(rb'(?<=\[)[qv](?:,[qv])+')
+CONTAINERS = re.compile(rb'\[[qv]?\]|\{p?\}')
+REDUCTIONS = ((PAIRS, b'p'), (PAIR_RUNS, b'p'), (VALUE_RUNS, b'v'), (CONTAINERS, b'v'))
+
+WHITESPACE = b" \t\r\n"
+SKELETON_CHARS = b"{}[]:,qv"
+QUOTE = ord("q")
+COMMA = ord(",")
+
+# Skeleton characters as the bytes the fold works on
+OPEN_ARRAY, CLOSE_ARRAY, OPEN_OBJECT, CLOSE_OBJECT = b"[]{}"
+COLON, VALUE, PAIR = b":vp"
+
+# Nesting change of every skeleton character, and the characters a key follows
+DEPTH_STEP = [0] * 256
+DEPTH_STEP[ord("[")] = DEPTH_STEP[ord("{")] = 1
+DEPTH_STEP[ord("]")] = DEPTH_STEP[ord("}")] = -1
+KEY_PRECEDES = [0] * 256
+KEY_PRECEDES[ord("{")] = KEY_PRECEDES[ord(",")] = 1
+
+ROOT_TYPES = {
+    ord("{"): "object",
+    ord("["): "array",
+    ord('"'): "string",
+    ord("t"): "boolean",
+    ord("f"): "boolean",
+    ord("n"): "null",
+}
+
+class JSONStreamError(ValueError):
+    """Raised when streamed bytes are not a single valid JSON document"""
+
+    def __init__(self, msg, pos):
+        super().__init__(f"{msg} near byte {pos}")
+        self.msg = msg
+        self.pos = pos
+
+class JSONScanner:
+    """Incremental JSON validator fed with chunks of bytes
+
+    Each chunk is reduced with regular expressions to a skeleton of its
+    tokens. One round of grammar reductions folds the flat parts of the
+    skeleton, then its remaining tokens are pushed one by one onto the
+    stack of open containers left by the previous chunks, so the work is
+    linear in the input however deep it nests. A valid prefix always
+    folds down to its open containers, so memory stays bounded by the
+    chunk size and nesting depth, never by the document size.
+
+    A summary is collected on the way: the top level type, the number of
+    members of a top level array or object, the first top level keys of
+    an object and the nesting depth.
+    """
+
+    def __init__(self, max_keys=SUMMARY_MAX_KEYS):
+        self.skeleton = bytearray()
+        self.tail = b""
+        self.offset = 0  # bytes fed before self.tail
+        self.head = b""
+        self.max_keys = max_keys
+        self.root = None
+        self.depth = 0
+        self.members = 0
+        self.keys = []
+
+    def feed(self, chunk):
+        """Validate the next chunk of the document"""
+        data = self.tail + chunk if self.tail else chunk
+        if len(self.head) < HEAD_SIZE:
+            self.head += chunk[:HEAD_SIZE - len(self.head)]
+        if self.root is None:
+            first = data.lstrip(WHITESPACE)[:1]
+            if first:
+                self.root = ROOT_TYPES.get(first[0], "number")
+        collapsed, strings = STRING.subn(b"q", data)
+
+        # A token cut at the end of the chunk is kept for the next call; the
+        # characters of a long open string are checked now and only its quote kept
+        quote = collapsed.find(b'"')
+        if quote >= 0:
+            open_string = OPEN_STRING.match(collapsed, quote)
+            if open_string is None:
+                raise JSONStreamError("Invalid JSON string", self.offset)
+            tail_size = len(collapsed) - quote
+            if tail_size <= OPEN_STRING_KEEP:
+                tail = collapsed[quote:]
+            else:
+                tail = b'"' + (open_string.group(1) or b"")
+        else:
+            open_scalar = OPEN_SCALAR.search(collapsed[-OPEN_SCALAR_WINDOW:])
+            tail_size = len(open_scalar.group()) if open_scalar else 0
+            tail = collapsed[len(collapsed) - tail_size:]
+
+        self._fold(collapsed[:len(collapsed) - tail_size], strings, data)
+        self.offset += len(data) - tail_size
+        self.tail = tail
+
+    def close(self):
+        """Validate the end of the document"""
+        if self.tail.startswith(b'"'):
+            raise JSONStreamError("Incomplete JSON document", self.offset)
+        self._fold(self.tail, 0, self.tail)
+        self.tail = b""
+        if not self.skeleton:
+            raise JSONStreamError("Empty response received", self.offset)
+        if self.skeleton not in (b"q", b"v"):
+            raise JSONStreamError("Incomplete JSON document", self.offset)
+
+    def is_empty(self):
+        """Return whether the scanned document is "", null, false, zero, [] or {}"""
+        if self.root in ("array", "object"):
+            return not self.members
+        value = self.head.strip(WHITESPACE)
+        if self.root == "number":
+            return ZERO.fullmatch(value) is not None
+        return value in (b'""', b"null", b"false")
+
+    def summary(self):
+        """Return the summary of the scanned document"""
+        summary = {'type': self.root, 'depth': self.depth}
+        if self.root in ("array", "object"):
+            summary['length'] = self.members
+        if self.root == "object":
+            summary['keys'] = self.keys
+        return summary
+
+    def _fold(self, collapsed, strings, data):
+        """Fold a chunk whose strings are already collapsed into the skeleton"""
+        skeleton, values = SCALAR.subn(b"v", collapsed)
+        skeleton = skeleton.translate(None, WHITESPACE)
+
+        # Any other character, or a "q" or "v" that was not put there by a
+        # substitution, is not valid JSON
+        if (skeleton.translate(None, SKELETON_CHARS)
+                or skeleton.count(b"q") != strings or skeleton.count(b"v") != values):
+            raise JSONStreamError("Invalid JSON token", self.offset)
+
+        if self.root in ("array", "object") and not self.members:
+            if (self.skeleton + skeleton)[1:2] not in (b"", b"]", b"}"):
+                self.members = 1
+        self._measure(skeleton, strings, data)
+
+        # The reductions are only a shortcut for the shift below, repeated
+        # while they halve the skeleton so the rounds stay linear. Lookbehinds
+        # that would need the previous chunk simply do not match
+        starts_root = self.root in ("array", "object") and not self.skeleton
+        while True:
+            size = len(skeleton)
+            for pattern, replacement in REDUCTIONS:
+                # Members of the top level container are counted as they fold
+                if starts_root and (pattern is PAIR_RUNS or pattern is VALUE_RUNS):
+                    run = pattern.match(skeleton, 1)
+                    if run:
+                        self.members += run.group().count(b",")
+                skeleton = pattern.sub(replacement, skeleton)
+            if len(skeleton) * 2 > size or not skeleton:
+                break
+        for token in skeleton:
+            if not self._shift(token):
+                raise JSONStreamError("Invalid JSON structure", self.offset)
+
+    def _shift(self, token):
+        """Fold one skeleton token into the open containers, return whether it is valid there"""
+        stack = self.skeleton
+        top = stack[-1] if stack else None
+        below = stack[-2] if len(stack) > 1 else None
+
+        if token == CLOSE_ARRAY or token == CLOSE_OBJECT:
+            opener, member = (OPEN_ARRAY, VALUE) if token == CLOSE_ARRAY else (OPEN_OBJECT, PAIR)
+            if top == opener:
+                stack.pop()
+            elif top == member and below == opener:
+                del stack[-2:]
+            else:
+                return False
+            return self._place(VALUE)
+
+        # A key is expected after "{" and after the "," following a member
+        if top == OPEN_OBJECT or (top == COMMA and below == PAIR):
+            if token == QUOTE:
+                stack.append(token)
+            elif token == PAIR and top == COMMA:
+                stack.pop()
+            elif token == PAIR:
+                stack.append(token)
+            else:
+                return False
+        elif token == COLON:
+            if top != QUOTE or below not in (OPEN_OBJECT, COMMA):
+                return False
+            stack.append(token)
+        elif token == COMMA:
+            if top != PAIR and not (top == VALUE and below == OPEN_ARRAY):
+                return False
+            if len(stack) == 2:
+                self.members += 1
+            stack.append(token)
+        else:
+            return self._place(token)
+        return True
+
+    def _place(self, token):
+        """Put a value or an opening bracket where the innermost open container expects one"""
+        stack = self.skeleton
+        top = stack[-1] if stack else None
+        if token == PAIR:
+            return False
+        if top is None:
+            stack.append(token)
+        elif token == OPEN_ARRAY or token == OPEN_OBJECT:
+            if top != OPEN_ARRAY and top != COLON and not (top == COMMA and stack[-2] == VALUE):
+                return False
+            stack.append(token)
+        elif top == OPEN_ARRAY:
+            stack.append(VALUE)
+        elif top == COMMA and stack[-2] == VALUE:
+            stack.pop()
+        elif top == COLON:
+            # The key, ":" and the value fold into a member
+            del stack[-2:]
+            if stack[-1] == COMMA:
+                stack.pop()
+            else:
+                stack.append(PAIR)
+        else:
+            return False
+        return True
+
+    def _measure(self, skeleton, strings, data):
+        """Update the depth and top level keys with the skeleton of a chunk"""
+        open_depth = len(self.skeleton) - len(self.skeleton.translate(None, b"[{"))
+        brackets = skeleton.translate(None, b"qv:,")
+        lowest = open_depth
+        if brackets:
+            levels = list(accumulate(map(DEPTH_STEP.__getitem__, brackets), initial=open_depth))
+            self.depth = max(self.depth, max(levels))
+            lowest = min(levels)
+
+        # Only chunks that come back to the top level can hold its keys
+        if self.root == "object" and lowest <= 1 and strings and len(self.keys) < self.max_keys:
+            self._collect_keys(skeleton, data, open_depth)
+
+    def _collect_keys(self, skeleton, data, open_depth):
+        """Add the top level keys of an object found in the skeleton of a chunk"""
+        previous = (self.skeleton[-1:] or b" ") + skeleton[:-1]
+        levels = accumulate(map(DEPTH_STEP.__getitem__, skeleton), initial=open_depth)
+        ordinals = accumulate(map(eq, skeleton, repeat(QUOTE)), initial=0)
+
+        # A key is a string at level one right after "{" or ","
+        is_key = map(
+            mul,
+            map(mul, map(eq, skeleton, repeat(QUOTE)), map(KEY_PRECEDES.__getitem__, previous)),
+            map(eq, levels, repeat(1))
+        )
+        key_ordinals = list(compress(ordinals, is_key))[:self.max_keys - len(self.keys)]
+        if key_ordinals:
+            strings = STRING.findall(data)
+            self.keys.extend(json_backend.loads(strings[ordinal]) for ordinal in key_ordinals)
+
+def scan(data, chunk_size=64 * 1024):
+    """Validate a JSON document held in memory and return its scanner"""
+    scanner = JSONScanner()
+    for start in range(0, len(data), chunk_size):
+        scanner.feed(data[start:start + chunk_size])
+    scanner.close()
+    return scanner
+
+def summarize(data, chunk_size=64 * 1024):
+    """Validate a JSON document held in memory and return its summary"""
+    return scan(data, chunk_size).summary()
+
+def validate_chunks(chunks):
+    """Yield chunks unchanged while validating that they form one JSON document"""
+    scanner = JSONScanner()
+    for chunk in chunks:
+        scanner.feed(chunk)
+        yield chunk
+    scanner.close()
\ No newline at end of file
@@ -1,24 +1,71 @@
+import atexit
 import logging
-from logging.handlers import RotatingFileHandler
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
 import os
+import queue
+import sys
+from collections import deque
 from datetime import datetime
-import tkinter as tk
-from config.settings import LOGS_DIR, LOG_FORMAT, LOG_FILE_MAX_SIZE, LOG_FILE_BACKUP_COUNT
+from config.settings import (
+    LOGS_DIR, LOG_FORMAT, LOG_FILE_MAX_SIZE, LOG_FILE_BACKUP_COUNT, LOG_GUI_MAX_LINES, LOG_GUI_DRAIN_INTERVAL
+)
 
 class GUILogHandler(logging.Handler):
-    def __init__(self, text_widget):
+    """Collect log lines for a text widget that shows them in blocks
+
+    emit only appends to a deque, so it never touches Tk from the logging
+    thread. The Tk thread drains everything pending on a fixed tick, inserts
+    it as one block and trims the widget to max_lines.
+    """
+
+    def __init__(self, text_widget, max_lines=LOG_GUI_MAX_LINES, interval=LOG_GUI_DRAIN_INTERVAL):
         super().__init__()
         self.text_widget = text_widget
-        
+        self.max_lines = max_lines
+        self.interval = interval
+
+        # Lines past max_lines would be trimmed right away, so they are dropped
+        # here; one line is left for the note saying how many were skipped
+        self.pending = deque(maxlen=max(1, max_lines - 1))
+        self.skipped = 0
+        self.reported_skipped = 0
+        self.text_widget.after(self.interval, self.drain)
+
     def emit(self, record):
-        msg = self.format(record)
-        def append():
-            self.text_widget.insert(tk.END, msg + '\n')
-            self.text_widget.see(tk.END)
-        self.text_widget.after(0, append)
-
-def setup_logging(log_text_widget):
-    """Set up logging configuration"""
+        try:
+            if len(self.pending) == self.pending.maxlen:
+                self.skipped += 1
+            self.pending.append(self.format(record))
+        except Exception:
+            self.handleError(record)
+
+    def drain(self):
+        """Insert the pending lines as one block and trim the oldest ones"""
+        lines = []
+        while self.pending:
+            lines.append(self.pending.popleft())
+
+        skipped = self.skipped - self.reported_skipped
+        if skipped:
+            self.reported_skipped += skipped
+            lines.insert(0, f"... {skipped} log lines skipped, see the log file")
+
+        if lines:
+            self.text_widget.insert("end", "\n".join(lines) + "\n")
+            line_count = int(self.text_widget.index("end-1c").split(".")[0]) - 1
+            if line_count > self.max_lines:
+                self.text_widget.delete("1.0", f"{line_count - self.max_lines + 1}.0")
+            self.text_widget.see("end")
+        self.text_widget.after(self.interval, self.drain)
+
+def setup_logging(log_text_widget=None, console_level=None):
+    """Set up logging configuration
+    
+    The GUI handler is only added when a text widget is given, so headless
+    commands never need tkinter. console_level adds a stderr handler.
+    Records are passed through a queue to a listener thread that runs the
+    handlers, so logging only costs the caller an enqueue.
+    """
     # Create logs directory if it doesn't exist
     os.makedirs(LOGS_DIR, exist_ok=True)
     
@@ -36,17 +83,31 @@ def setup_logging(log_text_widget):
     # Create formatters and add it to handlers
     log_format = logging.Formatter(LOG_FORMAT)
     file_handler.setFormatter(log_format)
+    handlers = [file_handler]
+    
+    # Add GUI handler
+    if log_text_widget is not None:
+        gui_handler = GUILogHandler(log_text_widget)
+        gui_handler.setFormatter(log_format)
+        handlers.append(gui_handler)
+    
+    # Add console handler, stdout is left free for command output
+    if console_level is not None:
+        console_handler = logging.StreamHandler(sys.stderr)
+        console_handler.setLevel(console_level)
+        console_handler.setFormatter(log_format)
+        handlers.append(console_handler)
+    
+    # The listener thread writes the file and feeds the GUI; stopping it at
+    # exit flushes whatever is still queued
+    log_queue = queue.SimpleQueue()
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
     
     # Get the logger
     logger = logging.getLogger('URLParser')
     logger.setLevel(logging.DEBUG)
+    logger.addHandler(QueueHandler(log_queue))
     
-    # Add handlers to the logger
-    logger.addHandler(file_handler)
-    
-    # Add GUI handler
-    gui_handler = GUILogHandler(log_text_widget)
-    gui_handler.setFormatter(log_format)
-    logger.addHandler(gui_handler)
-    
-    return logger 
\ No newline at end of file
+    return logger
\ No newline at end of file
@@ -0,0 +1,158 @@
+import heapq
+import itertools
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from config.settings import (
+    RATE_LIMITS, RATE_LIMIT_DEFAULT, RATE_LIMIT_DECREASE, RATE_LIMIT_RECOVERY, RATE_LIMIT_MIN, RETRY_AFTER_MAX
+)
+from utils.task_runner import check_cancelled
+
+# Waiting requests are served lowest number first, in arrival order within a priority
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BATCH = 10
+
+CANCEL_POLL = 0.1  # seconds between cancellation checks while waiting
+
+def parse_retry_after(value, maximum=RETRY_AFTER_MAX):
+    """Return the seconds a Retry-After header asks to wait, None if it is missing or invalid"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        seconds = int(value)
+    else:
+        try:
+            seconds = (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds()
+        except (TypeError, ValueError):
+            return None
+    return min(max(0.0, seconds), maximum)
+
+class TokenBucket:
+    """Token bucket of one host; rate adapts to 429s but never exceeds limit"""
+
+    __slots__ = ("limit", "rate", "burst", "tokens", "updated", "blocked_until")
+
+    def __init__(self, rate, burst):
+        self.limit = rate
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+
+    def delay(self, now):
+        """Return the seconds until a token is available, taking it if one is available now"""
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        if self.rate is None:
+            return 0.0
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+class RateLimiter:
+    """Per-host token buckets shared by every request of the application
+
+    Hosts are limited by RATE_LIMITS, others by RATE_LIMIT_DEFAULT or not
+    at all. Requests waiting for a host are served by priority, so an
+    interactive request goes ahead of queued batch jobs. A 429 lowers the
+    host's rate by RATE_LIMIT_DECREASE and Retry-After pauses the host;
+    successful requests raise the rate back towards its limit.
+    """
+
+    def __init__(self, limits=RATE_LIMITS, default=RATE_LIMIT_DEFAULT):
+        self.limits = limits
+        self.default = default
+        self._buckets = {}
+        self._queues = {}  # host: heap of [priority, sequence] of waiting requests
+        self._sequence = itertools.count()
+        self._cond = threading.Condition()
+
+    def _bucket(self, host, create=False):
+        """Return the bucket of a host, None if it is unlimited and not paused; the lock must be held"""
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            limit = self.limits.get(host, self.default)
+            if limit is None and not create:
+                return None
+            rate, burst = limit if limit is not None else (None, 1)
+            bucket = self._buckets[host] = TokenBucket(rate, burst)
+        return bucket
+
+    def acquire(self, host, priority=PRIORITY_INTERACTIVE, cancel_event=None):
+        """Wait for a token of a host and return the seconds waited"""
+        started = time.monotonic()
+        with self._cond:
+            bucket = self._bucket(host)
+            if bucket is None:
+                return 0.0
+
+            queue = self._queues.setdefault(host, [])
+            entry = [priority, next(self._sequence)]
+            heapq.heappush(queue, entry)
+            try:
+                while True:
+                    # Only the first waiter takes tokens, the others wait their turn
+                    delay = None
+                    if queue[0] is entry:
+                        delay = bucket.delay(time.monotonic())
+                        if not delay:
+                            return time.monotonic() - started
+                    if cancel_event is not None:
+                        check_cancelled(cancel_event)
+                        delay = CANCEL_POLL if delay is None else min(delay, CANCEL_POLL)
+                    self._cond.wait(delay)
+            finally:
+                queue.remove(entry)
+                heapq.heapify(queue)
+                self._cond.notify_all()
+
+    def try_acquire(self, host):
+        """Take a token of a host only if nobody is waiting and one is available now"""
+        with self._cond:
+            bucket = self._bucket(host)
+            if bucket is None:
+                return True
+            if self._queues.get(host):
+                return False
+            return not bucket.delay(time.monotonic())
+
+    def penalize(self, host, retry_after=None):
+        """Slow a host down after a 429, pausing it for retry_after seconds when given"""
+        with self._cond:
+            bucket = self._bucket(host, create=True)
+            now = time.monotonic()
+            if retry_after is not None:
+                bucket.blocked_until = max(bucket.blocked_until, now + retry_after)
+            if bucket.limit is not None:
+                bucket.rate = max(min(RATE_LIMIT_MIN, bucket.limit), bucket.rate * RATE_LIMIT_DECREASE)
+            bucket.tokens = 0
+            bucket.updated = max(now, bucket.blocked_until)
+            self._cond.notify_all()
+
+    def record_success(self, host):
+        """Raise a slowed down host's rate back towards its limit"""
+        with self._cond:
+            bucket = self._buckets.get(host)
+            if bucket is not None and bucket.limit is not None and bucket.rate < bucket.limit:
+                bucket.rate = min(bucket.limit, bucket.rate + bucket.limit * RATE_LIMIT_RECOVERY)
+
+    def stats(self):
+        """Return the current rate, limit, waiting requests and pause of every limited host"""
+        with self._cond:
+            now = time.monotonic()
+            return {
+                host: {
+                    'rate': bucket.rate,
+                    'limit': bucket.limit,
+                    'burst': bucket.burst,
+                    'waiting': len(self._queues.get(host, ())),
+                    'paused_for': max(0.0, bucket.blocked_until - now),
+                }
+                for host, bucket in self._buckets.items()
+            }
\ No newline at end of file
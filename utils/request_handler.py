@@ -1,11 +1,33 @@
+import itertools
 import requests
 import json
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from contextlib import contextmanager
 from urllib.parse import urlparse, parse_qs
-from config.settings import REQUEST_TIMEOUT
+from config.settings import (
+    REQUEST_CONNECT_TIMEOUT, REQUEST_READ_TIMEOUT, DOWNLOAD_CHUNK_SIZE, STREAM_THRESHOLD, HTTP_CACHE_ENABLED,
+    RETRY_ATTEMPTS, RETRY_METHODS, RETRY_STATUS, HEDGE_ENABLED, HEDGE_PERCENTILE, HEDGE_MIN_DELAY,
+    HEDGE_MIN_SAMPLES, HEDGE_WORKERS
+)
+from utils.task_runner import check_cancelled
+from utils.http_sessions import SessionPool
+from utils.http_cache import ResponseCache, requires_revalidation
+from utils import json_backend
+from utils.json_scanner import JSONScanner, JSONStreamError, scan
+from utils.request_metrics import RequestMetrics, RequestTiming, current_timing, phase, timed_call, timed_chunks
+from utils.resilience import CircuitBreaker, CircuitOpenError, backoff_delay
+from utils.rate_limiter import RateLimiter, PRIORITY_INTERACTIVE, parse_retry_after
 
 class RequestHandler:
-    def __init__(self, logger):
+    def __init__(self, logger, use_cache=HTTP_CACHE_ENABLED):
         self.logger = logger
+        self.sessions = SessionPool()
+        self.cache = ResponseCache() if use_cache else None
+        self.metrics = RequestMetrics()
+        self.breaker = CircuitBreaker()
+        self.limiter = RateLimiter()
+        self.hedge_pool = ThreadPoolExecutor(HEDGE_WORKERS, thread_name_prefix="hedge") if HEDGE_ENABLED else None
     
     def parse_url(self, url):
         """Parse URL and return parameters"""
@@ -30,19 +52,46 @@ class RequestHandler:
             return api_url
         return url
     
-    def make_request(self, url, method, headers):
-        """Make HTTP request and return response"""
+    def make_request(self, url, method, headers, cancel_event=None, priority=PRIORITY_INTERACTIVE):
+        """Make HTTP request and return response
+
+        Bodies larger than STREAM_THRESHOLD are not read; the response is
+        returned with streamed=True and its body must be consumed with
+        iter_body. priority orders requests waiting for a rate limited host.
+        A cacheable response is only cached by commit_cache, once it is saved.
+        """
         try:
             api_url = self.convert_browse_url(url)
             self.logger.info(f"Making {method} request with headers: {headers}")
             
-            response = requests.request(
-                method,
-                api_url,
-                headers=headers,
-                timeout=REQUEST_TIMEOUT
-            )
+            # Serve fresh cached copies, otherwise revalidate stored ones
+            entry = self.cache.get(method, api_url, headers) if self.cache else None
+            if entry is not None and entry.is_fresh() and not requires_revalidation(headers):
+                self.cache.record_hit(entry)
+                self.logger.info("Response served from cache")
+                return entry.to_response()
+            
+            request_headers = self.cache.conditional_headers(entry, headers) if entry else headers
+            with phase("ttfb"):
+                response = self.send(method, api_url, request_headers, cancel_event, priority)
+            
+            if entry is not None and response.status_code == 304:
+                response.close()
+                self.cache.refresh(method, entry, response)
+                self.cache.record_hit(entry, revalidated=True)
+                self.logger.info("Response not modified, served from cache")
+                return entry.to_response()
+            
             response.raise_for_status()
+            
+            # Large bodies stay on the connection until the caller streams them
+            response.streamed = not self.read_body(response, cancel_event)
+            
+            if self.cache is not None:
+                self.cache.record_miss()
+                if not response.streamed:
+                    response.cache_entry = self.cache.build(method, api_url, headers, response)
+            
             self.logger.info(f"Request successful with status code: {response.status_code}")
             
             return response
@@ -54,16 +103,294 @@ class RequestHandler:
             self.logger.error(error_msg)
             raise
     
+    def send(self, method, url, headers, cancel_event=None, priority=PRIORITY_INTERACTIVE):
+        """Send a request through the host's circuit breaker and rate limiter, retrying idempotent methods
+
+        Connection errors, timeouts and RETRY_STATUS responses are retried
+        up to RETRY_ATTEMPTS times after a jittered exponential backoff, or
+        after the Retry-After pause the server asked for; the last response
+        is returned or the last error raised.
+        """
+        host = urlparse(url).netloc
+        idempotent = method.upper() in RETRY_METHODS
+        attempts = max(1, RETRY_ATTEMPTS) if idempotent else 1
+        
+        for attempt in range(attempts):
+            if not self.breaker.allow(host):
+                self.metrics.count(host, "circuit_rejected")
+                raise CircuitOpenError(f"Circuit open for {host}, failing fast after repeated failures")
+            if attempt:
+                self.metrics.count(host, "retries")
+            
+            # Every attempt spends a token, so retries never exceed the host's rate
+            with phase("queue"):
+                self.limiter.acquire(host, priority, cancel_event)
+            
+            retry_after = None
+            try:
+                response = self.attempt(method, url, headers, host, hedge=idempotent and self.hedge_pool is not None)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                self.record_attempt(host, False)
+                if attempt + 1 == attempts:
+                    raise
+                self.logger.warning(f"Attempt {attempt + 1} of {attempts} failed: {str(e)}")
+            else:
+                self.record_attempt(host, response.status_code < 500)
+                retry_after = self.record_rate(host, response)
+                if response.status_code not in RETRY_STATUS or attempt + 1 == attempts:
+                    return response
+                response.close()
+                self.logger.warning(f"Attempt {attempt + 1} of {attempts} returned {response.status_code}")
+            
+            # The limiter holds the host until Retry-After has passed
+            if retry_after is not None:
+                continue
+            with phase("backoff"):
+                delay = backoff_delay(attempt)
+                if cancel_event is not None:
+                    cancel_event.wait(delay)
+                else:
+                    time.sleep(delay)
+            check_cancelled(cancel_event)
+    
+    def record_attempt(self, host, success):
+        """Feed the outcome of an attempt to the circuit breaker"""
+        if self.breaker.record(host, success):
+            self.metrics.count(host, "circuit_opened")
+            self.logger.warning(f"Circuit opened for {host}, failing fast for {self.breaker.reset_timeout} s")
+    
+    def record_rate(self, host, response):
+        """Adapt the host's rate limit to a response, returning its Retry-After pause"""
+        status = response.status_code
+        retry_after = parse_retry_after(response.headers.get("Retry-After")) if status in (429, 503) else None
+        if status == 429:
+            self.metrics.count(host, "rate_limited")
+        if status == 429 or retry_after is not None:
+            self.limiter.penalize(host, retry_after)
+            self.logger.warning(
+                f"{host} asked to slow down, pausing {retry_after:.1f} s" if retry_after is not None
+                else f"{host} asked to slow down, lowering its rate"
+            )
+        elif status < 400:
+            self.limiter.record_success(host)
+        return retry_after
+    
+    def attempt(self, method, url, headers, host, hedge=False):
+        """Send one attempt, with a hedged duplicate if it is slower than usual for its host
+
+        The duplicate goes out once the attempt takes longer than the host's
+        HEDGE_PERCENTILE time to first byte; the first response wins and the
+        other is closed when it arrives. Hedged attempts time their
+        connection setup apart and only the winner's adds to the request.
+        """
+        session = self.sessions.get(url)
+        
+        def send_once():
+            return session.request(
+                method,
+                url,
+                headers=headers,
+                timeout=(REQUEST_CONNECT_TIMEOUT, REQUEST_READ_TIMEOUT),
+                stream=True
+            )
+        
+        delay = self.metrics.percentile(host, "ttfb", HEDGE_PERCENTILE, HEDGE_MIN_SAMPLES) if hedge else None
+        if delay is None:
+            return send_once()
+        
+        timing = current_timing()
+        
+        def send_hedged():
+            if timing is None:
+                return send_once()
+            attempt_timing = RequestTiming(host)
+            response = timed_call(attempt_timing, send_once)
+            response.timing = attempt_timing
+            return response
+        
+        def result(future):
+            response = future.result()
+            if timing is not None:
+                timing.merge(response.timing)
+            return response
+        
+        first = self.hedge_pool.submit(send_hedged)
+        done, _ = wait([first], timeout=max(HEDGE_MIN_DELAY, delay))
+        if done:
+            return result(first)
+        
+        # A duplicate is only sent when the host's rate allows it right away
+        if not self.limiter.try_acquire(host):
+            return result(first)
+        self.metrics.count(host, "hedges")
+        second = self.hedge_pool.submit(send_hedged)
+        pending = {first, second}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is not None:
+                    error = future.exception()
+                    continue
+                # Whatever else completes is not needed
+                for other in done | pending:
+                    if other is not future:
+                        other.add_done_callback(close_response)
+                if future is second:
+                    self.metrics.count(host, "hedge_wins")
+                return result(future)
+        raise error
+    
+    def read_body(self, response, cancel_event=None, limit=STREAM_THRESHOLD):
+        """Read a response body of up to limit bytes in chunks, checking for cancellation
+
+        Returns False, leaving the rest of the body unread, when it is
+        larger than limit; the chunks read so far are kept for iter_body.
+        """
+        content_length = response.headers.get("Content-Length", "")
+        if content_length.isdigit() and int(content_length) > limit:
+            return False
+        
+        chunks = []
+        size = 0
+        chunk_iter = timed_chunks(response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE))
+        try:
+            for chunk in chunk_iter:
+                check_cancelled(cancel_event)
+                chunks.append(chunk)
+                size += len(chunk)
+                if size > limit:
+                    response.body_prefix = chunks
+                    response.body_chunks = chunk_iter
+                    return False
+        except BaseException:
+            response.close()
+            raise
+        response.close()
+        response._content = b"".join(chunks)
+        return True
+    
+    def iter_body(self, response, cancel_event=None, on_progress=None):
+        """Yield the body of a streamed response in chunks, validating it as JSON
+        
+        on_progress(received, total) is called after every chunk; total is
+        None when the server did not send an uncompressed Content-Length.
+        """
+        content_length = response.headers.get("Content-Length", "")
+        compressed = "Content-Encoding" in response.headers
+        total = int(content_length) if content_length.isdigit() and not compressed else None
+        
+        chunks = itertools.chain(
+            getattr(response, "body_prefix", ()),
+            getattr(response, "body_chunks", None)
+            or timed_chunks(response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE))
+        )
+        response.body_prefix = ()
+        response.received = 0
+        scanner = JSONScanner()
+        try:
+            for chunk in chunks:
+                check_cancelled(cancel_event)
+                with phase("parse"):
+                    scanner.feed(chunk)
+                response.received += len(chunk)
+                if on_progress:
+                    on_progress(response.received, total)
+                yield chunk
+            scanner.close()
+            if scanner.is_empty():
+                raise ValueError("Empty response received")
+        finally:
+            response.close()
+        response.summary = scanner.summary()
+        self.logger.info(f"Streamed {response.received} bytes to disk")
+    
+    @contextmanager
+    def track(self, url):
+        """Time the phases of one request made on this thread and log them"""
+        try:
+            with self.metrics.track(url) as timing:
+                yield timing
+        finally:
+            self.logger.info(f"Timing {timing.describe()}")
+    
+    def commit_cache(self, response):
+        """Cache a fetched response after it has been validated and saved
+
+        Until then a later 304 or fresh hit must not report it as saved.
+        """
+        entry = getattr(response, 'cache_entry', None)
+        if self.cache is not None and entry is not None and not getattr(response, 'from_cache', False):
+            self.cache.commit(response.request.method, entry)
+    
+    def cache_stats(self):
+        """Return cache hit, miss and revalidation counters"""
+        return self.cache.stats() if self.cache else None
+    
+    def connection_stats(self):
+        """Return per-host connection reuse counters"""
+        return self.sessions.stats()
+    
+    def rate_limit_stats(self):
+        """Return the current rate, waiting requests and pause of limited hosts"""
+        return self.limiter.stats()
+    
+    def resilience_stats(self):
+        """Return per-host retry, hedge and circuit breaker counters and open circuits"""
+        events = {host: stats['events'] for host, stats in self.metrics.snapshot().items() if stats['events']}
+        return {'events': events, 'circuits': self.breaker.states()}
+    
+    def close(self):
+        """Close pooled connections"""
+        if self.hedge_pool is not None:
+            self.hedge_pool.shutdown(wait=False, cancel_futures=True)
+        self.sessions.close()
+    
     def validate_response(self, response):
         """Validate response and return JSON data"""
+        # Cached responses keep the data parsed the first time
+        entry = getattr(response, 'cache_entry', None)
+        if entry is not None and entry.data is not None:
+            return entry.data
+        
         try:
-            response_data = response.json()
+            with phase("parse"):
+                response_data = json_backend.loads(response.content)
             if not response_data:
                 raise ValueError("Empty response received")
             self.logger.info("Successfully parsed JSON response")
+            if entry is not None:
+                entry.data = response_data
             return response_data
             
         except json.JSONDecodeError as e:
             error_msg = f"Invalid JSON response: {str(e)}"
             self.logger.error(error_msg)
-            raise 
\ No newline at end of file
+            raise 
+    
+    def summarize_response(self, response):
+        """Validate a response body without parsing it and return its summary"""
+        # Cached responses keep the summary made the first time
+        entry = getattr(response, 'cache_entry', None)
+        if entry is not None and entry.summary is not None:
+            return entry.summary
+        
+        try:
+            with phase("parse"):
+                scanner = scan(response.content)
+        except JSONStreamError as e:
+            self.logger.error(f"Invalid JSON response: {str(e)}")
+            raise
+        # Rejected like the parsed path does with `not response_data`
+        if scanner.is_empty():
+            raise ValueError("Empty response received")
+        summary = scanner.summary()
+        self.logger.info("Successfully validated JSON response")
+        if entry is not None:
+            entry.summary = summary
+        return summary
+
+def close_response(future):
+    """Close the response of a finished request that lost a hedge race"""
+    if not future.cancelled() and future.exception() is None:
+        future.result().close()
\ No newline at end of file
@@ -0,0 +1,313 @@
+import csv
+import io
+import json
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+PHASES = ("queue", "dns", "connect", "tls", "backoff", "ttfb", "download", "parse", "save", "total")
+PERCENTILES = (50, 95, 99)
+
+# Log-spaced buckets from 0.1 ms, each 10% wider than the previous one,
+# so percentiles are within 10% of the exact value up to about 18 minutes
+BUCKET_START = 0.0001
+BUCKET_RATIO = 1.1
+BUCKET_COUNT = 160
+
+_local = threading.local()
+
+class RequestTiming:
+    """Phase durations of one request, collected on the thread running it"""
+
+    __slots__ = ("host", "phases", "bytes", "nested", "started", "failed")
+
+    def __init__(self, host):
+        self.host = host
+        self.phases = {}
+        self.bytes = 0
+        self.failed = False
+        self.nested = 0.0  # seconds added to any phase so far
+        self.started = time.perf_counter()
+
+    def add(self, phase, seconds):
+        """Add time spent in a phase"""
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+        self.nested += seconds
+
+    def merge(self, other):
+        """Add the phases of a timing collected on another thread"""
+        for phase, seconds in other.phases.items():
+            self.add(phase, seconds)
+        self.bytes += other.bytes
+
+    def describe(self):
+        """Return a one line summary of the phases in milliseconds"""
+        parts = [f"{phase} {self.phases[phase] * 1000:.1f} ms" for phase in PHASES if phase in self.phases]
+        return f"{self.host}: {', '.join(parts)}, {self.bytes} bytes"
+
+def current_timing():
+    """Return the timing of the request running on this thread, or None"""
+    return getattr(_local, "timing", None)
+
+def timed_call(timing, func, *args):
+    """Call func with the phases it records added to timing, e.g. on a pool thread"""
+    previous = current_timing()
+    _local.timing = timing
+    try:
+        return func(*args)
+    finally:
+        _local.timing = previous
+
+@contextmanager
+def phase(name):
+    """Time a block as a phase of the request running on this thread
+
+    Time recorded by phases nested in the block is left out, so a phase
+    that happens to open a connection does not also count it.
+    """
+    timing = current_timing()
+    if timing is None:
+        yield
+        return
+    started = time.perf_counter()
+    nested = timing.nested
+    try:
+        yield
+    finally:
+        timing.add(name, time.perf_counter() - started - (timing.nested - nested))
+
+def timed_chunks(chunks, name="download"):
+    """Yield body chunks, timing only the waits for them and counting their bytes
+
+    The time the consumer spends between chunks, e.g. writing them to disk,
+    is not part of the phase.
+    """
+    timing = current_timing()
+    if timing is None:
+        yield from chunks
+        return
+    chunks = iter(chunks)
+    while True:
+        started = time.perf_counter()
+        chunk = next(chunks, None)
+        timing.add(name, time.perf_counter() - started)
+        if chunk is None:
+            return
+        timing.bytes += len(chunk)
+        yield chunk
+
+class LatencyHistogram:
+    """Fixed memory latency histogram with approximate percentiles"""
+
+    __slots__ = ("counts", "count", "sum", "max")
+
+    def __init__(self):
+        self.counts = [0] * BUCKET_COUNT
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def add(self, seconds):
+        """Record one duration"""
+        if seconds <= BUCKET_START:
+            index = 0
+        else:
+            index = min(BUCKET_COUNT - 1, int(math.log(seconds / BUCKET_START, BUCKET_RATIO)) + 1)
+        self.counts[index] += 1
+        self.count += 1
+        self.sum += seconds
+        self.max = max(self.max, seconds)
+
+    def percentile(self, q):
+        """Return the upper bound of the bucket holding the q-th percentile"""
+        if not self.count:
+            return None
+        rank = max(1, math.ceil(q / 100 * self.count))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return min(self.max, BUCKET_START * BUCKET_RATIO ** index)
+        return self.max
+
+    def summary(self):
+        """Return count, mean, percentiles and max in seconds"""
+        summary = {'count': self.count, 'mean': self.sum / self.count if self.count else None}
+        for q in PERCENTILES:
+            summary[f'p{q}'] = self.percentile(q)
+        summary['max'] = self.max if self.count else None
+        return summary
+
+class HostMetrics:
+    """Counters and phase histograms of one host"""
+
+    __slots__ = ("requests", "errors", "bytes", "phases", "events")
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.bytes = 0
+        self.phases = {}
+        self.events = {}  # e.g. retries, hedges, circuit_opened
+
+class RequestMetrics:
+    """In-memory per-host latency histograms, byte counts and throughput
+
+    track(url) times one request on the calling thread; the phase() blocks
+    run inside it, down to the connection setup, add to its timing.
+    """
+
+    def __init__(self):
+        self._hosts = {}
+        self._lock = threading.Lock()
+        self.started = time.time()
+
+    @contextmanager
+    def track(self, url):
+        """Time one request on this thread and record it when the block ends"""
+        timing = RequestTiming(urlparse(url).netloc or url)
+        previous = current_timing()
+        _local.timing = timing
+        try:
+            yield timing
+        except BaseException:
+            timing.failed = True
+            raise
+        finally:
+            _local.timing = previous
+            timing.phases["total"] = time.perf_counter() - timing.started
+            self.record(timing)
+
+    def _host(self, name):
+        """Return the statistics of a host, the lock must be held"""
+        host = self._hosts.get(name)
+        if host is None:
+            host = self._hosts[name] = HostMetrics()
+        return host
+
+    def record(self, timing):
+        """Add a finished request to the statistics of its host"""
+        with self._lock:
+            host = self._host(timing.host)
+            host.requests += 1
+            host.errors += timing.failed
+            host.bytes += timing.bytes
+            for name, seconds in timing.phases.items():
+                histogram = host.phases.get(name)
+                if histogram is None:
+                    histogram = host.phases[name] = LatencyHistogram()
+                histogram.add(seconds)
+
+    def count(self, host, event, amount=1):
+        """Count an event of a host, like a retry or a hedged request"""
+        with self._lock:
+            events = self._host(host).events
+            events[event] = events.get(event, 0) + amount
+
+    def percentile(self, host, phase, q, min_count=1):
+        """Return a phase percentile of a host, None with fewer than min_count samples"""
+        with self._lock:
+            host = self._hosts.get(host)
+            histogram = host.phases.get(phase) if host else None
+            if histogram is None or histogram.count < min_count:
+                return None
+            return histogram.percentile(q)
+
+    def reset(self):
+        """Forget everything recorded so far"""
+        with self._lock:
+            self._hosts = {}
+            self.started = time.time()
+
+    def snapshot(self):
+        """Return {host: statistics} with phase latencies in seconds"""
+        with self._lock:
+            snapshot = {}
+            for name, host in sorted(self._hosts.items()):
+                download = host.phases.get("download")
+                download_time = download.sum if download else 0.0
+                snapshot[name] = {
+                    'requests': host.requests,
+                    'errors': host.errors,
+                    'bytes': host.bytes,
+                    'bytes_per_second': host.bytes / download_time if download_time else None,
+                    'phases': {
+                        phase: host.phases[phase].summary() for phase in PHASES if phase in host.phases
+                    },
+                    'events': dict(host.events),
+                }
+        return snapshot
+
+    def to_json(self):
+        """Return the snapshot as JSON text"""
+        return json.dumps({'started': self.started, 'hosts': self.snapshot()}, indent=2)
+
+    def to_csv(self):
+        """Return one CSV row per host and phase"""
+        output = io.StringIO()
+        writer = csv.writer(output, lineterminator="\n")
+        stats = ["count", "mean", "p50", "p95", "p99", "max"]
+        writer.writerow(["host", "phase"] + [f"{name}_s" if name != "count" else name for name in stats]
+                        + ["requests", "errors", "bytes", "bytes_per_second"])
+        for name, host in self.snapshot().items():
+            for phase_name, summary in host['phases'].items():
+                writer.writerow([name, phase_name] + [summary[stat] for stat in stats]
+                                + [host['requests'], host['errors'], host['bytes'], host['bytes_per_second']])
+        return output.getvalue()
+
+    def to_prometheus(self):
+        """Return the snapshot in the Prometheus text exposition format"""
+        snapshot = self.snapshot()
+        lines = [
+            "# HELP urlparser_request_phase_seconds Duration of request phases per host",
+            "# TYPE urlparser_request_phase_seconds summary",
+        ]
+        for name, host in snapshot.items():
+            for phase_name, summary in host['phases'].items():
+                labels = f'host="{_escape(name)}",phase="{phase_name}"'
+                for q in PERCENTILES:
+                    lines.append(f'urlparser_request_phase_seconds{{{labels},quantile="{q / 100}"}} {summary[f"p{q}"]}')
+                lines.append(f"urlparser_request_phase_seconds_sum{{{labels}}} {summary['mean'] * summary['count']}")
+                lines.append(f"urlparser_request_phase_seconds_count{{{labels}}} {summary['count']}")
+
+        counters = (
+            ("requests", "urlparser_requests_total", "Requests made per host"),
+            ("errors", "urlparser_request_errors_total", "Failed requests per host"),
+            ("bytes", "urlparser_response_bytes_total", "Response body bytes received per host"),
+        )
+        for key, metric, help_text in counters:
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} counter")
+            for name, host in snapshot.items():
+                lines.append(f'{metric}{{host="{_escape(name)}"}} {host[key]}')
+
+        lines.append("# HELP urlparser_request_events_total Retries, hedged requests and circuit breaker events per host")
+        lines.append("# TYPE urlparser_request_events_total counter")
+        for name, host in snapshot.items():
+            for event, count in sorted(host['events'].items()):
+                lines.append(f'urlparser_request_events_total{{host="{_escape(name)}",event="{event}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+    def export(self, path, format=None):
+        """Write the statistics to a file as json, csv or prometheus text
+
+        The format defaults to the file extension; the file is replaced
+        atomically so collectors never read it half written.
+        """
+        if format is None:
+            extension = os.path.splitext(path)[1].lower()
+            format = {".json": "json", ".csv": "csv"}.get(extension, "prometheus")
+        content = {"json": self.to_json, "csv": self.to_csv, "prometheus": self.to_prometheus}[format]()
+
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, "w", encoding="utf-8", newline="") as f:
+            f.write(content)
+        os.replace(temp_path, path)
+        return format
+
+def _escape(value):
+    """Escape a Prometheus label value"""
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
\ No newline at end of file
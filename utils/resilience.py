@@ -0,0 +1,65 @@
+import random
+import threading
+import time
+import requests
+from config.settings import RETRY_BACKOFF, RETRY_BACKOFF_MAX, BREAKER_FAILURES, BREAKER_RESET
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """Raised instead of sending a request to a host whose circuit is open"""
+
+def backoff_delay(attempt, base=RETRY_BACKOFF, maximum=RETRY_BACKOFF_MAX):
+    """Return a full-jitter exponential backoff before retry number attempt + 1"""
+    return random.uniform(0, min(maximum, base * 2 ** attempt))
+
+class CircuitBreaker:
+    """Per-host circuit breaker that fails fast while a host is down
+
+    After failures consecutive failed attempts a host's circuit opens and
+    requests to it are refused. Once every reset_timeout seconds one trial
+    request is let through; a success closes the circuit again.
+    """
+
+    def __init__(self, failures=BREAKER_FAILURES, reset_timeout=BREAKER_RESET):
+        self.failures = failures
+        self.reset_timeout = reset_timeout
+        self._hosts = {}  # host: [consecutive failures, time the circuit opened or None]
+        self._lock = threading.Lock()
+
+    def allow(self, host):
+        """Return whether a request to a host may be sent now"""
+        with self._lock:
+            state = self._hosts.get(host)
+            if state is None or state[1] is None:
+                return True
+            now = time.monotonic()
+            if now - state[1] < self.reset_timeout:
+                return False
+            # Let this request through as the trial, the others keep failing fast
+            state[1] = now
+            return True
+
+    def record(self, host, success):
+        """Record the outcome of an attempt, returning True when it opened the circuit"""
+        if not self.failures:
+            return False
+        with self._lock:
+            state = self._hosts.setdefault(host, [0, None])
+            if success:
+                state[0] = 0
+                state[1] = None
+                return False
+            state[0] += 1
+            if state[0] < self.failures:
+                return False
+            opened = state[1] is None
+            state[1] = time.monotonic()
+            return opened
+
+    def states(self):
+        """Return {host: "open" or "closed"} for hosts with recent failures"""
+        with self._lock:
+            return {
+                host: "open" if opened is not None else "closed"
+                for host, (failures, opened) in self._hosts.items()
+                if failures
+            }
\ No newline at end of file
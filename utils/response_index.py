@@ -0,0 +1,276 @@
+import json
+import os
+import sqlite3
+import threading
+from config.settings import DATA_DIR
+
+class ResponseRecord:
+    """Lightweight metadata of a saved response, without its body"""
+
+    __slots__ = ("filepath", "domain", "path", "timestamp", "size", "status", "hash", "mtime", "summary")
+
+    def __init__(self, filepath, domain, path, timestamp, size, status=None, hash=None, mtime=None, summary=None):
+        self.filepath = filepath
+        self.domain = domain
+        self.path = path
+        self.timestamp = timestamp
+        self.size = size
+        self.status = status
+        self.hash = hash
+        self.mtime = mtime
+        self.summary = summary
+
+    def to_dict(self):
+        """Return the record as a plain dict"""
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self):
+        return f"ResponseRecord({self.filepath!r}, {self.timestamp!r})"
+
+class ResponseIndex:
+    """SQLite backed metadata index for saved responses"""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS responses (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            filepath TEXT NOT NULL UNIQUE,
+            domain TEXT NOT NULL,
+            path TEXT NOT NULL,
+            timestamp TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            status INTEGER,
+            hash TEXT,
+            mtime REAL,
+            summary TEXT
+        );
+        CREATE INDEX IF NOT EXISTS idx_responses_timestamp ON responses (timestamp);
+        CREATE INDEX IF NOT EXISTS idx_responses_domain ON responses (domain, timestamp);
+        CREATE INDEX IF NOT EXISTS idx_responses_location ON responses (domain, path, timestamp);
+        CREATE INDEX IF NOT EXISTS idx_responses_hash ON responses (hash);
+        CREATE TABLE IF NOT EXISTS directories (
+            path TEXT PRIMARY KEY,
+            mtime REAL NOT NULL
+        );
+    """
+
+    COLUMNS = ("filepath", "domain", "path", "timestamp", "size", "status", "hash", "mtime", "summary")
+
+    SORT_COLUMNS = {
+        "timestamp": ("timestamp", "id"),
+        "location": ("domain", "path", "timestamp", "id"),
+    }
+
+    def __init__(self, index_file, data_dir=DATA_DIR):
+        self.index_file = index_file
+        self.data_dir = data_dir
+        self.created = not os.path.exists(index_file)
+        self._lock = threading.Lock()
+
+        self._conn = sqlite3.connect(index_file, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(self.SCHEMA)
+        self._upgrade()
+        self._conn.commit()
+
+    def _upgrade(self):
+        """Add columns introduced after an index file was created"""
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(responses)")}
+        if "summary" not in columns:
+            self._conn.execute("ALTER TABLE responses ADD COLUMN summary TEXT")
+
+    def _relative(self, filepath):
+        """Store paths relative to the data directory so the store can move"""
+        return os.path.relpath(filepath, self.data_dir)
+
+    def _row_to_record(self, row):
+        """Convert a database row to a response record"""
+        summary = json.loads(row[8]) if row[8] else None
+        return ResponseRecord(os.path.join(self.data_dir, row[0]), *row[1:8], summary)
+
+    def add(self, filepath, domain, path, timestamp, size, status=None, hash=None, mtime=None, summary=None):
+        """Add or replace the metadata of a saved response"""
+        self.add_many([(filepath, domain, path, timestamp, size, status, hash, mtime, summary)])
+
+    def add_many(self, records):
+        """Add or replace several metadata records in one transaction
+
+        Records have the fields of COLUMNS; status and summary may be left
+        out, which keeps the values already indexed for the file.
+        """
+        rows = []
+        for record in records:
+            record = tuple(record) + (None,) * (len(self.COLUMNS) - len(record))
+            summary = json.dumps(record[8]) if record[8] is not None else None
+            rows.append((self._relative(record[0]),) + record[1:8] + (summary,))
+        with self._lock, self._conn:
+            # A rescanned file keeps its id, the status it was saved with and its summary
+            self._conn.executemany(
+                f"INSERT INTO responses ({', '.join(self.COLUMNS)}) "
+                f"VALUES ({', '.join('?' * len(self.COLUMNS))}) "
+                "ON CONFLICT (filepath) DO UPDATE SET "
+                "domain = excluded.domain, path = excluded.path, timestamp = excluded.timestamp, "
+                "size = excluded.size, status = COALESCE(excluded.status, status), "
+                "hash = excluded.hash, mtime = excluded.mtime, "
+                "summary = COALESCE(excluded.summary, summary)",
+                rows
+            )
+
+    def set_summaries(self, summaries):
+        """Store the summaries of indexed responses given as {filepath: summary}"""
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "UPDATE responses SET summary = ? WHERE filepath = ?",
+                [(json.dumps(summary), self._relative(filepath)) for filepath, summary in summaries.items()]
+            )
+
+    def missing_summaries(self):
+        """Return the filepaths of indexed responses without a summary"""
+        with self._lock:
+            rows = self._conn.execute("SELECT filepath FROM responses WHERE summary IS NULL").fetchall()
+        return [os.path.join(self.data_dir, row[0]) for row in rows]
+
+    def remove(self, filepaths):
+        """Remove metadata records for the given files"""
+        rows = [(self._relative(filepath),) for filepath in filepaths]
+        with self._lock, self._conn:
+            self._conn.executemany("DELETE FROM responses WHERE filepath = ?", rows)
+
+    def remove_location(self, domain, path):
+        """Remove metadata records of every response saved under a location"""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM responses WHERE domain = ? AND path = ?", (domain, path))
+
+    def clear(self):
+        """Remove every metadata record"""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.execute("DELETE FROM directories")
+
+    def query(self, offset=0, limit=None, order="desc", domain=None, sort="timestamp"):
+        """Return response records ordered by timestamp or location"""
+        direction = "ASC" if order == "asc" else "DESC"
+        sql = f"SELECT {', '.join(self.COLUMNS)} FROM responses"
+        params = []
+        if domain:
+            sql += " WHERE domain = ?"
+            params.append(domain)
+        order_by = ', '.join(f"{column} {direction}" for column in self.SORT_COLUMNS[sort])
+        sql += f" ORDER BY {order_by} LIMIT ? OFFSET ?"
+        params.extend([limit if limit is not None else -1, offset])
+
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [self._row_to_record(row) for row in rows]
+
+    def get(self, filepath):
+        """Return the record of one response, or None when it is not indexed"""
+        sql = f"SELECT {', '.join(self.COLUMNS)} FROM responses WHERE filepath = ?"
+        with self._lock:
+            row = self._conn.execute(sql, (self._relative(filepath),)).fetchone()
+        return self._row_to_record(row) if row else None
+
+    def get_many(self, filepaths):
+        """Return the records of several responses, skipping those not indexed"""
+        records = []
+        relatives = [self._relative(filepath) for filepath in filepaths]
+        with self._lock:
+            # Stay well below the SQLite limit of bound parameters
+            for start in range(0, len(relatives), 500):
+                chunk = relatives[start:start + 500]
+                sql = (
+                    f"SELECT {', '.join(self.COLUMNS)} FROM responses "
+                    f"WHERE filepath IN ({', '.join('?' * len(chunk))})"
+                )
+                records.extend(self._row_to_record(row) for row in self._conn.execute(sql, chunk))
+        return records
+
+    def count(self, domain=None):
+        """Return the number of indexed responses"""
+        sql = "SELECT COUNT(*) FROM responses"
+        params = []
+        if domain:
+            sql += " WHERE domain = ?"
+            params.append(domain)
+        with self._lock:
+            return self._conn.execute(sql, params).fetchone()[0]
+
+    def query_since(self, last_id):
+        """Return (records, last_id) for responses indexed after the given id"""
+        sql = f"SELECT {', '.join(self.COLUMNS)}, id FROM responses WHERE id > ? ORDER BY id"
+        with self._lock:
+            rows = self._conn.execute(sql, (last_id,)).fetchall()
+        if not rows:
+            return [], last_id
+        return [self._row_to_record(row[:-1]) for row in rows], rows[-1][-1]
+
+    def last_id(self):
+        """Return the id of the most recently indexed response"""
+        with self._lock:
+            return self._conn.execute("SELECT COALESCE(MAX(id), 0) FROM responses").fetchone()[0]
+
+    def has_hash(self, digest):
+        """Check whether any indexed response has the given body hash"""
+        with self._lock:
+            row = self._conn.execute("SELECT 1 FROM responses WHERE hash = ? LIMIT 1", (digest,)).fetchone()
+        return row is not None
+
+    def set_sizes_by_hash(self, sizes):
+        """Update the stored size of every response with a given body hash"""
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "UPDATE responses SET size = ? WHERE hash = ?",
+                [(size, digest) for digest, size in sizes.items()]
+            )
+
+    def set_sizes(self, sizes):
+        """Update the stored size of responses by filepath"""
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "UPDATE responses SET size = ? WHERE filepath = ?",
+                [(size, self._relative(filepath)) for filepath, size in sizes.items()]
+            )
+
+    def snapshot(self, domain=None, path=None):
+        """Return {filepath: mtime} for indexed responses, optionally of one location"""
+        sql = "SELECT filepath, mtime FROM responses"
+        params = ()
+        if domain is not None:
+            sql += " WHERE domain = ? AND path = ?"
+            params = (domain, path)
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return {
+            os.path.join(self.data_dir, filepath): mtime
+            for filepath, mtime in rows
+        }
+
+    def directory_mtimes(self):
+        """Return {directory: mtime} recorded at the last scan"""
+        with self._lock:
+            return dict(self._conn.execute("SELECT path, mtime FROM directories").fetchall())
+
+    def set_directory_mtimes(self, mtimes, removed=()):
+        """Record directory mtimes after a scan and forget removed directories"""
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO directories (path, mtime) VALUES (?, ?)",
+                mtimes.items()
+            )
+            self._conn.executemany(
+                "DELETE FROM directories WHERE path = ?",
+                [(path,) for path in removed]
+            )
+
+    def advance_directory_mtime(self, path, previous, mtime):
+        """Record a directory's new mtime, only if it was last recorded as previous"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE directories SET mtime = ? WHERE path = ? AND mtime = ?",
+                (mtime, path, previous)
+            )
+
+    def close(self):
+        """Close the database connection"""
+        with self._lock:
+            self._conn.close()
\ No newline at end of file
@@ -0,0 +1,305 @@
+import atexit
+import os
+import queue
+import re
+import sqlite3
+import threading
+from config.settings import (
+    DATA_DIR, SEARCH_MAX_BODY_BYTES, SEARCH_MAX_TERMS, SEARCH_RESULT_LIMIT, SEARCH_INDEX_BATCH, SEARCH_QUEUE_SIZE
+)
+from utils import json_backend
+
+WORD = re.compile(r"\w+")
+MAX_WORD_LENGTH = 64
+MAX_VALUE_LENGTH = 256  # longer strings are only searchable by their words
+
+# path = value, path = "quoted value", or a bare word
+QUERY_TOKEN = re.compile(
+    r'(?P<path>[^\s="]+)\s*=\s*(?P<value>"(?:[^"\\]|\\.)*"|\S+)'
+    r'|"(?P<phrase>[^"]*)"?'
+    r'|(?P<word>\S+)'
+)
+
+# Upper bound for prefix ranges over the term column
+PREFIX_END = "\U0010ffff"
+MAX_PREFIX_TERMS = 500  # terms a prefix expands to
+ESTIMATE_LIMIT = 20000  # postings counted when choosing the rarest condition
+
+def scalar_text(value):
+    """Return the text a scalar is indexed and queried as"""
+    if isinstance(value, str):
+        return value
+    return json_backend.dumps(value).decode("utf-8")
+
+def extract_terms(data, max_terms=SEARCH_MAX_TERMS):
+    """Return the search terms of a parsed JSON document
+
+    Terms are "p:<path>" for every key path, "v:<path>=<value>" for every
+    scalar and "w:<word>" for the lowercase words of scalar values. Array
+    items share the path of their array with [] appended, e.g. items[].id.
+    """
+    terms = set()
+    stack = [("", data)]
+    while stack and len(terms) < max_terms:
+        path, value = stack.pop()
+        if isinstance(value, dict):
+            if path:
+                terms.add(f"p:{path}")
+            stack.extend((f"{path}.{key}" if path else key, item) for key, item in value.items())
+        elif isinstance(value, list):
+            terms.add(f"p:{path}[]")
+            stack.extend((f"{path}[]", item) for item in value)
+        else:
+            text = scalar_text(value)
+            terms.add(f"p:{path}")
+            if len(text) <= MAX_VALUE_LENGTH:
+                terms.add(f"v:{path}={text}")
+            words = WORD.findall(text[:4096].lower())
+            terms.update(f"w:{word}" for word in words if len(word) <= MAX_WORD_LENGTH)
+    return terms
+
+def body_terms(body):
+    """Return the sorted search terms of a response body, None when it cannot be indexed"""
+    if body is None or len(body) > SEARCH_MAX_BODY_BYTES:
+        return None
+    try:
+        data = json_backend.loads(body)
+    except ValueError:
+        return None
+    return sorted(extract_terms(data))
+
+def parse_query(query):
+    """Return the (term, prefix) conditions of a query, all of which must match
+
+    "items[].id = 123" matches a value at a key path, "items[].id = *" any
+    value there, and bare words match words of any value. A trailing *
+    turns a value or word into a prefix.
+    """
+    conditions = []
+    for match in QUERY_TOKEN.finditer(query):
+        if match.group("path"):
+            path, value = match.group("path"), match.group("value")
+            if value == "*":
+                conditions.append((f"p:{path}", False))
+                continue
+            prefix = value.endswith("*") and not value.endswith('"')
+            if prefix:
+                value = value[:-1]
+            if value.startswith('"'):
+                value = json_backend.loads(value)
+            conditions.append((f"v:{path}={value}", prefix))
+        else:
+            text = match.group("phrase") if match.group("phrase") is not None else match.group("word")
+            prefix = text.endswith("*")
+            words = WORD.findall(text.lower())
+            conditions.extend((f"w:{word}", prefix and i == len(words) - 1) for i, word in enumerate(words))
+    return conditions
+
+class SearchIndex:
+    """SQLite inverted index from JSON values and key paths to saved responses"""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS documents (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            filepath TEXT NOT NULL UNIQUE
+        );
+        CREATE TABLE IF NOT EXISTS terms (
+            id INTEGER PRIMARY KEY,
+            term TEXT NOT NULL UNIQUE
+        );
+        CREATE TABLE IF NOT EXISTS postings (
+            term INTEGER NOT NULL,
+            document INTEGER NOT NULL,
+            PRIMARY KEY (term, document)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS idx_postings_document ON postings (document);
+    """
+
+    def __init__(self, index_file, data_dir=DATA_DIR):
+        self.index_file = index_file
+        self.data_dir = data_dir
+        self.created = not os.path.exists(index_file)
+        self._lock = threading.Lock()
+
+        self._conn = sqlite3.connect(index_file, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(self.SCHEMA)
+        self._conn.commit()
+
+    def _relative(self, filepath):
+        """Store paths relative to the data directory so the store can move"""
+        return os.path.relpath(filepath, self.data_dir)
+
+    def add(self, filepath, terms):
+        """Index the terms of one response"""
+        self.add_many([(filepath, terms)])
+
+    def add_many(self, documents):
+        """Index several (filepath, terms) documents in one transaction, replacing earlier terms"""
+        with self._lock, self._conn:
+            for filepath, terms in documents:
+                relative = self._relative(filepath)
+                self._remove(relative)
+                document = self._conn.execute(
+                    "INSERT INTO documents (filepath) VALUES (?)", (relative,)
+                ).lastrowid
+                self._conn.executemany("INSERT OR IGNORE INTO terms (term) VALUES (?)", ((term,) for term in terms))
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO postings (term, document) SELECT id, ? FROM terms WHERE term = ?",
+                    ((document, term) for term in terms)
+                )
+
+    def _remove(self, relative):
+        """Drop the postings of one document, the lock must be held"""
+        row = self._conn.execute("SELECT id FROM documents WHERE filepath = ?", (relative,)).fetchone()
+        if row:
+            self._conn.execute("DELETE FROM postings WHERE document = ?", row)
+            self._conn.execute("DELETE FROM documents WHERE id = ?", row)
+
+    def remove(self, filepaths):
+        """Forget the terms of responses that no longer exist"""
+        with self._lock, self._conn:
+            for filepath in filepaths:
+                self._remove(self._relative(filepath))
+
+    def clear(self):
+        """Remove every indexed term"""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM postings")
+            self._conn.execute("DELETE FROM terms")
+            self._conn.execute("DELETE FROM documents")
+
+    def count(self):
+        """Return the number of indexed responses"""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+
+    def search(self, query, limit=SEARCH_RESULT_LIMIT):
+        """Return the filepaths of responses matching every condition of a query, newest first"""
+        conditions = parse_query(query)
+        if not conditions:
+            return []
+
+        with self._lock:
+            matches = []
+            for term, prefix in conditions:
+                term_ids = self._term_ids(term, prefix)
+                if not term_ids:
+                    return []
+                matches.append(term_ids)
+
+            # The rarest condition is walked in document order, newest first,
+            # and the others are probed per document, so LIMIT stops early
+            matches.sort(key=self._estimate)
+            driver, *others = matches
+            sql = (
+                "SELECT d.filepath FROM postings p JOIN documents d ON d.id = p.document "
+                f"WHERE p.term IN ({', '.join('?' * len(driver))})"
+            )
+            params = list(driver)
+            for term_ids in others:
+                sql += (
+                    " AND EXISTS (SELECT 1 FROM postings WHERE document = p.document "
+                    f"AND term IN ({', '.join('?' * len(term_ids))}))"
+                )
+                params.extend(term_ids)
+            if len(driver) > 1:
+                sql += " GROUP BY p.document"
+            sql += " ORDER BY p.document DESC LIMIT ?"
+            params.append(limit)
+            rows = self._conn.execute(sql, params).fetchall()
+        return [os.path.join(self.data_dir, row[0]) for row in rows]
+
+    def _term_ids(self, term, prefix):
+        """Return the ids of a term, or of the terms starting with it"""
+        if prefix:
+            rows = self._conn.execute(
+                "SELECT id FROM terms WHERE term >= ? AND term < ? LIMIT ?",
+                (term, term + PREFIX_END, MAX_PREFIX_TERMS)
+            )
+        else:
+            rows = self._conn.execute("SELECT id FROM terms WHERE term = ?", (term,))
+        return [row[0] for row in rows]
+
+    def _estimate(self, term_ids):
+        """Return how many responses match some terms, counted up to a bound"""
+        return self._conn.execute(
+            "SELECT COUNT(*) FROM (SELECT 1 FROM postings "
+            f"WHERE term IN ({', '.join('?' * len(term_ids))}) LIMIT {ESTIMATE_LIMIT})",
+            term_ids
+        ).fetchone()[0]
+
+    def close(self):
+        """Close the database connection"""
+        with self._lock:
+            self._conn.close()
+
+class SearchIndexer:
+    """Index saved responses on a background thread, in batches
+
+    Writers hand over (filepath, body) and return at once; a body of None
+    is read back with read_body. Parsing and inserting happen on the
+    indexer thread, up to batch_size responses per transaction.
+    """
+
+    _shared = {}  # index file: indexer, one thread per index in a process
+    _shared_lock = threading.Lock()
+
+    @classmethod
+    def shared(cls, search, read_body):
+        """Return the indexer of a search index file, starting it on first use"""
+        with cls._shared_lock:
+            indexer = cls._shared.get(search.index_file)
+            if indexer is None:
+                indexer = cls._shared[search.index_file] = cls(search, read_body)
+            return indexer
+
+    def __init__(self, search, read_body, batch_size=SEARCH_INDEX_BATCH, queue_size=SEARCH_QUEUE_SIZE):
+        self.search = search
+        self.read_body = read_body
+        self.batch_size = batch_size
+        self._queue = queue.Queue(queue_size)
+        self._thread = threading.Thread(target=self._run, name="search-indexer", daemon=True)
+        self._thread.start()
+        # Responses saved just before exit are still indexed
+        atexit.register(self.flush)
+
+    def put(self, filepath, body=None):
+        """Queue a saved response for indexing"""
+        self._queue.put((filepath, body))
+
+    def flush(self):
+        """Wait until every queued response is indexed"""
+        self._queue.join()
+
+    def _run(self):
+        """Index queued responses until the process exits"""
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._index(batch)
+            except Exception:
+                # The search index can be rebuilt, saving must not depend on it
+                pass
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _index(self, batch):
+        """Parse a batch of responses and store their terms in one transaction"""
+        documents = []
+        for filepath, body in batch:
+            # A body that cannot be read or parsed, e.g. nested too deep, is skipped
+            try:
+                terms = body_terms(self.read_body(filepath) if body is None else body)
+            except Exception:
+                continue
+            if terms is not None:
+                documents.append((filepath, terms))
+        self.search.add_many(documents)
\ No newline at end of file
@@ -0,0 +1,440 @@
+import mmap
+import os
+import shutil
+import struct
+import threading
+import time
+from contextlib import contextmanager
+from config.settings import SEGMENT_DIR, SEGMENT_MAX_BYTES
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+# Every record carries its key and save time so a segment describes itself
+RECORD_HEADER = struct.Struct("<4sIdI")  # magic, key length, save time, body length
+RECORD_MAGIC = b"SEG1"
+
+# Offset table entry of a record: segment number, body offset, body length, save time
+ENTRY = struct.Struct("<IQId")
+REMOVED = 0xFFFFFFFF  # body length of a removed record
+
+OFFSETS_FILE = "offsets.idx"
+KEYS_FILE = "keys.lst"
+COPY_CHUNK_SIZE = 1024 * 1024
+
+class SegmentStoreBusy(OSError):
+    """Raised when the segment store cannot be compacted while another process has it open"""
+
+def try_lock(f):
+    """Take an exclusive lock on an open file without waiting, return whether it was taken"""
+    try:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+        return True
+    except OSError:
+        return False
+
+@contextmanager
+def file_locked(f):
+    """Hold an exclusive lock on an open file, waiting for other processes to release it"""
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+    else:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+    try:
+        yield
+    finally:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+class RecordStat:
+    """The st_size and st_mtime of a stored record, like an os.stat_result"""
+    __slots__ = ("st_size", "st_mtime")
+
+    def __init__(self, st_size, st_mtime):
+        self.st_size = st_size
+        self.st_mtime = st_mtime
+
+class SegmentReader:
+    """Seekable binary reader over a record body inside a mapped segment"""
+
+    def __init__(self, view):
+        self.view = view
+        self.position = 0
+
+    def read(self, size=-1):
+        end = len(self.view) if size is None or size < 0 else min(len(self.view), self.position + size)
+        data = self.view[self.position:end].tobytes()
+        self.position = max(self.position, end)
+        return data
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        if whence == os.SEEK_CUR:
+            offset += self.position
+        elif whence == os.SEEK_END:
+            offset += len(self.view)
+        self.position = max(0, offset)
+        return self.position
+
+    def tell(self):
+        return self.position
+
+    def close(self):
+        self.view.release()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+class SegmentStore:
+    """Append-only storage of many captures in a few large segment files
+
+    Records are appended to the current segment until it reaches
+    SEGMENT_MAX_BYTES, then a new one is started. offsets.idx is a table
+    of fixed size entries, one per record in save order, and keys.lst
+    holds the key of each record on the matching line. The table and the
+    segments are read through mmap, so a body is sliced out of the page
+    cache without a file open per capture.
+
+    Threads of a process are serialized by a lock. Several processes, e.g.
+    the GUI and "main.py fetch", may write to the same store: every append
+    holds an exclusive lock on the lock file next to the directory and
+    first picks up the records and segments the other processes added.
+
+    Each open store also holds a lock on its own file in the users
+    directory next to the store. compact() refuses to run while another
+    process has one, so segments are never swapped out from under it.
+    """
+
+    def __init__(self, segment_dir=SEGMENT_DIR, max_bytes=SEGMENT_MAX_BYTES, lock=True):
+        self.segment_dir = segment_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(segment_dir, exist_ok=True)
+        self._lock_file = None
+        self._user_file = None
+        if lock:
+            self._lock_file = open(segment_dir + ".lock", "a+b")
+            users_dir = segment_dir + ".users"
+            os.makedirs(users_dir, exist_ok=True)
+            self._user_file = open(os.path.join(users_dir, f"{os.getpid()}-{id(self)}"), "a+b")
+            try_lock(self._user_file)
+        # Waits for a compaction in another process to finish
+        with self._write_locked():
+            self._open()
+
+    @contextmanager
+    def _write_locked(self):
+        """Hold the lock shared by every process writing to the store"""
+        if self._lock_file is None:
+            yield
+        else:
+            with file_locked(self._lock_file):
+                yield
+
+    def _catch_up(self):
+        """Move past the records and segments other processes appended, under the write lock"""
+        self._read_new_keys()
+        while os.path.exists(self.segment_path(self._segment_number + 1)):
+            self._segment.close()
+            self._segment_number += 1
+            self._segment = open(self.segment_path(self._segment_number), "ab")
+        self._segment.seek(0, os.SEEK_END)
+        self._offsets.seek(0, os.SEEK_END)
+
+    def _open(self):
+        """Load the key table and open the current segment for appending"""
+        self._maps = {}
+        self._offsets_map = None
+        offsets_path = os.path.join(self.segment_dir, OFFSETS_FILE)
+        keys_path = os.path.join(self.segment_dir, KEYS_FILE)
+        with open(keys_path, "ab+") as f:
+            f.seek(0)
+            keys = f.read().decode("utf-8").split("\n")[:-1]
+        with open(offsets_path, "ab+") as f:
+            count = f.seek(0, os.SEEK_END) // ENTRY.size
+
+        # A save interrupted between the two files leaves one entry short
+        count = min(count, len(keys))
+        self._truncate(offsets_path, count * ENTRY.size)
+        self._truncate(keys_path, sum(len(key.encode("utf-8")) + 1 for key in keys[:count]))
+        self._offsets = open(offsets_path, "r+b")
+        self._offsets.seek(0, os.SEEK_END)
+        self._keys = open(keys_path, "ab")
+        self._count = count
+        self._keys_size = self._keys.tell()
+        self._records = {key: number for number, key in enumerate(keys[:count])}
+        if count:
+            removed = {
+                number for number, (_, _, size, _) in enumerate(ENTRY.iter_unpack(self._table()))
+                if size == REMOVED
+            }
+            self._records = {key: number for key, number in self._records.items() if number not in removed}
+
+        segments = self.segment_numbers()
+        self._segment_number = segments[-1] if segments else 1
+        self._segment = open(self.segment_path(self._segment_number), "ab")
+
+    def _truncate(self, path, size):
+        """Cut a file to size if it is longer"""
+        if os.path.getsize(path) > size:
+            with open(path, "r+b") as f:
+                f.truncate(size)
+
+    def segment_path(self, number):
+        """Return the file path of a segment"""
+        return os.path.join(self.segment_dir, f"{number:06d}.seg")
+
+    def segment_numbers(self):
+        """Return the numbers of the segment files, in order"""
+        return sorted(
+            int(name[:-4]) for name in os.listdir(self.segment_dir)
+            if name.endswith(".seg") and name[:-4].isdigit()
+        )
+
+    def __contains__(self, key):
+        return self.stat(key) is not None
+
+    def __len__(self):
+        with self._lock:
+            return len(self._records)
+
+    def put(self, key, data, mtime=None):
+        """Append a record, replacing any earlier record with the same key"""
+        with self._lock, self._write_locked():
+            self._catch_up()
+            offset = self._begin_record(key, len(data), mtime)
+            self._segment.write(data)
+            self._finish_record(key, offset, len(data), mtime)
+
+    def put_file(self, key, source_path, mtime=None):
+        """Append the content of a file as a record, then delete the file"""
+        size = os.path.getsize(source_path)
+        with self._lock, self._write_locked():
+            self._catch_up()
+            offset = self._begin_record(key, size, mtime)
+            with open(source_path, "rb") as f:
+                shutil.copyfileobj(f, self._segment, COPY_CHUNK_SIZE)
+            self._finish_record(key, offset, size, mtime)
+        os.remove(source_path)
+
+    def _begin_record(self, key, size, mtime):
+        """Write a record header, rolling to a new segment when full; return the body offset"""
+        encoded_key = key.encode("utf-8")
+        position = self._segment.tell()
+        if position and position + RECORD_HEADER.size + len(encoded_key) + size > self.max_bytes:
+            self._segment.close()
+            self._segment_number += 1
+            self._segment = open(self.segment_path(self._segment_number), "ab")
+            position = 0
+
+        self._segment.write(RECORD_HEADER.pack(RECORD_MAGIC, len(encoded_key), mtime or time.time(), size))
+        self._segment.write(encoded_key)
+        return position + RECORD_HEADER.size + len(encoded_key)
+
+    def _finish_record(self, key, offset, size, mtime):
+        """Make an appended body visible through the offset table"""
+        # The body reaches the segment before the table points at it
+        self._segment.flush()
+        self._offsets.write(ENTRY.pack(self._segment_number, offset, size, mtime or time.time()))
+        self._offsets.flush()
+        line = key.encode("utf-8") + b"\n"
+        self._keys.write(line)
+        self._keys.flush()
+        self._keys_size += len(line)
+        self._records[key] = self._count
+        self._count += 1
+
+    def _lookup(self, key):
+        """Return the record number of a key, picking up records saved by another process"""
+        number = self._records.get(key)
+        if number is not None:
+            return number
+        self._read_new_keys()
+        return self._records.get(key)
+
+    def _read_new_keys(self):
+        """Read the keys other processes appended to keys.lst since it was last read"""
+        # The offset table is written before keys.lst, so every new key has its entry
+        with open(os.path.join(self.segment_dir, KEYS_FILE), "rb") as f:
+            f.seek(self._keys_size)
+            data = f.read()
+        data = data[:data.rfind(b"\n") + 1]
+        for line in data.decode("utf-8").split("\n")[:-1]:
+            self._records[line] = self._count
+            self._count += 1
+        self._keys_size += len(data)
+
+    def _table(self, end=0):
+        """Return a map of the offset table covering at least end bytes"""
+        if self._offsets_map is None or len(self._offsets_map) < end:
+            self._offsets_map = mmap.mmap(self._offsets.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._offsets_map
+
+    def _entry(self, number):
+        """Read an offset table entry, None when the record was removed"""
+        entry = ENTRY.unpack_from(self._table((number + 1) * ENTRY.size), number * ENTRY.size)
+        return None if entry[2] == REMOVED else entry
+
+    def _segment_map(self, number, end):
+        """Return a map of a segment covering at least end bytes"""
+        # A map that is too short is dropped, not closed, as readers may still use it
+        segment_map = self._maps.get(number)
+        if segment_map is None or len(segment_map) < end:
+            with open(self.segment_path(number), "rb") as f:
+                segment_map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._maps[number] = segment_map
+        return segment_map
+
+    def stat(self, key):
+        """Return the RecordStat of a key, or None when it is not stored"""
+        with self._lock:
+            number = self._lookup(key)
+            entry = None if number is None else self._entry(number)
+        if entry is None:
+            return None
+        return RecordStat(entry[2], entry[3])
+
+    def open(self, key):
+        """Open the body of a record for reading without copying it"""
+        with self._lock:
+            number = self._lookup(key)
+            entry = None if number is None else self._entry(number)
+            if entry is None:
+                raise FileNotFoundError(f"No stored capture: {key}")
+            segment, offset, size, _ = entry
+            view = memoryview(self._segment_map(segment, offset + size))[offset:offset + size]
+        return SegmentReader(view)
+
+    def read(self, key):
+        """Return the body of a record"""
+        with self.open(key) as f:
+            return f.read()
+
+    def remove(self, key):
+        """Mark a record as removed, its space is reclaimed by compact()"""
+        with self._lock, self._write_locked():
+            self._read_new_keys()
+            number = self._records.pop(key, None)
+            if number is None:
+                return False
+            entry = self._entry(number)
+            if entry is None:
+                return False
+            segment, offset, _, mtime = entry
+            self._offsets.seek(number * ENTRY.size)
+            self._offsets.write(ENTRY.pack(segment, offset, REMOVED, mtime))
+            self._offsets.seek(0, os.SEEK_END)
+            self._offsets.flush()
+        return True
+
+    def items(self):
+        """Return (key, RecordStat) of every stored record in save order"""
+        with self._lock:
+            records = sorted(self._records.items(), key=lambda item: item[1])
+            result = []
+            for key, number in records:
+                entry = self._entry(number)
+                if entry is not None:
+                    result.append((key, RecordStat(entry[2], entry[3])))
+        return result
+
+    def size(self):
+        """Return the bytes used by the segment files"""
+        return sum(os.path.getsize(self.segment_path(number)) for number in self.segment_numbers())
+
+    def compact(self, transform=None):
+        """Rewrite the live records into fresh segments, return (bytes before, bytes after)
+
+        Removed and replaced records are dropped. transform(key, data) may
+        return new data for a record, e.g. to recompress it. Raises
+        SegmentStoreBusy when another process has the store open.
+        """
+        temp_dir = self.segment_dir + ".compact"
+        with self._lock, self._write_locked():
+            if self._other_users():
+                raise SegmentStoreBusy(f"{self.segment_dir} is in use by another process, close it before compacting")
+            shutil.rmtree(temp_dir, ignore_errors=True)
+            self._read_new_keys()
+            before = self.size()
+            compacted = SegmentStore(temp_dir, self.max_bytes, lock=False)
+            try:
+                for key, number in sorted(self._records.items(), key=lambda item: item[1]):
+                    entry = self._entry(number)
+                    if entry is None:
+                        continue
+                    segment, offset, size, mtime = entry
+                    data = self._segment_map(segment, offset + size)[offset:offset + size]
+                    compacted.put(key, transform(key, data) if transform else data, mtime)
+            finally:
+                compacted.close()
+
+            # The old segments are swapped out only once the copy is complete
+            self._close_files()
+            old_dir = self.segment_dir + ".old"
+            shutil.rmtree(old_dir, ignore_errors=True)
+            os.replace(self.segment_dir, old_dir)
+            os.replace(temp_dir, self.segment_dir)
+            shutil.rmtree(old_dir, ignore_errors=True)
+            self._open()
+        return before, self.size()
+
+    def _other_users(self):
+        """Count the other open stores, removing the files left by processes that exited"""
+        if self._user_file is None:
+            return 0
+        users_dir = self.segment_dir + ".users"
+        count = 0
+        for name in os.listdir(users_dir):
+            path = os.path.join(users_dir, name)
+            if path == self._user_file.name:
+                continue
+            try:
+                with open(path, "a+b") as f:
+                    unused = try_lock(f)
+            except OSError:
+                unused = False
+            if not unused:
+                count += 1
+                continue
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        return count
+
+    def _close_files(self):
+        """Release every map and file handle"""
+        # Maps still read by an open SegmentReader are closed once it is released
+        self._maps = {}
+        self._offsets_map = None
+        self._offsets.close()
+        self._keys.close()
+        self._segment.close()
+
+    def close(self):
+        """Close the store and release its lock"""
+        with self._lock:
+            self._close_files()
+            if self._lock_file is not None:
+                self._lock_file.close()
+                self._lock_file = None
+            if self._user_file is not None:
+                self._user_file.close()
+                try:
+                    os.remove(self._user_file.name)
+                except OSError:
+                    pass
+                self._user_file = None
\ No newline at end of file
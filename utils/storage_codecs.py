@@ -0,0 +1,237 @@
+import bisect
+import gzip
+import io
+import zlib
+from collections import OrderedDict
+from config.settings import STORAGE_CODEC, STORAGE_CODEC_LEVEL, VIEWER_DECODE_CACHE, VIEWER_DECODE_CHECKPOINT
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+# Random access reads decode compressed bytes in chunks of this size and
+# cache the output in blocks of DECODE_BLOCK decompressed bytes
+RAW_CHUNK = 16 * 1024
+DECODE_BLOCK = 64 * 1024
+
+def available_codecs():
+    """Return the codecs usable in this environment"""
+    codecs = ["none", "gzip"]
+    if zstandard is not None:
+        codecs.append("zstd")
+    return codecs
+
+def resolve_codec(codec=STORAGE_CODEC):
+    """Turn a configured codec name into a usable one"""
+    if codec == "auto":
+        return "zstd" if zstandard is not None else "gzip"
+    if codec not in available_codecs():
+        raise ValueError(f"Storage codec not available: {codec}")
+    return codec
+
+def detect_codec(head):
+    """Detect the codec of stored bytes from their first bytes"""
+    if head.startswith(GZIP_MAGIC):
+        return "gzip"
+    if head.startswith(ZSTD_MAGIC):
+        return "zstd"
+    return "none"
+
+def encode(content, codec, level=STORAGE_CODEC_LEVEL):
+    """Compress content with a codec"""
+    if codec == "gzip":
+        return gzip.compress(content, compresslevel=level, mtime=0)
+    if codec == "zstd":
+        return zstandard.ZstdCompressor(level=level).compress(content)
+    return content
+
+def decode(data):
+    """Decompress bytes of any supported codec"""
+    codec = detect_codec(data[:4])
+    if codec == "gzip":
+        return gzip.decompress(data)
+    if codec == "zstd":
+        return _require_zstd().ZstdDecompressor().stream_reader(io.BytesIO(data)).read()
+    return data
+
+def open_decoded(raw):
+    """Wrap a seekable binary file so reads return decompressed bytes"""
+    codec = detect_codec(raw.read(4))
+    raw.seek(0)
+    if codec == "gzip":
+        return DecodedReader(gzip.GzipFile(fileobj=raw, mode="rb"), raw)
+    if codec == "zstd":
+        return DecodedReader(_require_zstd().ZstdDecompressor().stream_reader(raw), raw)
+    return raw
+
+def open_seekable(raw):
+    """Wrap a seekable binary file so reads at any offset return decompressed bytes"""
+    codec = detect_codec(raw.read(4))
+    raw.seek(0)
+    if codec == "none":
+        return raw
+    if codec == "zstd":
+        _require_zstd()
+    return SeekableReader(raw, codec)
+
+def open_encoder(raw, codec, level=STORAGE_CODEC_LEVEL):
+    """Wrap a binary file so writes are compressed, closing it leaves the file open"""
+    if codec == "gzip":
+        return gzip.GzipFile(filename="", fileobj=raw, mode="wb", compresslevel=level, mtime=0)
+    if codec == "zstd":
+        return zstandard.ZstdCompressor(level=level).stream_writer(raw, closefd=False)
+    return PlainWriter(raw)
+
+def _require_zstd():
+    """Return the zstandard module or explain how to get it"""
+    if zstandard is None:
+        raise ValueError("Response is zstd compressed, install the zstandard package to read it")
+    return zstandard
+
+class PlainWriter:
+    """Writer for uncompressed storage with the same interface as the encoders"""
+
+    def __init__(self, raw):
+        self.raw = raw
+
+    def write(self, data):
+        return self.raw.write(data)
+
+    def close(self):
+        pass
+
+class DecodedReader:
+    """Decompressing reader that also closes the underlying file"""
+
+    def __init__(self, reader, raw):
+        self.reader = reader
+        self.raw = raw
+
+    def read(self, size=-1):
+        return self.reader.read(size)
+
+    def close(self):
+        self.reader.close()
+        self.raw.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+class SeekableReader:
+    """Random access to the decompressed bytes of a compressed file
+
+    Nothing is written to disk: decoded blocks are kept in a small cache
+    and a block that is no longer cached is decoded again from the
+    nearest resume point. gzip decoders are copied every checkpoint
+    decompressed bytes; zstd decoders cannot be copied, so zstd files
+    are decoded again from the start.
+    """
+
+    def __init__(self, raw, codec, cache_size=VIEWER_DECODE_CACHE, checkpoint=VIEWER_DECODE_CHECKPOINT):
+        self.raw = raw
+        self.codec = codec
+        self.cache_blocks = max(1, cache_size // DECODE_BLOCK)
+        self.checkpoint_blocks = max(1, checkpoint // DECODE_BLOCK)
+        self.blocks = OrderedDict()  # block number: decompressed bytes, least recently used first
+        self.offset = 0
+
+        # Resume points as (block number, raw offset, decoder, decoded bytes of an unfinished block)
+        self.checkpoints = [(0, 0, None, b"")]
+        self._restore(0)
+
+    def _new_decoder(self):
+        """Return a decoder for the start of the file"""
+        if self.codec == "gzip":
+            return zlib.decompressobj(16 + zlib.MAX_WBITS)
+        return zstandard.ZstdDecompressor().decompressobj()
+
+    def _restore(self, index):
+        """Continue decoding from a resume point"""
+        self.block, self.raw_offset, decoder, self.pending = self.checkpoints[index]
+        # The resume point is copied so it can be used again
+        self.decoder = self._new_decoder() if decoder is None else decoder.copy()
+        self.done = False
+
+    def _decode_next(self):
+        """Decode the next chunk of the file and cache the blocks it completes, False at the end"""
+        self.raw.seek(self.raw_offset)
+        data = self.raw.read(RAW_CHUNK)
+        self.raw_offset += len(data)
+        pending = self.pending + self.decoder.decompress(data) if data else self.pending
+
+        count = len(pending) // DECODE_BLOCK
+        for i in range(count):
+            self._cache(self.block + i, pending[i * DECODE_BLOCK:(i + 1) * DECODE_BLOCK])
+        self.block += count
+        self.pending = pending[count * DECODE_BLOCK:]
+
+        if not data:
+            self._cache(self.block, self.pending)
+            self.done = True
+            return False
+        if self.codec == "gzip" and self.block >= self.checkpoints[-1][0] + self.checkpoint_blocks:
+            self.checkpoints.append((self.block, self.raw_offset, self.decoder.copy(), self.pending))
+        return True
+
+    def _cache(self, number, block):
+        """Keep a decoded block, dropping the least recently used one when full"""
+        self.blocks[number] = block
+        self.blocks.move_to_end(number)
+        if len(self.blocks) > self.cache_blocks:
+            self.blocks.popitem(last=False)
+
+    def _get_block(self, number):
+        """Return a block of decompressed bytes, empty past the end"""
+        block = self.blocks.get(number)
+        if block is not None:
+            self.blocks.move_to_end(number)
+            return block
+        if number < self.block:
+            index = bisect.bisect_right([checkpoint[0] for checkpoint in self.checkpoints], number) - 1
+            self._restore(index)
+        while not self.done and number not in self.blocks:
+            self._decode_next()
+        return self.blocks.get(number, b"")
+
+    def seek(self, offset, whence=0):
+        """Move to an offset of the decompressed bytes"""
+        if whence != 0:
+            raise io.UnsupportedOperation("only absolute seeks are supported")
+        self.offset = offset
+        return offset
+
+    def tell(self):
+        return self.offset
+
+    def read(self, size=-1):
+        """Return up to size decompressed bytes from the current offset"""
+        chunks = []
+        while size != 0:
+            number, start = divmod(self.offset, DECODE_BLOCK)
+            block = self._get_block(number)
+            data = block[start:] if size < 0 else block[start:start + size]
+            if not data:
+                break
+            chunks.append(data)
+            self.offset += len(data)
+            if size > 0:
+                size -= len(data)
+        return b"".join(chunks)
+
+    def close(self):
+        self.blocks.clear()
+        self.checkpoints = []
+        self.raw.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
\ No newline at end of file
@@ -0,0 +1,107 @@
+import itertools
+import logging
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from config.settings import REQUEST_WORKERS
+
+class TaskCancelled(Exception):
+    """Raised inside a task when it has been cancelled"""
+
+class TaskRunner:
+    """Run tasks on a thread pool and hand their results back through a queue
+
+    Tasks receive a threading.Event as their first argument and should
+    call check_cancelled(event) between steps. Results are delivered by
+    poll(), which is meant to be called from the GUI thread; a callback
+    that raises is logged and does not hold back the other results.
+    """
+
+    def __init__(self, max_workers=REQUEST_WORKERS, logger=None):
+        self.logger = logger or logging.getLogger('URLParser')
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="task")
+        self.results = queue.Queue()
+        self._tasks = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def submit(self, func, *args, on_done=None, on_error=None):
+        """Schedule func(cancel_event, *args) and return its task id"""
+        task_id = next(self._ids)
+        cancel_event = threading.Event()
+        with self._lock:
+            future = self.executor.submit(self._run, task_id, func, cancel_event, args)
+            self._tasks[task_id] = (future, cancel_event, on_done, on_error)
+        return task_id
+
+    def _run(self, task_id, func, cancel_event, args):
+        """Run a task on a worker thread and queue its outcome"""
+        try:
+            result = func(cancel_event, *args)
+            self.results.put((task_id, result, None))
+        except BaseException as e:
+            self.results.put((task_id, None, e))
+
+    def cancel(self, task_id):
+        """Cancel a queued or running task"""
+        with self._lock:
+            task = self._tasks.get(task_id)
+        if task is None:
+            return False
+
+        future, cancel_event = task[0], task[1]
+        cancel_event.set()
+
+        # Tasks that never started will not report back, drop them here
+        if future.cancel():
+            with self._lock:
+                self._tasks.pop(task_id, None)
+        return True
+
+    def cancel_all(self):
+        """Cancel every queued or running task"""
+        with self._lock:
+            task_ids = list(self._tasks)
+        for task_id in task_ids:
+            self.cancel(task_id)
+        return len(task_ids)
+
+    def pending(self):
+        """Return the number of tasks that have not reported back yet"""
+        with self._lock:
+            return len(self._tasks)
+
+    def poll(self):
+        """Deliver finished task results to their callbacks, return how many"""
+        delivered = 0
+        while True:
+            try:
+                task_id, result, error = self.results.get_nowait()
+            except queue.Empty:
+                return delivered
+
+            with self._lock:
+                task = self._tasks.pop(task_id, None)
+            if task is None:
+                continue
+
+            on_done, on_error = task[2], task[3]
+            try:
+                if error is None:
+                    if on_done:
+                        on_done(result)
+                elif on_error:
+                    on_error(error)
+            except Exception as e:
+                self.logger.error(f"Task callback failed: {str(e)}", exc_info=e)
+            delivered += 1
+
+    def shutdown(self):
+        """Cancel outstanding tasks and stop the worker threads"""
+        self.cancel_all()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+def check_cancelled(cancel_event):
+    """Raise TaskCancelled when the event has been set"""
+    if cancel_event is not None and cancel_event.is_set():
+        raise TaskCancelled("Task cancelled")
\ No newline at end of file